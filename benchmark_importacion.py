@@ -0,0 +1,253 @@
+"""
+Benchmark de importación de mortalidad.
+
+Ejecuta cada modo de carga de whodata.py contra una base MariaDB/MySQL
+LOCAL de pruebas y muestra el rendimiento (filas/s, latencia por lote) y el
+pico de memoria de cada uno:
+
+    executemany                   INSERT por lotes, en serie
+    executemany_ajuste            ... con --ajustar-lote
+    executemany_paralelo          ... con N procesos (uno por cada valor de --procesos > 1)
+    load_data                     LOAD DATA LOCAL INFILE, en serie
+    load_data_paralelo            ... con N procesos
+    load_data_indices_diferidos   ... con --indices-diferidos
+    delta                         --delta tras cambiar --fraccion-delta de los grupos
+                                  (Country, Year, List) de una carga base
+
+Cada modo corre en su propio proceso para medir su memoria por separado.
+Con --generar FILAS se crean antes datos sintéticos con
+generar_mortalidad_sintetica.py, así no hacen falta los archivos reales.
+
+En 'delta' se carga primero la base completa con LOAD DATA (sin medir), se
+copian los archivos a una carpeta temporal cambiando las muertes de una
+parte conocida de los grupos (Country, Year, List) y se mide sólo la
+importación incremental de esa copia, que debe reemplazar esos grupos.
+
+¡ATENCIÓN! Vacía (TRUNCATE) la tabla de mortalidad antes de cada corrida:
+no lo ejecutes contra la base de producción.
+
+Uso:
+    python benchmark_importacion.py --generar 1000000 --csv-dir /tmp/who_bench \
+        --database who_bench --user root --password '' --procesos 1,2,4
+"""
+
+import os
+import csv
+import json
+import time
+import zlib
+import shutil
+import resource
+import argparse
+import tempfile
+import multiprocessing
+
+import whodata
+import generar_mortalidad_sintetica
+
+MODOS = {
+    'executemany': {'motor': 'executemany'},
+    'executemany_ajuste': {'motor': 'executemany', 'ajustar_lote': True},
+    'executemany_paralelo': {'motor': 'executemany', 'paralelo': True},
+    'load_data': {'motor': 'load_data'},
+    'load_data_paralelo': {'motor': 'load_data', 'paralelo': True},
+    'load_data_indices_diferidos': {'motor': 'load_data', 'diferir_indices': True},
+    'delta': {'delta': True},
+}
+
+# Parte de los grupos (Country, Year, List) que se cambian antes de medir 'delta'
+FRACCION_DELTA = 0.05
+
+
+def vaciar_tabla(db_config, table_name):
+    connection = whodata.conectar(db_config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE TABLE {table_name}")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def contar_filas(db_config, table_name):
+    connection = whodata.conectar(db_config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def preparar_delta(csv_dir, fraccion=FRACCION_DELTA):
+    """
+    Copia los archivos de mortalidad de csv_dir (también los miembros de .zip)
+    a una carpeta temporal, sumando 1 muerte (a Deaths1 y a su último grupo de
+    edad, para que el total siga cuadrando) en las filas de una `fraccion` de
+    los grupos (Country, Year, List). Los grupos se eligen por el CRC32 de su
+    clave, así son siempre los mismos. Devuelve (carpeta, grupos cambiados).
+    """
+    destino = tempfile.mkdtemp(prefix='who_delta_')
+    umbral = int(fraccion * 0xFFFFFFFF)
+    cambiados = set()
+    for fuente in whodata.listar_archivos_mortalidad(csv_dir):
+        ruta = os.path.join(csv_dir, fuente)
+        if not whodata.existe_fuente(ruta):
+            continue
+        nombre = os.path.basename(fuente.split(whodata.SEPARADOR_ZIP)[-1])
+        with whodata.abrir_fuente_texto(ruta) as entrada, \
+                open(os.path.join(destino, nombre), mode='w', encoding='utf-8', newline='') as salida:
+            lector, escritor = csv.reader(entrada), csv.writer(salida)
+            cabecera = next(lector)
+            escritor.writerow(cabecera)
+            nombres = [col.strip().lower() for col in cabecera]
+            indices_clave = [nombres.index(col.lower()) for col in whodata.COLUMNAS_PARTICION]
+            indices_muertes = [nombres.index(f'deaths{i}') for i in range(1, 27) if f'deaths{i}' in nombres]
+            for fila in lector:
+                clave = whodata.clave_particion(fila[i] for i in indices_clave)
+                if zlib.crc32('|'.join(clave).encode('utf-8')) <= umbral and fila[indices_muertes[0]].strip().isdigit():
+                    # Deaths1 y el último grupo de edad con valor (con Frmat 09 sólo hay Deaths1)
+                    con_valor = [i for i in indices_muertes[1:] if fila[i].strip().isdigit()]
+                    for i in [indices_muertes[0]] + con_valor[-1:]:
+                        fila[i] = str(int(fila[i]) + 1)
+                    cambiados.add(clave)
+                escritor.writerow(fila)
+    return destino, cambiados
+
+
+def pico_memoria_mb():
+    """Mayor memoria residente de este proceso o de sus hijos ya terminados (Linux: KB)."""
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(propio, hijos) / 1024
+
+
+def _ejecutar_modo(csv_dir, db_config, opciones, procesos, cola):
+    """Cuerpo del proceso hijo: una importación completa con las opciones del modo."""
+    whodata._telemetria = whodata.Telemetria(**opciones)
+    whodata._ajuste_lote = whodata.AjusteLote() if opciones.get('ajustar_lote') else None
+
+    inicio = time.perf_counter()
+    modificados = None
+    if opciones.get('delta'):
+        modificados = len(whodata.importar_delta(csv_dir, db_config))
+    else:
+        whodata.importar_mortalidad_linea_por_linea(
+            csv_dir, db_config, motor=opciones['motor'], procesos=procesos, reanudar=False,
+            diferir_indices=opciones.get('diferir_indices', False))
+    duracion = time.perf_counter() - inicio
+
+    informe = whodata._telemetria.informe()
+    cola.put({
+        'segundos': duracion,
+        'memoria_mb': pico_memoria_mb(),
+        'latencia_lote_ms': informe['total']['latencia_lote_ms'],
+        'fases': informe['fases'],
+        'paises_anios_modificados': modificados,
+    })
+
+
+def _en_proceso(csv_dir, db_config, opciones, procesos):
+    """Ejecuta una importación en un proceso aparte (memoria propia) y devuelve sus medidas."""
+    cola = multiprocessing.Queue()
+    proceso = multiprocessing.Process(target=_ejecutar_modo, args=(csv_dir, db_config, opciones, procesos, cola))
+    proceso.start()
+    resultado = cola.get()
+    proceso.join()
+    return resultado
+
+
+def medir(csv_dir, db_config, modo, procesos, fraccion_delta=FRACCION_DELTA):
+    """Ejecuta un modo en un proceso aparte y devuelve su resultado (segundos, filas, memoria...)."""
+    opciones = MODOS[modo]
+    vaciar_tabla(db_config, whodata.TABLE_NAME_MORTALIDAD)
+    if not opciones.get('delta'):
+        resultado = _en_proceso(csv_dir, db_config, opciones, procesos)
+        resultado['filas'] = contar_filas(db_config, whodata.TABLE_NAME_MORTALIDAD)
+        return resultado
+
+    print("-> Carga base (no se mide)")
+    _en_proceso(csv_dir, db_config, MODOS['load_data'], 1)
+    carpeta_delta, cambiados = preparar_delta(csv_dir, fraccion_delta)
+    try:
+        print(f"-> {len(cambiados)} grupos (Country, Year, List) cambiados en '{carpeta_delta}'")
+        resultado = _en_proceso(carpeta_delta, db_config, opciones, procesos)
+    finally:
+        shutil.rmtree(carpeta_delta, ignore_errors=True)
+
+    esperados = len({clave[:2] for clave in cambiados})
+    if resultado['paises_anios_modificados'] != esperados:
+        print(f"ADVERTENCIA: el delta modificó {resultado['paises_anios_modificados']} pares "
+              f"(Country, Year); se esperaban {esperados}")
+    resultado['grupos_cambiados'] = len(cambiados)
+    resultado['filas'] = contar_filas(db_config, whodata.TABLE_NAME_MORTALIDAD)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los modos de carga del importador WHO")
+    parser.add_argument('--csv-dir', default=whodata.CARPETA_CSV)
+    parser.add_argument('--host', default=whodata.DB_HOST)
+    parser.add_argument('--user', default=whodata.DB_USER)
+    parser.add_argument('--password', default=whodata.DB_PASS)
+    parser.add_argument('--database', default=whodata.DB_NAME)
+    parser.add_argument('--port', type=int, default=whodata.DB_PORT)
+    parser.add_argument('--modos', default=','.join(MODOS),
+                        help=f"Modos a medir, en orden (por defecto todos: {', '.join(MODOS)})")
+    parser.add_argument('--procesos', default='1,2,4',
+                        help="Números de procesos de los modos *_paralelo (los valores > 1)")
+    parser.add_argument('--generar', type=int, default=0,
+                        help="Generar antes este número de filas sintéticas en --csv-dir")
+    parser.add_argument('--archivos', type=int, default=4,
+                        help="Número de archivos de los datos sintéticos")
+    parser.add_argument('--fraccion-delta', type=float, default=FRACCION_DELTA,
+                        help="Parte de los grupos (Country, Year, List) que cambia el modo 'delta'")
+    parser.add_argument('--salida-json', default='',
+                        help="Guardar también los resultados en este archivo JSON")
+    args = parser.parse_args()
+
+    db_config = {
+        'host': args.host,
+        'user': args.user,
+        'pass': args.password,
+        'name': args.database,
+        'port': args.port
+    }
+
+    if args.generar:
+        generar_mortalidad_sintetica.generar(args.csv_dir, args.generar, args.archivos)
+
+    modos = [m.strip() for m in args.modos.split(',') if m.strip()]
+    desconocidos = [m for m in modos if m not in MODOS]
+    if desconocidos:
+        parser.error(f"Modos desconocidos: {', '.join(desconocidos)}")
+    niveles_paralelos = [int(p) for p in args.procesos.split(',') if p.strip() and int(p) > 1]
+
+    corridas = []
+    for modo in modos:
+        for procesos in (niveles_paralelos if MODOS[modo].get('paralelo') else [1]):
+            print(f"\n### Corrida: {modo}, procesos={procesos}")
+            resultado = medir(args.csv_dir, db_config, modo, procesos, args.fraccion_delta)
+            corridas.append({'modo': modo, 'procesos': procesos, **resultado})
+
+    print("\n==============================================")
+    print(" Resultados")
+    print("==============================================")
+    print(f"{'modo':<28} {'proc':>4} {'segundos':>9} {'filas':>10} {'filas/s':>10} "
+          f"{'p95 ms':>8} {'memoria MB':>11} {'vs. 1º':>7}")
+    base = corridas[0]['segundos'] if corridas else 0
+    for c in corridas:
+        filas_por_segundo = c['filas'] / c['segundos'] if c['segundos'] > 0 else 0
+        aceleracion = base / c['segundos'] if c['segundos'] > 0 else 0
+        print(f"{c['modo']:<28} {c['procesos']:>4} {c['segundos']:>9.1f} {c['filas']:>10} "
+              f"{filas_por_segundo:>10,.0f} {c['latencia_lote_ms']['p95']:>8.1f} "
+              f"{c['memoria_mb']:>11,.1f} {aceleracion:>6.2f}x")
+
+    if args.salida_json:
+        with open(args.salida_json, mode='w', encoding='utf-8') as f:
+            json.dump(corridas, f, indent=2, ensure_ascii=False)
+        print(f"\n-> Resultados guardados en '{args.salida_json}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Generador de datos sintéticos de mortalidad con la forma de Morticd10_partN.
+
+Escribe archivos .csv (o .zip, como los distribuye la OMS) con las mismas
+columnas, fin de línea Windows y orden (país, año) que los archivos reales,
+para medir la importación sin descargar varios GB. Las cardinalidades
+imitan a las de un archivo real:
+
+- Países: códigos reales de mort_country_codes.zip.
+- Causas: códigos de icd10_2019.csv sin punto ('A00.0' -> 'A000'), con una
+  frecuencia tipo Zipf (pocas causas muy comunes y una cola larga). Las
+  listas 103 (3 caracteres) y 101 (lista condensada '1000'...) en su proporción.
+- Sexo 1/2 (y algún 9), formatos de edad Frmat 00/01/02/09 y
+  Deaths1 = suma de Deaths2..26, igual que en los datos reales.
+
+La distribución por edad es aproximada. Con la misma --semilla se
+generan siempre los mismos archivos.
+
+Uso:
+    python generar_mortalidad_sintetica.py --filas 2000000 --archivos 4 --salida datos_sinteticos
+"""
+
+import os
+import io
+import csv
+import random
+import itertools
+import collections
+import zipfile
+import argparse
+
+# --- CONFIGURACIÓN ---
+
+# Carpeta donde están icd10_2019.csv y mort_country_codes.zip
+CARPETA_DATASETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets')
+
+# Carpeta de salida de los archivos generados
+CARPETA_SALIDA = 'datos_sinteticos'
+
+FILAS = 1000000
+ARCHIVOS = 1
+NUM_PAISES = 86
+ANIOS = (2019, 2023)
+SEMILLA = 42
+
+# Proporciones observadas en Morticd10_part6
+PROPORCION_LISTAS = {'104': 0.961, '103': 0.036, '101': 0.003}
+PROPORCION_SEXO = {'1': 0.52, '2': 0.476, '9': 0.004}
+PROPORCION_FRMAT = {'00': 0.86, '01': 0.06, '02': 0.06, '09': 0.02}
+
+# Exponente de la distribución Zipf de las causas
+EXPONENTE_ZIPF = 1.1
+
+# Perfiles de edad distintos que se reparten entre las filas
+NUM_PERFILES_EDAD = 64
+
+CABECERA = (['Country', 'Admin1', 'SubDiv', 'Year', 'List', 'Cause', 'Sex', 'Frmat', 'IM_Frmat']
+            + [f'Deaths{i}' for i in range(1, 27)] + [f'IM_Deaths{i}' for i in range(1, 5)])
+
+
+def leer_paises(carpeta=CARPETA_DATASETS):
+    """Códigos de país de mort_country_codes.zip (miembro 'country_codes')."""
+    with zipfile.ZipFile(os.path.join(carpeta, 'mort_country_codes.zip')) as archivo_zip:
+        texto = archivo_zip.read('country_codes').decode('latin-1')
+    return [fila['country'].strip() for fila in csv.DictReader(io.StringIO(texto)) if fila['country'].strip()]
+
+
+def leer_causas(carpeta=CARPETA_DATASETS):
+    """Códigos CIE-10 de icd10_2019.csv tal como aparecen en los archivos de la OMS (sin punto)."""
+    with open(os.path.join(carpeta, 'icd10_2019.csv'), mode='r', encoding='utf-8', newline='') as f:
+        codigos = {fila['sub-code'].replace('.', '').strip() for fila in csv.DictReader(f)}
+    return sorted(c for c in codigos if 3 <= len(c) <= 4)
+
+
+def pesos_zipf(n, exponente=EXPONENTE_ZIPF):
+    """Pesos acumulados de una distribución Zipf (para random.choices(cum_weights=...))."""
+    return list(itertools.accumulate(1 / (rango ** exponente) for rango in range(1, n + 1)))
+
+
+def sortear(rng, proporciones, k):
+    """`k` valores sorteados según un diccionario {valor: proporción}."""
+    return rng.choices(list(proporciones), weights=list(proporciones.values()), k=k)
+
+
+def perfiles_edad(rng, n=NUM_PERFILES_EDAD):
+    """
+    Perfiles de reparto de muertes en Deaths2..26: poca mortalidad infantil,
+    mínimo en la infancia y crecimiento con la edad, con ruido entre perfiles.
+    """
+    base = [3.0, 0.6, 0.3, 0.2, 0.2, 0.3, 0.4, 0.8, 1.0, 1.1, 1.3, 1.6, 2.1, 2.8, 3.8,
+            5.0, 6.4, 8.0, 9.5, 10.5, 10.8, 10.0, 8.0, 5.0, 0.1]
+    perfiles = []
+    for _ in range(n):
+        pesos = [p * rng.gammavariate(4, 0.25) for p in base]
+        total = sum(pesos)
+        perfiles.append([p / total for p in pesos])
+    return perfiles
+
+
+def repartir(total, perfil):
+    """Reparte `total` muertes según el perfil; la suma es exactamente `total`."""
+    partes = [int(total * p) for p in perfil]
+    partes[perfil.index(max(perfil))] += total - sum(partes)
+    return partes
+
+
+def columnas_edad(total, frmat, perfil):
+    """Deaths1..26 según el formato de edad (vacío donde ese formato no informa)."""
+    if frmat == '09':
+        return [total] + [None] * 25
+    grupos = repartir(total, perfil)
+    if frmat == '02':
+        # Sólo 1-4 años agrupados en Deaths3 (Deaths4..6 vacíos)
+        grupos[1] += grupos[2] + grupos[3] + grupos[4]
+        grupos[2] = grupos[3] = grupos[4] = None
+    elif frmat == '01':
+        # 85+ agrupado en Deaths23 (Deaths24..25 vacíos)
+        grupos[21] += grupos[22] + grupos[23]
+        grupos[22] = grupos[23] = None
+    return [total] + grupos
+
+
+def generar_filas(filas, paises, causas, anios, rng):
+    """
+    Genera las filas en el orden de los archivos de la OMS: por país, año,
+    lista, causa y sexo. Devuelve un iterador de listas de valores.
+    """
+    perfiles = perfiles_edad(rng)
+    causas_104 = causas[:]
+    rng.shuffle(causas_104)
+    pesos_104 = pesos_zipf(len(causas_104))
+    causas_103 = [c for c in causas_104 if len(c) == 3]
+    pesos_103 = pesos_zipf(len(causas_103))
+    causas_101 = [str(c) for c in range(1000, 1104)]
+    pesos_101 = pesos_zipf(len(causas_101), 0.5)
+    listas = {'104': (causas_104, pesos_104), '103': (causas_103, pesos_103), '101': (causas_101, pesos_101)}
+
+    particiones = [(pais, anio) for pais in sorted(paises) for anio in range(anios[0], anios[1] + 1)]
+    por_particion = max(1, filas // len(particiones))
+    restantes = filas
+
+    for numero, (pais, anio) in enumerate(particiones):
+        if restantes <= 0:
+            return
+        objetivo = restantes if numero == len(particiones) - 1 else min(restantes, por_particion)
+        # Combinaciones únicas (lista, causa, sexo) de la partición, sorteadas por tandas
+        claves = set()
+        for _ in range(20):
+            faltan = objetivo - len(claves)
+            if faltan <= 0:
+                break
+            sorteo_listas = collections.Counter(sortear(rng, PROPORCION_LISTAS, faltan * 2))
+            for lista, cantidad in sorted(sorteo_listas.items()):
+                candidatas, pesos = listas[lista]
+                causas_lista = rng.choices(candidatas, cum_weights=pesos, k=cantidad)
+                sexos = sortear(rng, PROPORCION_SEXO, cantidad)
+                claves.update(zip([lista] * cantidad, causas_lista, sexos))
+        if len(claves) < objetivo:
+            # La cola de la Zipf casi nunca sale: completar con combinaciones aún sin usar
+            for causa in causas_104:
+                for sexo in ('1', '2'):
+                    if len(claves) >= objetivo:
+                        break
+                    claves.add(('104', causa, sexo))
+        claves = sorted(claves)
+        if len(claves) > objetivo:
+            claves = sorted(rng.sample(claves, objetivo))
+
+        for (lista, causa, sexo), frmat in zip(claves, sortear(rng, PROPORCION_FRMAT, len(claves))):
+            total = int(rng.lognormvariate(1.5, 1.6))
+            muertes = columnas_edad(total, frmat, rng.choice(perfiles))
+            if frmat == '09':
+                im_frmat, im_muertes = '09', [None] * 4
+            else:
+                im_frmat = '01'
+                im_muertes = repartir(muertes[1], [0.45, 0.15, 0.2, 0.2])
+            yield [pais, None, None, anio, lista, causa, sexo, frmat, im_frmat] + muertes + im_muertes
+            restantes -= 1
+
+
+def escribir_archivos(salida, filas, archivos, paises, causas, anios, rng, comprimir=False):
+    """
+    Reparte las filas en `archivos` partes Morticd10_partN (.csv o .zip) sin
+    partir una misma partición (país, año) entre dos archivos.
+    Devuelve (rutas escritas, filas escritas).
+    """
+    os.makedirs(salida, exist_ok=True)
+    por_archivo = -(-filas // archivos)
+    rutas = []
+    escritor = None
+    destino = None
+    contenedor = None
+    escritas = 0
+    total = 0
+    ultima_particion = None
+
+    def abrir(numero):
+        nonlocal destino, contenedor, escritor, escritas
+        nombre = f"Morticd10_part{numero}"
+        if comprimir:
+            ruta = os.path.join(salida, f"morticd10_part{numero}.zip")
+            contenedor = zipfile.ZipFile(ruta, mode='w', compression=zipfile.ZIP_DEFLATED)
+            destino = io.TextIOWrapper(contenedor.open(nombre, mode='w', force_zip64=True),
+                                       encoding='utf-8', newline='')
+        else:
+            ruta = os.path.join(salida, f"{nombre}.csv")
+            destino = open(ruta, mode='w', encoding='utf-8', newline='')
+        rutas.append(ruta)
+        escritor = csv.writer(destino, lineterminator='\r\n')
+        escritor.writerow(CABECERA)
+        escritas = 0
+
+    def cerrar():
+        destino.close()
+        if contenedor is not None:
+            contenedor.close()
+
+    abrir(1)
+    for fila in generar_filas(filas, paises, causas, anios, rng):
+        particion = (fila[0], fila[3])
+        if escritas >= por_archivo and particion != ultima_particion and len(rutas) < archivos:
+            cerrar()
+            abrir(len(rutas) + 1)
+        escritor.writerow(['' if val is None else val for val in fila])
+        escritas += 1
+        total += 1
+        ultima_particion = particion
+    cerrar()
+    return rutas, total
+
+
+def generar(salida=CARPETA_SALIDA, filas=FILAS, archivos=ARCHIVOS, num_paises=NUM_PAISES,
+            anios=ANIOS, semilla=SEMILLA, comprimir=False):
+    """Genera el conjunto sintético completo y devuelve las rutas escritas."""
+    rng = random.Random(semilla)
+    paises = leer_paises()
+    paises = rng.sample(paises, min(num_paises, len(paises)))
+    causas = leer_causas()
+    print(f"-> Generando {filas} filas en {archivos} archivo(s) en '{salida}' "
+          f"({len(paises)} países, años {anios[0]}-{anios[1]}, {len(causas)} causas CIE-10)...")
+    rutas, total = escribir_archivos(salida, filas, archivos, paises, causas, anios, rng, comprimir)
+    if total < filas:
+        print(f"   (Sólo caben {total} filas distintas: usa más --paises o un rango de --anios mayor)")
+    for ruta in rutas:
+        print(f"   -> '{ruta}': {os.path.getsize(ruta) / 1024 / 1024:,.1f} MB")
+    return rutas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera archivos de mortalidad sintéticos con la forma de Morticd10")
+    parser.add_argument('--salida', default=CARPETA_SALIDA, help="Carpeta de salida")
+    parser.add_argument('--filas', type=int, default=FILAS, help="Número total de filas")
+    parser.add_argument('--archivos', type=int, default=ARCHIVOS, help="Número de archivos Morticd10_partN")
+    parser.add_argument('--paises', type=int, default=NUM_PAISES, help="Número de países distintos")
+    parser.add_argument('--anios', default=f"{ANIOS[0]}-{ANIOS[1]}", help="Rango de años, ej: 2000-2023")
+    parser.add_argument('--semilla', type=int, default=SEMILLA, help="Semilla aleatoria")
+    parser.add_argument('--zip', action='store_true', help="Escribir .zip como los distribuye la OMS")
+    args = parser.parse_args()
+
+    desde, _, hasta = args.anios.partition('-')
+    anios = (int(desde), int(hasta or desde))
+    generar(args.salida, args.filas, args.archivos, args.paises, anios, args.semilla, args.zip)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Índice jerárquico de la CIE-10 (código -> categoría -> bloque -> capítulo).
+
+Se compila una vez desde icd10_2019.csv y resuelve cualquier valor de
+Mortalidad.Cause ('A00', 'A000', 'A00.0', 'I219'...) a su código, categoría
+de 3 caracteres, bloque ('A00-A09') y capítulo ('I', 'A00-B99') con dos
+búsquedas binarias sobre los rangos ordenados (O(log n)). Así se puede
+agregar por capítulo o bloque con un JOIN por igualdad en lugar de LIKE o
+rangos en SQL.
+
+Los códigos que no son de la CIE-10 (lista condensada 101 '1000'..., el
+total 'AAA') devuelven None.
+
+Uso:
+    indice = IndiceCIE10.desde_csv()
+    indice.resolver('I219').capitulo   # 'IX'
+"""
+
+import os
+import re
+import csv
+import bisect
+from collections import namedtuple
+
+RUTA_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets', 'icd10_2019.csv')
+
+# '(A00-A09)' al final del texto de capítulo o bloque
+PATRON_RANGO = re.compile(r'\((?P<desde>[A-Z]\d\d)-(?P<hasta>[A-Z]\d\d)\)\s*$')
+# Código CIE-10 con o sin punto: letra, dos dígitos y hasta dos caracteres más
+PATRON_CODIGO = re.compile(r'^(?P<categoria>[A-Z]\d\d)\.?(?P<detalle>[0-9A-Z]{0,2})$')
+# Marcas de la clasificación dual (daga / asterisco) que no forman parte del código
+MARCAS = '†*+'
+
+Rango = namedtuple('Rango', ['desde', 'hasta', 'nombre'])
+
+Clasificacion = namedtuple('Clasificacion', [
+    'codigo', 'descripcion', 'categoria', 'bloque', 'bloque_nombre', 'capitulo', 'capitulo_rango',
+    'capitulo_nombre',
+])
+
+
+def normalizar(codigo):
+    """
+    Código en la forma del CSV ('A00.0') a partir de cualquier variante de los
+    archivos de la OMS ('A000', 'a00.0 ', 'A17†'). None si no es un código CIE-10.
+    """
+    if codigo is None:
+        return None
+    limpio = str(codigo).strip().upper().rstrip(MARCAS)
+    coincidencia = PATRON_CODIGO.match(limpio)
+    if not coincidencia:
+        return None
+    categoria, detalle = coincidencia.group('categoria'), coincidencia.group('detalle')
+    return f"{categoria}.{detalle}" if detalle else categoria
+
+
+def _separar_titulo(texto):
+    """'Chapter I\\nCertain infectious...\\n(A00-B99)' -> ('I', 'Certain infectious...', 'A00', 'B99')."""
+    coincidencia = PATRON_RANGO.search(texto.strip())
+    lineas = [l.strip() for l in PATRON_RANGO.sub('', texto.strip()).splitlines() if l.strip()]
+    numero = None
+    if lineas and lineas[0].lower().startswith('chapter '):
+        numero = lineas.pop(0).split(None, 1)[1]
+    return numero, ' '.join(lineas), coincidencia.group('desde'), coincidencia.group('hasta')
+
+
+class _Rangos:
+    """Rangos de categorías ordenados y sin solapes, con búsqueda binaria por el inicio."""
+
+    def __init__(self, rangos):
+        self.rangos = sorted(rangos)
+        self.inicios = [r.desde for r in self.rangos]
+
+    def buscar(self, categoria):
+        posicion = bisect.bisect_right(self.inicios, categoria) - 1
+        if posicion >= 0 and categoria <= self.rangos[posicion].hasta:
+            return self.rangos[posicion]
+        return None
+
+    def __len__(self):
+        return len(self.rangos)
+
+
+class IndiceCIE10:
+    """Índice en memoria de códigos, bloques y capítulos de la CIE-10."""
+
+    def __init__(self, codigos, bloques, capitulos):
+        # codigos: {'A00.0': descripción}; bloques/capítulos: listas de Rango
+        self.codigos = codigos
+        self.bloques = _Rangos(bloques)
+        self.capitulos = _Rangos(capitulos)
+        self._numeros_capitulo = {}
+
+    @classmethod
+    def desde_csv(cls, ruta=RUTA_CSV):
+        """Compila el índice a partir de icd10_2019.csv (columnas chapter, domain, sub-code, definition)."""
+        codigos = {}
+        bloques = {}
+        capitulos = {}
+        numeros = {}
+        with open(ruta, mode='r', encoding='utf-8', newline='') as f:
+            for fila in csv.DictReader(f):
+                codigo = normalizar(fila['sub-code'])
+                if codigo is None:
+                    continue
+                codigos[codigo] = fila['definition'].strip()
+
+                _, nombre, desde, hasta = _separar_titulo(fila['domain'])
+                bloques[(desde, hasta)] = Rango(desde, hasta, nombre)
+                numero, nombre, desde, hasta = _separar_titulo(fila['chapter'])
+                capitulos[(desde, hasta)] = Rango(desde, hasta, nombre)
+                numeros[(desde, hasta)] = numero
+
+        indice = cls(codigos, bloques.values(), capitulos.values())
+        indice._numeros_capitulo = numeros
+        return indice
+
+    def resolver(self, causa):
+        """
+        Clasificación de un código de causa, o None si no es de la CIE-10.
+        Un código de 4 caracteres que no esté en el CSV se resuelve igualmente
+        a su categoría, bloque y capítulo (con la descripción de la categoría).
+        """
+        codigo = normalizar(causa)
+        if codigo is None:
+            return None
+        categoria = codigo[:3]
+        bloque = self.bloques.buscar(categoria)
+        capitulo = self.capitulos.buscar(categoria)
+        if bloque is None and capitulo is None:
+            return None
+        if codigo not in self.codigos:
+            codigo = categoria
+        return Clasificacion(
+            codigo=codigo,
+            descripcion=self.codigos.get(codigo),
+            categoria=categoria,
+            bloque=f"{bloque.desde}-{bloque.hasta}" if bloque else None,
+            bloque_nombre=bloque.nombre if bloque else None,
+            capitulo=self._numeros_capitulo.get((capitulo.desde, capitulo.hasta)) if capitulo else None,
+            capitulo_rango=f"{capitulo.desde}-{capitulo.hasta}" if capitulo else None,
+            capitulo_nombre=capitulo.nombre if capitulo else None,
+        )
+
+    def __len__(self):
+        return len(self.codigos)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    inicio = time.perf_counter()
+    indice = IndiceCIE10.desde_csv()
+    print(f"{len(indice)} códigos, {len(indice.bloques)} bloques, {len(indice.capitulos)} capítulos "
+          f"({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+    for causa in sys.argv[1:]:
+        print(f"{causa}: {indice.resolver(causa)}")
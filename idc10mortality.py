@@ -1,4 +1,10 @@
 import csv
+import argparse
+
+import pymysql
+from pymysql.converters import escape_item
+
+import whodata
 
 # --- Configuración ---
 csv_file_name = 'icd10_2019.csv'      # El nombre de tu archivo CSV
@@ -11,41 +17,165 @@ list_type = 'Detailed 2019'
 table_reference = 'Table 9 (Detailed)' # Referencia al documento PDF
 # ------------------------------------
 
-print(f"Iniciando la conversión de {csv_file_name} a {sql_output_file}...")
-print(f"Tabla destino: {table_name}")
+# Filas por cada INSERT multi-fila (en el .sql y en cada executemany)
+filas_por_insert = 500
+
+# Clave única de la tabla: una causa se identifica por revisión, lista y código
+# (el mismo short_code existe en listas distintas, ej. 'A001' en ICD-7 y en ICD-8)
+nombre_clave_unica = 'uk_causa'
+columnas_clave_unica = ('icd_revision', 'list_type', 'short_code')
+
+columnas = ('icd_revision', 'list_type', 'short_code', 'description', 'detailed_codes', 'table_reference')
+
+# Borra las causas repetidas en la clave única (las que dejaba ejecutar dos
+# veces el .sql antiguo), conservando la de menor id
+sql_borrar_duplicadas = (
+    f"DELETE c1 FROM {table_name} AS c1 JOIN {table_name} AS c2 ON "
+    + ' AND '.join(f"c1.{col} = c2.{col}" for col in columnas_clave_unica)
+    + " AND c1.id > c2.id"
+)
+sql_crear_clave_unica = (
+    f"ALTER TABLE {table_name} ADD UNIQUE KEY {nombre_clave_unica} ({', '.join(columnas_clave_unica)})"
+)
+
+# Re-ejecutar actualiza las causas existentes en lugar de duplicarlas
+sql_upsert_sufijo = (
+    "ON DUPLICATE KEY UPDATE description = VALUES(description), "
+    "detailed_codes = VALUES(detailed_codes), table_reference = VALUES(table_reference)"
+)
 
-try:
-    with open(csv_file_name, mode='r', encoding='utf-8') as infile:
+
+def leer_causas(ruta_csv):
+    """Lee el CSV de la CIE-10 y devuelve las filas (en el orden de `columnas`) de la tabla."""
+    with open(ruta_csv, mode='r', encoding='utf-8') as infile:
         # Usamos DictReader para leer usando los nombres de las columnas
         reader = csv.DictReader(infile)
-        
-        with open(sql_output_file, mode='w', encoding='utf-8') as outfile:
-            count = 0
-            for row in reader:
-                # Obtenemos los datos de las columnas por su nombre
-                code = row['sub-code']
-                title = row['definition']
-
-                # --- IMPORTANTE: Manejo de comillas simples ---
-                # (ej. "Non-Hodgkin's lymphoma" se convierte en "Non-Hodgkin''s lymphoma")
-                sanitized_title = title.replace("'", "''")
-
-                # --- Crea el nuevo comando INSERT ---
-                sql_command = (
-                    f"INSERT INTO {table_name} "
-                    f"(icd_revision, list_type, short_code, description, detailed_codes, table_reference) "
-                    f"VALUES ('{icd_revision}', '{list_type}', '{code}', '{sanitized_title}', NULL, '{table_reference}');\n"
-                )
-                
-                # Escribe el comando en el archivo SQL
-                outfile.write(sql_command)
-                count += 1
-
-    print(f"¡Éxito! Se han generado {count} comandos INSERT en el archivo '{sql_output_file}'.")
-
-except FileNotFoundError:
-    print(f"ERROR: No se encontró el archivo '{csv_file_name}'. Asegúrate de que esté en el mismo directorio.")
-except KeyError as e:
-    print(f"ERROR: No se encontró la columna {e}. Asegúrate de que el CSV tenga las columnas 'sub-code' y 'definition'.")
-except Exception as e:
-    print(f"Ha ocurrido un error inesperado: {e}")
\ No newline at end of file
+        return [
+            (icd_revision, list_type, row['sub-code'].strip(), row['definition'].strip(), None, table_reference)
+            for row in reader
+        ]
+
+
+def lotes(filas, tamano):
+    for i in range(0, len(filas), tamano):
+        yield filas[i:i + tamano]
+
+
+def escribir_sql(filas, ruta_sql, tamano=filas_por_insert):
+    """
+    Escribe el .sql con INSERT multi-fila de `tamano` filas cada uno. Los
+    valores se escapan con pymysql (no a mano) y cada INSERT es un upsert,
+    así el archivo se puede volver a importar sin duplicar causas.
+    Devuelve el número de sentencias INSERT escritas.
+    """
+    lista_columnas = ', '.join(columnas)
+    clave = ', '.join(columnas_clave_unica)
+    sentencias = 0
+    with open(ruta_sql, mode='w', encoding='utf-8') as outfile:
+        outfile.write(f"-- Catálogo {icd_revision} '{list_type}' ({len(filas)} causas).\n")
+        outfile.write(f"-- Upsert sobre la clave única compuesta ({clave}): se puede importar varias veces.\n")
+        outfile.write("-- Antes se borran las causas repetidas (queda la de menor id) y se crea la\n")
+        outfile.write("-- clave si information_schema no la tiene (vale en MySQL y en MariaDB).\n")
+        outfile.write(f"{sql_borrar_duplicadas};\n")
+        outfile.write(f"SET @crear_clave = (SELECT IF(COUNT(*) = 0, '{sql_crear_clave_unica}', 'DO 0') "
+                      f"FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                      f"AND table_name = '{table_name}' AND index_name = '{nombre_clave_unica}');\n")
+        outfile.write("PREPARE crear_clave FROM @crear_clave;\n")
+        outfile.write("EXECUTE crear_clave;\n")
+        outfile.write("DEALLOCATE PREPARE crear_clave;\n\n")
+        for lote in lotes(filas, tamano):
+            valores = ',\n'.join(
+                '(' + ', '.join(escape_item(valor, 'utf8mb4') for valor in fila) + ')' for fila in lote
+            )
+            outfile.write(f"INSERT INTO {table_name} ({lista_columnas}) VALUES\n{valores}\n{sql_upsert_sufijo};\n\n")
+            sentencias += 1
+    return sentencias
+
+
+def asegurar_clave_unica(cursor):
+    """
+    Crea la clave única del upsert si no existe. Antes elimina las causas
+    duplicadas (las que dejaba ejecutar dos veces el .sql antiguo), conservando
+    la de menor id.
+    """
+    cursor.execute(f"SHOW INDEX FROM {table_name} WHERE Key_name = %s", (nombre_clave_unica,))
+    if cursor.fetchone():
+        return
+    borradas = cursor.execute(sql_borrar_duplicadas)
+    if borradas:
+        print(f"   -> {borradas} causas duplicadas eliminadas.")
+    cursor.execute(sql_crear_clave_unica)
+    print(f"   -> Clave única '{nombre_clave_unica}' creada.")
+
+
+def cargar_en_base(filas, db_config, tamano=filas_por_insert):
+    """
+    Carga las causas directamente en la base con executemany parametrizado
+    (pymysql lo envía como INSERT multi-fila) y upsert, en una transacción.
+    Devuelve el número de filas afectadas.
+    """
+    sql = (f"INSERT INTO {table_name} ({', '.join(columnas)}) "
+           f"VALUES ({', '.join(['%s'] * len(columnas))}) {sql_upsert_sufijo}")
+    connection = whodata.conectar(db_config)
+    try:
+        with connection.cursor() as cursor:
+            asegurar_clave_unica(cursor)
+            afectadas = 0
+            for lote in lotes(filas, tamano):
+                afectadas += cursor.executemany(sql, lote)
+        connection.commit()
+        return afectadas
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga el catálogo de causas CIE-10 en who_mortality_causes")
+    parser.add_argument('--csv', default=csv_file_name, help=f"CSV de la CIE-10 (por defecto: {csv_file_name})")
+    parser.add_argument('--modo', choices=('sql', 'base'), default='sql',
+                        help="'sql': generar el .sql con INSERT multi-fila | 'base': cargar directamente en la base")
+    parser.add_argument('--salida', default=sql_output_file, help=f"Archivo .sql (por defecto: {sql_output_file})")
+    parser.add_argument('--filas-por-insert', type=int, default=filas_por_insert)
+    parser.add_argument('--host', default=whodata.DB_HOST)
+    parser.add_argument('--user', default=whodata.DB_USER)
+    parser.add_argument('--password', default=whodata.DB_PASS)
+    parser.add_argument('--database', default=whodata.DB_NAME)
+    parser.add_argument('--port', type=int, default=whodata.DB_PORT)
+    args = parser.parse_args()
+
+    print(f"Iniciando la carga de {args.csv} ({'archivo ' + args.salida if args.modo == 'sql' else 'directo a la base'})...")
+    print(f"Tabla destino: {table_name}")
+
+    try:
+        filas = leer_causas(args.csv)
+
+        if args.modo == 'sql':
+            sentencias = escribir_sql(filas, args.salida, args.filas_por_insert)
+            print(f"¡Éxito! {len(filas)} causas en {sentencias} comandos INSERT en el archivo '{args.salida}'.")
+        else:
+            db_config = {
+                'host': args.host,
+                'user': args.user,
+                'pass': args.password,
+                'name': args.database,
+                'port': args.port
+            }
+            afectadas = cargar_en_base(filas, db_config, args.filas_por_insert)
+            # Con ON DUPLICATE KEY: 1 por fila nueva, 2 por fila actualizada, 0 si no cambió
+            print(f"¡Éxito! {len(filas)} causas cargadas en '{table_name}' ({afectadas} filas afectadas).")
+
+    except FileNotFoundError:
+        print(f"ERROR: No se encontró el archivo '{args.csv}'. Asegúrate de que esté en el mismo directorio.")
+    except KeyError as e:
+        print(f"ERROR: No se encontró la columna {e}. Asegúrate de que el CSV tenga las columnas 'sub-code' y 'definition'.")
+    except pymysql.err.MySQLError as e:
+        print(f"ERROR de base de datos: {e}")
+    except Exception as e:
+        print(f"Ha ocurrido un error inesperado: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('matplotlib')
+pytest.importorskip('seaborn')
+
+import analyzer
+
+
+def _selecciones(**cambios):
+    selections = {'tables': ['Mortalidad'], 'columns': ['Mortalidad.Year'], 'view_type': 'raw',
+                  'chart_type': 'none', 'x_axis': '', 'y_axis': [], 'where_clause': '',
+                  'limit': analyzer.DEFAULT_LIMIT, 'pagination': 'none', 'after': '', 'page': 1}
+    selections.update(cambios)
+    return selections
+
+
+@pytest.mark.parametrize('pedido, esperado', [('0', 1), (-5, 1), ('abc', analyzer.DEFAULT_LIMIT),
+                                              (10 ** 9, analyzer.MAX_LIMIT), ('250', 250)])
+def test_limite_del_usuario_se_acota(pedido, esperado):
+    assert analyzer.clamp_limit(pedido) == esperado
+
+
+def test_limite_cero_no_quita_el_limit_y_solo_none_lo_quita():
+    consulta = analyzer.DatabaseAnalyzer()
+
+    assert consulta.build_sql_query(_selecciones(limit=0))[0].endswith(' LIMIT 1')
+    assert consulta.build_sql_query(_selecciones(limit=10 ** 9))[0].endswith(f' LIMIT {analyzer.MAX_LIMIT}')
+    assert 'LIMIT' not in consulta.build_sql_query(_selecciones(limit=None))[0]
+    assert consulta.build_sql_query(_selecciones(limit=0, pagination='keyset'))[0].endswith(' LIMIT 2')
+
+
+def test_cursor_de_pagina_ida_y_vuelta():
+    columnas = analyzer.keyset_columns('Mortalidad', ['Mortalidad', 'who_mortality_causes'])
+    valores = ['4180', 2010, 'I21', 1, None, None, '104', 7]
+
+    assert columnas[-1] == 'who_mortality_causes.id'
+    assert analyzer.decode_page_cursor(analyzer.encode_page_cursor(valores), columnas) == valores
+    assert analyzer.decode_page_cursor(analyzer.encode_page_cursor(valores[:-1]), columnas) is None
+    assert analyzer.decode_page_cursor('no es un cursor', columnas) is None
+    assert analyzer.decode_page_cursor('', columnas) is None
+
+
+def test_predicado_compara_null_con_el_operador_seguro():
+    predicado, parametros = analyzer.keyset_predicate(['A.x', 'A.y', 'A.z'], ['a', None, 3])
+
+    assert predicado == ("A.x >= %s AND ((A.x > %s) OR (A.x <=> %s AND A.y IS NOT NULL) "
+                         "OR (A.x <=> %s AND A.y <=> %s AND A.z > %s))")
+    assert parametros == ['a', 'a', 'a', 'a', None, 3]
+
+
+def _sqlite_con_fan_out():
+    """Mortalidad y who_mortality_causes en SQLite; 'A001' existe en dos listas y duplica filas en el JOIN."""
+    conexion = sqlite3.connect(':memory:')
+    conexion.execute("CREATE TABLE Mortalidad (Country, Year, Cause, Sex, Admin1, Subdiv, List, Deaths1)")
+    conexion.execute("CREATE TABLE who_mortality_causes (id, short_code, list_type)")
+    filas = [(pais, anio, causa, sexo, admin1, None, '104', 1)
+             for pais in ('1400', '4180') for anio in (2010, 2011) for causa in ('A001', 'I21')
+             for sexo in (1, 2) for admin1 in (None, '1')]
+    conexion.executemany("INSERT INTO Mortalidad VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+    conexion.executemany("INSERT INTO who_mortality_causes VALUES (?, ?, ?)",
+                         [(1, 'A001', 'ICD-7 A'), (2, 'A001', 'ICD-8 A'), (3, 'I21', 'ICD-10')])
+    return conexion, len(filas) * 3 // 2
+
+
+def test_paginas_por_clave_recorren_el_join_sin_saltar_ni_repetir_filas():
+    conexion, total = _sqlite_con_fan_out()
+    consulta = analyzer.DatabaseAnalyzer()
+    selections = _selecciones(tables=['Mortalidad', 'who_mortality_causes'], limit=5, pagination='keyset',
+                              columns=['Mortalidad.Country', 'Mortalidad.Admin1', 'who_mortality_causes.list_type'])
+    vistas, paginas = [], 0
+    while True:
+        sql = consulta.build_sql_query(selections)[0]
+        sql = sql.replace('%s', '?').replace('<=>', 'IS')
+        dataframe = pd.read_sql(sql, conexion, params=consulta.query_params)
+        pagina, cursor = consulta.split_keyset_page(dataframe, selections['limit'])
+        assert not any(col.startswith(analyzer.KEYSET_ALIAS) for col in pagina.columns)
+        vistas += [tuple(fila) for fila in dataframe.iloc[:len(pagina)].filter(like=analyzer.KEYSET_ALIAS).values]
+        paginas += 1
+        if cursor is None:
+            break
+        selections['after'] = cursor
+
+    assert len(vistas) == total == 48
+    assert len(set(vistas)) == total
+    assert paginas == 10
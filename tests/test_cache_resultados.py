@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+import pytest
+
+import cache_resultados
+
+pytest.importorskip('pyarrow')
+
+
+def test_resultado_se_guarda_en_parquet_y_se_lee_desde_otro_proceso(tmp_path):
+    dataframe = pd.DataFrame({'Country': ['4180', '1400'], 'Year': [2010, 2011], 'Deaths': [501.0, None]})
+    escritor = cache_resultados.CacheResultados(carpeta=str(tmp_path))
+    escritor.guardar('SELECT *  FROM Mortalidad', 'v1', dataframe)
+
+    assert [nombre.endswith('.parquet') for nombre in os.listdir(tmp_path)] == [True]
+    # Otro worker: memoria vacía, lee el archivo del disco
+    lector = cache_resultados.CacheResultados(carpeta=str(tmp_path))
+    leido = lector.obtener('SELECT * FROM Mortalidad;', 'v1')
+
+    pd.testing.assert_frame_equal(leido, dataframe)
+    assert lector.estadisticas['aciertos_disco'] == 1
+
+
+def test_cambio_de_version_borra_resultados_viejos_y_pickles(tmp_path):
+    (tmp_path / 'antiguo.pkl.gz').write_bytes(b'no se carga')
+    cache = cache_resultados.CacheResultados(carpeta=str(tmp_path))
+    cache.guardar('SELECT 1', 'v1', pd.DataFrame({'a': [1]}))
+
+    assert cache.obtener('SELECT 1', 'v2') is None
+    assert os.listdir(tmp_path) == []
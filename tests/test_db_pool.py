@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+import db_pool
+
+
+class ConexionFalsa:
+    def __init__(self, viva=True):
+        self.viva = viva
+        self.cerrada = False
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def ping(self):
+        if not self.viva:
+            raise ConnectionError('el servidor cerró la conexión')
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.cerrada = True
+
+
+class OperationalError(Exception):
+    """Mismo nombre que el error de conexión de pymysql / mysql.connector."""
+
+
+def _pool(**opciones):
+    creadas = []
+
+    def fabrica():
+        creadas.append(ConexionFalsa())
+        return creadas[-1]
+
+    return db_pool.PoolConexiones(fabrica, **opciones), creadas
+
+
+def test_conexion_devuelta_se_reutiliza_la_ultima_primero():
+    pool, creadas = _pool()
+    primera, segunda = pool.obtener(), pool.obtener()
+    assert len(pool) == 2
+
+    pool.devolver(primera)
+    pool.devolver(segunda)
+
+    assert pool.obtener() is segunda
+    assert pool.obtener() is primera
+    assert len(creadas) == 2
+    assert pool.estadisticas['creadas'] == 2 and pool.estadisticas['reutilizadas'] == 2
+
+
+def test_devolver_deshace_la_transaccion_abierta():
+    pool, _ = _pool()
+    with pool.conexion() as conexion:
+        conexion.in_transaction = True
+
+    assert conexion.rollbacks == 1 and not conexion.cerrada
+    assert pool.obtener() is conexion
+
+
+def test_error_de_conexion_descarta_y_otro_error_la_devuelve():
+    pool, creadas = _pool()
+    with pytest.raises(OperationalError):
+        with pool.conexion():
+            raise OperationalError('Lost connection to MySQL server')
+    with pytest.raises(ValueError):
+        with pool.conexion():
+            raise ValueError('error de la consulta')
+
+    assert creadas[0].cerrada and not creadas[1].cerrada
+    assert pool.estadisticas['descartadas'] == 1
+    assert pool.obtener() is creadas[1]
+
+
+def test_pool_lleno_espera_a_que_se_devuelva_una_conexion():
+    pool, _ = _pool(tamano_maximo=1, espera_maxima=0.05)
+    prestada = pool.obtener()
+    with pytest.raises(db_pool.PoolAgotado):
+        pool.obtener()
+
+    pool.espera_maxima = 5
+    threading.Timer(0.05, pool.devolver, args=(prestada,)).start()
+    assert pool.obtener() is prestada
+    assert pool.estadisticas['esperas'] >= 2
+
+
+def test_conexion_ociosa_que_no_responde_se_sustituye():
+    pool, creadas = _pool(verificar_tras=0)
+    conexion = pool.obtener()
+    pool.devolver(conexion)
+    conexion.viva = False
+    time.sleep(0.01)
+
+    nueva = pool.obtener()
+
+    assert nueva is not conexion and nueva is creadas[1]
+    assert conexion.cerrada
+    assert len(pool) == 1
+
+
+def test_conexion_inactiva_demasiado_tiempo_se_cierra():
+    pool, creadas = _pool(inactividad_maxima=0)
+    pool.devolver(pool.obtener())
+    time.sleep(0.01)
+
+    assert pool.obtener() is creadas[1]
+    assert creadas[0].cerrada and pool.estadisticas['caducadas'] == 1
+
+
+def test_fallo_de_la_fabrica_libera_el_hueco():
+    def fabrica():
+        raise ConnectionError('sin servidor')
+
+    pool = db_pool.PoolConexiones(fabrica, tamano_maximo=1)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            pool.obtener()
+    assert len(pool) == 0
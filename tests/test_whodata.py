@@ -0,0 +1,204 @@
+import hashlib
+import sqlite3
+
+import pytest
+
+import icd10_indice
+import whodata
+
+
+def test_clasificar_causas_omite_listas_que_no_son_cie10():
+    indice = icd10_indice.IndiceCIE10.desde_csv()
+    causas = [('104', 'I21'), ('103', 'A001'), ('09B', 'A001')]
+
+    clasificadas = whodata.clasificar_causas(indice, causas)
+
+    assert [(lista, causa) for lista, causa, *_ in clasificadas] == [('104', 'I21'), ('103', 'A001')]
+    assert clasificadas[1][5] == 'I'
+
+
+def _base_sqlite():
+    """Mortalidad y Poblacion mínimas en SQLite (los SQL de resumen usan %s como pymysql)."""
+    conexion = sqlite3.connect(':memory:')
+    edades = ', '.join(f"Deaths{i}" for i in range(1, 27))
+    conexion.execute(f"CREATE TABLE {whodata.TABLE_NAME_MORTALIDAD} "
+                     f"(Country, Year, Sex, List, Cause, {edades})")
+    conexion.execute(f"CREATE TABLE {whodata.TABLE_NAME_POBLACION} "
+                     f"(Pais_Codigo, Admin1, Subdiv, Anio, Sexo, {', '.join(f'Pob{i}' for i in range(1, 27))})")
+    conexion.execute(f"CREATE TABLE {whodata.TABLE_NAME_RESUMEN_CAUSA} "
+                     f"(Country, Year, Sex, List, Cause, Deaths)")
+    conexion.execute(f"CREATE TABLE {whodata.TABLE_NAME_RESUMEN} (Country, Year, Sex, Deaths, Poblacion)")
+    return conexion
+
+
+def _fila_ancha(total, por_edad):
+    """Deaths1 (total) seguido de Deaths2..26."""
+    columnas = [total] + por_edad + [None] * (25 - len(por_edad))
+    assert total is None or not por_edad or total == sum(por_edad)
+    return columnas
+
+
+def test_resumenes_coinciden_con_el_total_de_mortalidad():
+    conexion = _base_sqlite()
+    marcadores = ', '.join(['?'] * 31)
+    filas = [
+        # Lista 104: la fila 'AAA' es el total de todas las causas
+        ('4180', '2010', '1', '104', 'AAA', *_fila_ancha(501, [1, 35, 165, 300])),
+        (' 4180', '2010', '1', '104', 'I21 ', *_fila_ancha(481, [1, 30, 150, 300])),
+        ('4180', '2010', '1', '104', 'C34', *_fila_ancha(20, [5, 15])),
+        # Lista 101: '1000' es el total y '1001' un subtotal que incluye a '1002'
+        ('4180', '2011', '1', '101', '1000', *_fila_ancha(30, [])),
+        ('4180', '2011', '1', '101', '1001', *_fila_ancha(12, [])),
+        ('4180', '2011', '1', '101', '1002', *_fila_ancha(12, [])),
+        ('4180', '2011', '1', '101', '1026', *_fila_ancha(18, [])),
+        # Lista 09B (sin código de total conocido: la causa mayor), Frmat 09: sólo Deaths1
+        ('4180', '2012', '1', '09B', 'B00', *_fila_ancha(7, [])),
+        ('4180', '2012', '1', '09B', 'B01', *_fila_ancha(7, [])),
+    ]
+    conexion.executemany(f"INSERT INTO {whodata.TABLE_NAME_MORTALIDAD} VALUES ({marcadores})", filas)
+    poblacion = [('4180', None, None, '2010', '1', 1000, 400, 600),
+                 ('4180', '1', None, '2010', '1', 300, 100, 200)]    # una región, ya incluida en la nacional
+    conexion.executemany(f"INSERT INTO {whodata.TABLE_NAME_POBLACION} VALUES ({', '.join(['?'] * 31)})",
+                         [fila + (None,) * 23 for fila in poblacion])
+
+    conexion.execute(whodata.SQL_LLENAR_RESUMEN_CAUSA.format(filtro=''))
+    conexion.execute(whodata.SQL_LLENAR_RESUMEN.format(filtro_poblacion='', filtro_resumen=''))
+
+    total_crudo = conexion.execute(f"SELECT SUM(Deaths1) FROM {whodata.TABLE_NAME_MORTALIDAD}").fetchone()[0]
+    assert conexion.execute(f"SELECT SUM(Deaths) FROM {whodata.TABLE_NAME_RESUMEN_CAUSA}").fetchone()[0] == total_crudo
+    resumen = conexion.execute(f"SELECT Year, Deaths, Poblacion FROM {whodata.TABLE_NAME_RESUMEN} "
+                               f"ORDER BY Year").fetchall()
+    assert resumen == [(2010, 501, 1000), (2011, 30, None), (2012, 7, None)]
+
+
+def test_ruta_para_load_data_reanuda_desde_el_byte_del_manifiesto(tmp_path):
+    ruta = tmp_path / 'Morticd10_part1.csv'
+    ruta.write_bytes(b'Country,Year\r\n4180,2010\r\n\r\n4180,2011\r\n4180,2012\r\n')
+    desde = len(b'Country,Year\r\n4180,2010\r\n\r\n')
+
+    with whodata.ruta_para_load_data(str(ruta), desde) as fifo:
+        with open(fifo, 'rb') as f:
+            assert f.read() == b'4180,2011\r\n4180,2012\r\n'
+
+
+CONTENIDO_PARCIAL = b'Country,Year\n4180,2010\n4180,2011\n'
+CONTENIDO_RESTO = b'4180,2012\n4180,2013\n'
+
+
+def _fuente_con_manifiesto_parcial(tmp_path):
+    """Archivo de mortalidad con un manifiesto que confirmó sus dos primeras filas."""
+    ruta = tmp_path / 'Morticd10_part1.csv'
+    ruta.write_bytes(CONTENIDO_PARCIAL + CONTENIDO_RESTO)
+    whodata.guardar_manifiesto(str(ruta), len(CONTENIDO_PARCIAL), 2, hashlib.sha256(CONTENIDO_PARCIAL).hexdigest())
+    return ruta
+
+
+def test_reanudacion_desde_manifiesto_parcial_sigue_el_hash(tmp_path):
+    ruta = _fuente_con_manifiesto_parcial(tmp_path)
+
+    reanudacion = whodata.preparar_reanudacion(str(ruta))
+
+    assert reanudacion['offset'] == len(CONTENIDO_PARCIAL)
+    assert (reanudacion['filas'], reanudacion['completado']) == (2, False)
+    reanudacion['hasher'].update(CONTENIDO_RESTO)
+    assert reanudacion['hasher'].hexdigest() == hashlib.sha256(ruta.read_bytes()).hexdigest()
+    assert whodata.leer_manifiesto(str(ruta))['fuente'] == str(ruta)
+    assert not list(tmp_path.glob('.manifiestos_importacion/*.tmp'))
+
+
+def test_reanudacion_rechaza_archivo_cambiado_antes_del_punto_de_control(tmp_path):
+    ruta = _fuente_con_manifiesto_parcial(tmp_path)
+    ruta.write_bytes(CONTENIDO_PARCIAL.replace(b'2011', b'2019') + CONTENIDO_RESTO)
+
+    with pytest.raises(ValueError, match='cambió'):
+        whodata.preparar_reanudacion(str(ruta))
+
+
+def test_reanudacion_de_archivo_completado_rechaza_filas_nuevas(tmp_path):
+    ruta = _fuente_con_manifiesto_parcial(tmp_path)
+    contenido = ruta.read_bytes()
+    whodata.guardar_manifiesto(str(ruta), len(contenido), 4, hashlib.sha256(contenido).hexdigest(), completado=True)
+    assert whodata.preparar_reanudacion(str(ruta))['completado']
+
+    ruta.write_bytes(contenido + b'4180,2014\n')
+    with pytest.raises(ValueError):
+        whodata.preparar_reanudacion(str(ruta))
+    whodata.borrar_manifiesto(str(ruta))
+    assert whodata.preparar_reanudacion(str(ruta)) is None
+
+
+def test_delta_normaliza_igual_la_clave_vacia_en_archivo_y_tabla(tmp_path):
+    ruta = tmp_path / 'Morticd10_part1.csv'
+    ruta.write_text('Country,Year,List,Cause\n4180,2010,,I21\n', encoding='utf-8')
+
+    class CursorFalso:
+        def execute(self, sql):
+            pass
+
+        def fetchall(self):
+            return [('4180', 2010, None, 1, whodata.huella_fila(['4180', '2010', None, 'I21']))]
+
+    en_archivos = whodata.huellas_fuentes([str(ruta)], [0, 1, 2])
+    en_tabla = whodata.huellas_tabla(CursorFalso(), 'Mortalidad', ['Country', 'Year', 'List', 'Cause'],
+                                     ['Country', 'Year', 'List'])
+
+    assert list(en_archivos) == [('4180', '2010', '')]
+    assert en_archivos == en_tabla
+
+
+def test_codigos_conocidos_quitan_daga_y_asterisco_del_catalogo():
+    conexion = sqlite3.connect(':memory:')
+    conexion.execute(f"CREATE TABLE {whodata.TABLE_NAME_PAISES} (Codigo_Pais)")
+    conexion.execute(f"CREATE TABLE {whodata.TABLE_NAME_CAUSAS} (short_code)")
+    conexion.execute(f"INSERT INTO {whodata.TABLE_NAME_PAISES} VALUES (' 4180')")
+    conexion.executemany(f"INSERT INTO {whodata.TABLE_NAME_CAUSAS} VALUES (?)",
+                         [('A17†',), ('A17.0† ',), ('G01*',), ('I21.9',)])
+
+    paises, causas = whodata.cargar_codigos_conocidos(conexion.cursor())
+
+    assert paises == {'4180'}
+    assert causas == {'A17', 'A170', 'G01', 'I219'}
+    cabecera = ['Country', 'List', 'Cause', 'Deaths1']
+    validas, malas = whodata.validar_lote([['4180', '104', 'A170', '3'], ['4180', '104', 'A171', '1'],
+                                           ['4180', '104', 'X99', '1']], cabecera, paises, causas)
+    assert [fila[2] for fila in validas] == ['A170', 'A171']
+    assert malas == [['4180', '104', 'X99', '1', 'causa_desconocida']]
+
+
+def _simular_ajuste(ajuste, rendimiento, lotes=500):
+    """Registra lotes con los segundos que daría `rendimiento(tamano)` (filas/s) hasta que el ajuste se fije."""
+    for _ in range(lotes):
+        if ajuste.estable:
+            break
+        ajuste.registrar(ajuste.tamano, ajuste.tamano * 100, ajuste.tamano / rendimiento(ajuste.tamano))
+    return ajuste
+
+
+def test_ajuste_lote_sube_hasta_el_optimo_y_vuelve_cuando_empeora():
+    # Rendimiento máximo con lotes de 8000 filas; más grandes, peor
+    ajuste = _simular_ajuste(whodata.AjusteLote(inicial=1000),
+                             lambda tamano: 10000 - abs(tamano - 8000) / 2)
+
+    assert ajuste.estable
+    assert [paso['tamano'] for paso in ajuste.historial[:3]] == [1000, 2000, 4000]
+    assert ajuste.tamano == 8000
+    assert max(paso['tamano'] for paso in ajuste.historial) == 16000
+
+
+def test_ajuste_lote_baja_si_los_lotes_grandes_rinden_menos():
+    ajuste = _simular_ajuste(whodata.AjusteLote(inicial=1000, minimo=100),
+                             lambda tamano: 100000 / (1 + tamano / 100))
+
+    assert ajuste.estable
+    assert ajuste.tamano == 100
+    assert ajuste.historial[1]['tamano'] == 2000 and ajuste.historial[2]['tamano'] < 1000
+
+
+def test_ajuste_lote_no_supera_max_allowed_packet():
+    ajuste = whodata.AjusteLote(inicial=1000)
+    ajuste.bytes_paquete = 1024 * 1024
+    _simular_ajuste(ajuste, lambda tamano: float(tamano))
+
+    limite = ajuste.bytes_paquete * ajuste.MARGEN_PAQUETE / (100 * ajuste.EXPANSION_SQL)
+    assert all(paso['tamano'] <= limite for paso in ajuste.historial)
+    assert ajuste.tamano == int(limite)
@@ -10,27 +10,84 @@ import sys
 import json
 import cgi
 import io
+import csv
+import zlib
 import base64
+import time
+import threading
+import importlib
+import importlib.util
+from html import escape
 from datetime import datetime
 import configparser
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Añadir directorio de paquetes al path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.9', 'site-packages'))
 
-try:
-    import mysql.connector
-    import pandas as pd
-    import matplotlib
-    matplotlib.use('Agg')  # Usar backend no interactivo para servidores
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-except ImportError as e:
+class LazyModule:
+    """
+    Módulo que se importa la primera vez que se usa uno de sus atributos.
+    La página del formulario no necesita pandas ni matplotlib: un worker
+    recién arrancado por Passenger la sirve sin pagar esas importaciones
+    (ver benchmark_arranque.py).
+    """
+    
+    def __init__(self, name, before=None):
+        self._name = name
+        self._before = before
+        self._module = None
+    
+    def __getattr__(self, attribute):
+        if self._module is None:
+            if self._before:
+                self._before()
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+def use_agg_backend():
+    """Backend no interactivo para servidores (antes de importar pyplot)"""
+    importlib.import_module('matplotlib').use('Agg')
+
+HEAVY_MODULES = ('mysql.connector', 'pandas', 'matplotlib', 'seaborn')
+
+def missing_modules(names=HEAVY_MODULES):
+    """Módulos no instalados (find_spec no los ejecuta, así se avisa al arrancar sin importarlos)"""
+    missing = []
+    for name in names:
+        if name in sys.modules:
+            continue
+        try:
+            if importlib.util.find_spec(name) is None:
+                missing.append(name)
+        except (ImportError, ValueError):
+            missing.append(name)
+    return missing
+
+_missing = missing_modules()
+if _missing:
     print("Content-Type: text/html")
     print()
-    print(f"<html><body><h1>Error de Importación</h1><p>{str(e)}</p></body></html>")
+    print(f"<html><body><h1>Error de Importación</h1><p>No se encontraron los módulos: {', '.join(_missing)}</p></body></html>")
     sys.exit(1)
 
+mysql_connector = LazyModule('mysql.connector')
+pd = LazyModule('pandas')
+plt = LazyModule('matplotlib.pyplot', before=use_agg_backend)
+sns = LazyModule('seaborn')
+
+import db_pool
+import cache_metadatos
+import cache_resultados
+import cache_graficos
+
+# Snapshot de dimensiones (opcional): nombres de países y causas sin consultar la base
+try:
+    import snapshot_dimensiones
+except ImportError:
+    snapshot_dimensiones = None
+
 # Configuración de seguridad
 ALLOWED_TABLES = [
     'Mortalidad', 'Poblacion', 'uso_internet', 'Paises', 
@@ -59,6 +116,34 @@ ALLOWED_COLUMNS = {
                              'description', 'detailed_codes', 'table_reference']
 }
 
+# Conteo del total de filas: se ejecuta en paralelo con la consulta de datos
+# y, si no termina en COUNT_TIME_BUDGET segundos, se muestra una estimación
+# (EXPLAIN). El servidor corta el COUNT(*) a los COUNT_SERVER_TIMEOUT segundos.
+COUNT_TIME_BUDGET = float(os.environ.get('COUNT_TIME_BUDGET', 1.5))
+COUNT_SERVER_TIMEOUT = float(os.environ.get('COUNT_SERVER_TIMEOUT', 10))
+
+# Filas por consulta (o por página): el límite del usuario se lleva a
+# [1, MAX_LIMIT]. Sólo la exportación consulta sin LIMIT (limit = None).
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+
+# Paginación por clave (keyset) sobre la clave natural de Mortalidad: cada
+# página empieza justo después de la última fila de la anterior
+# (WHERE clave > última ORDER BY clave LIMIT n), una lectura de rango del
+# índice idx_paginacion en lugar de un OFFSET que recorre las filas saltadas.
+# List desempata causas repetidas en listas distintas del mismo año.
+KEYSET_COLUMNS = {
+    'Mortalidad': ['Country', 'Year', 'Cause', 'Sex', 'Admin1', 'Subdiv', 'List'],
+}
+# Tablas cuyo JOIN puede repetir una fila de la tabla base (short_code no es
+# único entre listas): se añade su clave única para que la clave siga siendo
+# única tras el JOIN (si no, el 'después de la última' saltaría filas).
+# Paises y Estado_Desarrollo se unen por su clave primaria y no repiten filas.
+KEYSET_JOIN_KEYS = {
+    'who_mortality_causes': ['id'],
+}
+KEYSET_ALIAS = '_key_'
+
 # Relaciones entre tablas (para JOINs automáticos)
 TABLE_RELATIONS = {
     'Mortalidad': {
@@ -76,73 +161,239 @@ TABLE_RELATIONS = {
     }
 }
 
+# Configuración de conexión y pool del proceso (Passenger lo reutiliza entre peticiones)
+_db_config = None
+
+def read_db_config():
+    """Lee la configuración de la base una sola vez por proceso"""
+    global _db_config
+    if _db_config is not None:
+        return _db_config
+    
+    # Intentar leer desde variables de entorno (recomendado para producción)
+    db_config = {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'user': os.environ.get('DB_USER', ''),
+        'password': os.environ.get('DB_PASSWORD', ''),
+        'database': os.environ.get('DB_NAME', 'rgodczxw_WHO_Mortalidad_DB'),
+        'port': int(os.environ.get('DB_PORT', 3306))
+    }
+    
+    # Si no hay variables de entorno, intentar con config.ini
+    if not db_config['user']:
+        config_path = Path(__file__).parent / 'config.ini'
+        if config_path.exists():
+            config = configparser.ConfigParser()
+            config.read(config_path)
+            db_config.update({
+                'host': config['database']['host'],
+                'user': config['database']['user'],
+                'password': config['database']['password'],
+                'database': config['database']['database']
+            })
+        else:
+            raise Exception("No se encontró configuración de base de datos")
+    
+    _db_config = db_config
+    return db_config
+
+def get_pool():
+    """Pool de conexiones del proceso (tamaño máximo: DB_POOL_SIZE)"""
+    return db_pool.obtener_pool(
+        'analyzer',
+        lambda: mysql_connector.connect(**read_db_config()),
+        tamano_maximo=int(os.environ.get('DB_POOL_SIZE', db_pool.TAMANO_MAXIMO))
+    )
+
+def describe_tables(connection):
+    """Columnas de cada tabla de ALLOWED_TABLES (un DESCRIBE por tabla)"""
+    metadata = {}
+    cursor = connection.cursor(dictionary=True)
+    try:
+        for table in ALLOWED_TABLES:
+            cursor.execute(f"DESCRIBE {table}")
+            columns = cursor.fetchall()
+            metadata[table] = [col['Field'] for col in columns]
+    finally:
+        cursor.close()
+    return metadata
+
+def keyset_columns(from_table, tables):
+    """
+    Columnas (calificadas) de la clave de paginación: la clave natural de
+    from_table más la clave única de cada tabla unida que puede repetir filas.
+    """
+    columns = [f"{from_table}.{col}" for col in KEYSET_COLUMNS[from_table]]
+    for table in tables:
+        if table != from_table and table in TABLE_RELATIONS.get(from_table, {}):
+            columns += [f"{table}.{col}" for col in KEYSET_JOIN_KEYS.get(table, [])]
+    return columns
+
+def keyset_predicate(columns, values):
+    """
+    Condición 'fila > values' sobre las columnas de la clave, expandida en ORs
+    (c1 > v1 OR (c1 = v1 AND c2 > v2) OR ...) con parámetros, y precedida de
+    'c1 >= v1' para que el optimizador use el rango del índice.
+    Admin1/Subdiv pueden ser NULL (que MySQL ordena primero): se comparan con
+    <=> y 'mayor que NULL' es IS NOT NULL. Devuelve (sql, parámetros).
+    """
+    alternatives = []
+    params = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        terms = [f"{columns[j]} <=> %s" for j in range(i)]
+        params.extend(values[:i])
+        if value is None:
+            terms.append(f"{column} IS NOT NULL")
+        else:
+            terms.append(f"{column} > %s")
+            params.append(value)
+        alternatives.append("(" + " AND ".join(terms) + ")")
+    predicate = " OR ".join(alternatives)
+    if values[0] is not None:
+        predicate = f"{columns[0]} >= %s AND ({predicate})"
+        params.insert(0, values[0])
+    return predicate, params
+
+def keyset_alias(column):
+    """'Mortalidad.Country' -> '_key_Mortalidad_Country' (columna oculta del SELECT)"""
+    return KEYSET_ALIAS + column.replace('.', '_')
+
+def encode_page_cursor(values):
+    """Valores de la clave de la última fila -> texto opaco para el formulario"""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+def decode_page_cursor(token, columns):
+    """Texto del formulario -> valores de la clave, o None si está vacío o no es válido"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except Exception:
+        return None
+    if (not isinstance(values, list) or len(values) != len(columns)
+            or not all(v is None or isinstance(v, (str, int, float)) for v in values)):
+        return None
+    return values
+
+_count_executor = None
+
+def get_count_executor():
+    """Hilos del proceso para los COUNT(*) en paralelo (se crean en el primer uso)"""
+    global _count_executor
+    if _count_executor is None:
+        _count_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='count')
+    return _count_executor
+
+class CountJob:
+    """
+    COUNT(*) lanzado en segundo plano. Si se pasa del presupuesto se corta con
+    KILL QUERY: cancelar el futuro no detiene una consulta ya en marcha, y
+    seguiría ocupando su conexión y uno de los dos hilos hasta
+    COUNT_SERVER_TIMEOUT (las peticiones siguientes esperarían en la cola en
+    vez de usar la estimación).
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread_id = None   # CONNECTION_ID() de la conexión mientras el COUNT se ejecuta
+        self.cancelled = False
+    
+    def start(self, thread_id):
+        """Marca el COUNT como en marcha; False si ya se canceló (no hay que ejecutarlo)"""
+        with self.lock:
+            if self.cancelled:
+                return False
+            self.thread_id = thread_id
+            return True
+    
+    def finish(self):
+        """El COUNT terminó: su conexión vuelve al pool y ya no se puede matar"""
+        with self.lock:
+            self.thread_id = None
+    
+    def kill(self, connection):
+        """Cancela el COUNT; si está en marcha lo corta con KILL QUERY desde `connection`"""
+        with self.lock:
+            self.cancelled = True
+            if self.thread_id is None:
+                return False
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"KILL QUERY {int(self.thread_id)}")
+                return True
+            except Exception as e:
+                print(f"Error cortando el conteo: {str(e)}")
+                return False
+            finally:
+                cursor.close()
+
+def clamp_limit(value):
+    """Límite de filas pedido por el usuario, entero entre 1 y MAX_LIMIT (DEFAULT_LIMIT si no es un número)"""
+    try:
+        return min(max(int(value), 1), MAX_LIMIT)
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+
+def limit_statement_time(cursor, seconds):
+    """Límite de tiempo de las consultas de esta sesión (MariaDB: max_statement_time; MySQL: max_execution_time)"""
+    for statement in (f"SET SESSION max_statement_time = {float(seconds)}",
+                      f"SET SESSION max_execution_time = {int(seconds * 1000)}"):
+        try:
+            cursor.execute(statement)
+            return True
+        except Exception:
+            continue
+    return False
+
+# Metadatos y resultados compartidos por todas las peticiones del proceso
+METADATA_CACHE = cache_metadatos.CacheMetadatos('analyzer', describe_tables)
+RESULT_CACHE = cache_resultados.CacheResultados()
+
 class DatabaseAnalyzer:
     """Clase principal para análisis de datos de la base de datos WHO"""
     
     def __init__(self):
         self.connection = None
         self.metadata = None
+        self.cache_source = None
+        self.query_params = None
+        self.keyset_table = None
+        self.keyset_columns = []
         
     def connect_to_db(self):
-        """Establece conexión segura con la base de datos"""
+        """Toma una conexión del pool del proceso (se crea sólo si no hay una libre)"""
         try:
-            # Intentar leer desde variables de entorno (recomendado para producción)
-            db_config = {
-                'host': os.environ.get('DB_HOST', 'localhost'),
-                'user': os.environ.get('DB_USER', ''),
-                'password': os.environ.get('DB_PASSWORD', ''),
-                'database': os.environ.get('DB_NAME', 'rgodczxw_WHO_Mortalidad_DB'),
-                'port': int(os.environ.get('DB_PORT', 3306))
-            }
-            
-            # Si no hay variables de entorno, intentar con config.ini
-            if not db_config['user']:
-                config_path = Path(__file__).parent / 'config.ini'
-                if config_path.exists():
-                    config = configparser.ConfigParser()
-                    config.read(config_path)
-                    db_config.update({
-                        'host': config['database']['host'],
-                        'user': config['database']['user'],
-                        'password': config['database']['password'],
-                        'database': config['database']['database']
-                    })
-                else:
-                    raise Exception("No se encontró configuración de base de datos")
-            
-            self.connection = mysql.connector.connect(**db_config)
+            self.connection = get_pool().obtener()
             return True
             
         except Exception as e:
             print(f"Error de conexión: {str(e)}")
             return False
     
+    def release_connection(self, broken=False):
+        """Devuelve la conexión al pool (o la descarta si quedó inservible)"""
+        if self.connection:
+            get_pool().devolver(self.connection, descartar=broken)
+            self.connection = None
+    
     def get_metadata(self):
-        """Obtiene metadatos de las tablas disponibles"""
+        """Obtiene metadatos de las tablas disponibles (de la caché mientras no cambie la versión de los datos)"""
         if not self.connection:
             return None
-            
-        metadata = {}
-        cursor = self.connection.cursor(dictionary=True)
         
         try:
-            for table in ALLOWED_TABLES:
-                cursor.execute(f"DESCRIBE {table}")
-                columns = cursor.fetchall()
-                metadata[table] = [col['Field'] for col in columns]
-                
+            metadata = METADATA_CACHE.obtener(self.connection)
         except Exception as e:
             print(f"Error obteniendo metadatos: {str(e)}")
             return None
-        finally:
-            cursor.close()
             
         self.metadata = metadata
         return metadata
     
-    def parse_form_data(self):
-        """Parsea los datos del formulario POST"""
-        form = cgi.FieldStorage()
+    def parse_form_data(self, form=None):
+        """Parsea los datos del formulario POST (de CGI, o el FieldStorage de WSGI que se pase)"""
+        if form is None:
+            form = cgi.FieldStorage()
         
         selections = {
             'tables': [],
@@ -152,7 +403,10 @@ class DatabaseAnalyzer:
             'x_axis': '',
             'y_axis': [],
             'where_clause': '',
-            'limit': 1000
+            'limit': DEFAULT_LIMIT,
+            'pagination': 'none',
+            'after': '',
+            'page': 1
         }
         
         # Obtener tablas seleccionadas
@@ -175,10 +429,16 @@ class DatabaseAnalyzer:
         if 'where_clause' in form:
             selections['where_clause'] = form.getvalue('where_clause', '')
         if 'limit' in form:
+            selections['limit'] = clamp_limit(form.getvalue('limit', DEFAULT_LIMIT))
+        if 'pagination' in form:
+            selections['pagination'] = form.getvalue('pagination')
+        if 'after' in form:
+            selections['after'] = form.getvalue('after', '')
+        if 'page' in form:
             try:
-                selections['limit'] = int(form.getvalue('limit', 1000))
+                selections['page'] = max(1, int(form.getvalue('page', 1)))
             except ValueError:
-                selections['limit'] = 1000
+                selections['page'] = 1
         
         return selections
     
@@ -238,13 +498,21 @@ class DatabaseAnalyzer:
                 where_clause = f"WHERE {selections['where_clause']}"
         
         # Construir consulta final
-        query = f"SELECT {', '.join(select_parts)} FROM {from_table}"
-        if join_clauses:
-            query += " " + " ".join(join_clauses)
-        if where_clause:
-            query += " " + where_clause
-        
-        query += f" LIMIT {selections['limit']}"
+        self.query_params = None
+        self.keyset_table = None
+        self.keyset_columns = []
+        if selections.get('pagination') == 'keyset' and from_table in KEYSET_COLUMNS:
+            query = self.build_keyset_query(selections, select_parts, from_table, join_clauses, where_clause)
+        else:
+            query = f"SELECT {', '.join(select_parts)} FROM {from_table}"
+            if join_clauses:
+                query += " " + " ".join(join_clauses)
+            if where_clause:
+                query += " " + where_clause
+            
+            # limit = None sólo lo pone la exportación; cualquier otro valor se acota
+            if selections['limit'] is not None:
+                query += f" LIMIT {clamp_limit(selections['limit'])}"
         
         # Consulta para contar total
         count_query = f"SELECT COUNT(*) as total FROM {from_table}"
@@ -255,15 +523,178 @@ class DatabaseAnalyzer:
         
         return query, count_query
     
-    def fetch_data(self, query):
-        """Ejecuta consulta y devuelve DataFrame"""
+    def fetch_data(self, query, params=None):
+        """Ejecuta consulta y devuelve DataFrame (de la caché de resultados si ya se ejecutó con estos datos)"""
         try:
-            df = pd.read_sql(query, self.connection)
+            version = cache_metadatos.version_datos(self.connection)
+            cache_key = query if not params else f"{query} -- {json.dumps(params, default=str)}"
+            df = RESULT_CACHE.obtener(cache_key, version)
+            if df is not None:
+                self.cache_source = 'caché'
+                return df
+            df = pd.read_sql(query, self.connection, params=params or None)
+            RESULT_CACHE.guardar(cache_key, version, df)
+            self.cache_source = 'base de datos'
             return df
         except Exception as e:
             print(f"Error ejecutando consulta: {str(e)}")
             return pd.DataFrame()
     
+    def build_keyset_query(self, selections, select_parts, from_table, join_clauses, where_clause):
+        """
+        Consulta de una página: añade la clave como columnas ocultas, la
+        condición 'después de la última fila' (con parámetros), ORDER BY por la
+        clave y LIMIT tamaño + 1 (la fila de más indica que hay otra página).
+        """
+        key_columns = keyset_columns(from_table, selections['tables'])
+        select_parts = select_parts + [f"{col} AS {keyset_alias(col)}" for col in key_columns]
+        # Con parámetros, un % literal (ej. columna `Valor %`) se escribe %%
+        query = f"SELECT {', '.join(select_parts)} FROM {from_table}".replace('%', '%%')
+        if join_clauses:
+            query += " " + " ".join(join_clauses).replace('%', '%%')
+        
+        conditions = []
+        if where_clause:
+            conditions.append("(" + where_clause[len("WHERE "):].replace('%', '%%') + ")")
+        after = decode_page_cursor(selections.get('after'), key_columns)
+        params = []
+        if after is not None:
+            predicate, params = keyset_predicate(key_columns, after)
+            conditions.append(f"({predicate})")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        query += " ORDER BY " + ", ".join(key_columns)
+        query += f" LIMIT {clamp_limit(selections['limit']) + 1}"
+        
+        self.query_params = params
+        self.keyset_table = from_table
+        self.keyset_columns = key_columns
+        return query
+    
+    def split_keyset_page(self, dataframe, limit):
+        """
+        Quita las columnas de la clave y la fila de más. Devuelve
+        (DataFrame de la página, cursor de la página siguiente o None).
+        """
+        key_aliases = [keyset_alias(col) for col in self.keyset_columns]
+        next_cursor = None
+        if len(dataframe) > limit:
+            dataframe = dataframe.iloc[:limit]
+            last = dataframe.iloc[-1]
+            values = []
+            for alias in key_aliases:
+                value = last[alias]
+                if pd.isna(value):
+                    value = None
+                elif hasattr(value, 'item'):
+                    value = value.item()  # numpy -> tipo de Python (para JSON)
+                values.append(value)
+            next_cursor = encode_page_cursor(values)
+        return dataframe.drop(columns=[a for a in key_aliases if a in dataframe.columns]), next_cursor
+    
+    def count_rows(self, count_query, job=None):
+        """
+        Ejecuta el COUNT(*) en otra conexión del pool, para correr en paralelo
+        con la consulta de datos. El total queda en la caché de resultados.
+        Con `job` (CountJob) se puede cortar desde otra conexión; devuelve
+        None si se canceló antes de empezar.
+        """
+        job = job or CountJob()
+        pool = get_pool()
+        connection = pool.obtener()
+        broken = False
+        try:
+            version = cache_metadatos.version_datos(connection)
+            cached = RESULT_CACHE.obtener(count_query, version)
+            if cached is not None:
+                return int(cached.iloc[0, 0])
+            cursor = connection.cursor()
+            limited = limit_statement_time(cursor, COUNT_SERVER_TIMEOUT)
+            try:
+                try:
+                    cursor.execute("SELECT CONNECTION_ID()")
+                    thread_id = cursor.fetchone()[0]
+                except Exception:
+                    thread_id = None  # Sin id no se puede cortar: queda el límite del servidor
+                if not job.start(thread_id):
+                    return None
+                try:
+                    cursor.execute(count_query)
+                    total = int(cursor.fetchone()[0])
+                finally:
+                    job.finish()
+            finally:
+                # La conexión vuelve al pool sin el límite de tiempo
+                if limited:
+                    limit_statement_time(cursor, 0)
+                cursor.close()
+            RESULT_CACHE.guardar(count_query, version, pd.DataFrame({'total': [total]}))
+            return total
+        except Exception as e:
+            # Un COUNT cortado con KILL QUERY deja la conexión sana
+            broken = db_pool.es_error_de_conexion(e) and not job.cancelled
+            raise
+        finally:
+            pool.devolver(connection, descartar=broken)
+    
+    def estimate_rows(self, count_query):
+        """Estimación del total con EXPLAIN (filas examinadas x % filtrado de cada tabla), o None"""
+        from_part = count_query.split(' FROM ', 1)[1]
+        cursor = self.connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"EXPLAIN SELECT 1 FROM {from_part}")
+            estimate = 1.0
+            for row in cursor.fetchall():
+                if row.get('rows') is None:
+                    continue
+                estimate *= float(row['rows']) * float(row.get('filtered') or 100) / 100
+            return int(estimate)
+        except Exception as e:
+            print(f"Error estimando el total: {str(e)}")
+            return None
+        finally:
+            cursor.close()
+    
+    def fetch_data_with_total(self, query, count_query, limit, params=None, first_page=True):
+        """
+        Ejecuta la consulta de datos y el COUNT(*) a la vez (en conexiones
+        distintas). Devuelve (DataFrame, total, es_estimado); si el conteo no
+        termina dentro de COUNT_TIME_BUDGET, el total es una estimación.
+        """
+        start = time.monotonic()
+        job = CountJob()
+        future = get_count_executor().submit(self.count_rows, count_query, job)
+        dataframe = self.fetch_data(query, params)
+        
+        # Primera página con menos filas que el LIMIT: el total exacto ya se conoce
+        if first_page and len(dataframe) < limit:
+            if not future.cancel():
+                job.kill(self.connection)
+            return dataframe, len(dataframe), False
+        
+        try:
+            total = future.result(timeout=max(0.0, COUNT_TIME_BUDGET - (time.monotonic() - start)))
+            if total is not None:
+                return dataframe, total, False
+        except Exception:
+            # Se pasó del presupuesto, el pool estaba lleno o el servidor cortó el COUNT:
+            # se libera su hilo y su conexión en lugar de esperar a COUNT_SERVER_TIMEOUT
+            if not future.cancel():
+                job.kill(self.connection)
+        return dataframe, self.estimate_rows(count_query), True
+    
+    def add_dimension_labels(self, dataframe):
+        """Añade nombres de país y descripciones de causa desde el snapshot de dimensiones (si existe)"""
+        snapshot = snapshot_dimensiones.cargar() if snapshot_dimensiones else None
+        if snapshot is None or dataframe.empty:
+            return dataframe
+        try:
+            return snapshot.etiquetar(dataframe)
+        except Exception as e:
+            print(f"Error etiquetando dimensiones: {str(e)}")
+            return dataframe
+    
     def generate_html_table(self, dataframe):
         """Convierte DataFrame a tabla HTML segura"""
         if dataframe.empty:
@@ -284,11 +715,38 @@ class DatabaseAnalyzer:
         
         return html
     
-    def generate_graph(self, dataframe, selections):
-        """Genera gráfico según selecciones"""
+    def chart_url(self, dataframe, selections):
+        """
+        URL del gráfico (ruta /chart/<clave>.png). La clave es el hash de las
+        columnas graficadas y de la especificación, así el mismo gráfico sólo
+        se dibuja una vez: si el PNG ya está en la caché no se vuelve a generar.
+        """
         if dataframe.empty or selections['chart_type'] == 'none':
             return ""
         
+        columns = [c for c in [selections['x_axis']] + list(selections['y_axis']) if c in dataframe.columns]
+        spec = {'app': 'analyzer', 'chart_type': selections['chart_type'],
+                'x_axis': selections['x_axis'], 'y_axis': list(selections['y_axis'])}
+        key = cache_graficos.clave_grafico(dataframe[list(dict.fromkeys(columns))], spec)
+        
+        if not cache_graficos.existe(key):
+            png = self.render_graph_png(dataframe, selections)
+            if not png or not cache_graficos.guardar(key, png):
+                # Sin caché en disco: el gráfico va incrustado en la página
+                return f"data:image/png;base64,{base64.b64encode(png).decode('ascii')}" if png else ""
+        
+        return cache_graficos.url_grafico(key, os.environ.get('SCRIPT_NAME', ''))
+    
+    def generate_graph(self, dataframe, selections):
+        """Genera gráfico según selecciones (PNG en base64)"""
+        png = self.render_graph_png(dataframe, selections)
+        return base64.b64encode(png).decode('utf-8') if png else ""
+    
+    def render_graph_png(self, dataframe, selections):
+        """Dibuja el gráfico según selecciones y devuelve el PNG en bytes"""
+        if dataframe.empty or selections['chart_type'] == 'none':
+            return b""
+        
         try:
             plt.figure(figsize=(12, 8))
             plt.style.use('seaborn-v0_8')
@@ -351,17 +809,14 @@ class DatabaseAnalyzer:
             # Guardar en buffer
             buffer = io.BytesIO()
             plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            
-            # Codificar en base64
-            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
             plt.close()
             
-            return image_base64
+            return buffer.getvalue()
             
         except Exception as e:
+            plt.close()
             print(f"Error generando gráfico: {str(e)}")
-            return ""
+            return b""
 
 # Funciones de renderizado HTML
 def render_form_page(metadata, error_message=None):
@@ -526,17 +981,27 @@ def render_form_page(metadata, error_message=None):
                 </div>
                 
                 <div class="row mt-3">
-                    <div class="col-md-6">
+                    <div class="col-md-4">
                         <label for="whereClause" class="form-label"><i class="bi bi-funnel"></i> Filtro WHERE (opcional)</label>
                         <textarea class="form-control" name="where_clause" id="whereClause" rows="2" 
                                   placeholder="Ej: Year = '2020' AND Sex = '1'"></textarea>
                         <small class="text-muted">Solo condiciones simples permitidas</small>
                     </div>
                     
+                    <div class="col-md-2">
+                        <label for="pagination" class="form-label"><i class="bi bi-files"></i> Paginación</label>
+                        <select class="form-select" name="pagination" id="pagination">
+                            <option value="none">Sin paginar</option>
+                            <option value="keyset">Por páginas</option>
+                        </select>
+                        <small class="text-muted">Sólo desde Mortalidad</small>
+                    </div>
+                    
                     <div class="col-md-3">
                         <label for="limit" class="form-label"><i class="bi bi-list-ol"></i> Límite de Registros</label>
                         <input type="number" class="form-control" name="limit" id="limit" 
-                               value="1000" min="10" max="10000">
+                               value="{DEFAULT_LIMIT}" min="1" max="{MAX_LIMIT}">
+                        <small class="text-muted">Por página si se pagina</small>
                     </div>
                     
                     <div class="col-md-3 d-flex align-items-end">
@@ -627,7 +1092,56 @@ def render_form_page(metadata, error_message=None):
     
     print(html)
 
-def render_results_page(html_table, graph_base64, raw_query, dataframe_info):
+def format_total(dataframe_info):
+    """' de 12,345' / ' de ~12,345 (estimado)' cuando el LIMIT recortó el resultado"""
+    total = dataframe_info.get('total')
+    if total is None:
+        return ' de ? (sin estimación)' if dataframe_info.get('total_estimated') else ''
+    if dataframe_info.get('total_estimated'):
+        return f' de ~{total:,} (estimado)'
+    return f' de {total:,}' if total != dataframe_info['rows'] else ''
+
+def hidden_fields(selections, **extra):
+    """Campos ocultos con las selecciones, para reenviar el formulario (paginación, exportación)"""
+    fields = []
+    for name in ('tables', 'columns', 'y_axis'):
+        for value in selections[name]:
+            fields.append((name, value))
+    for name in ('view_type', 'chart_type', 'x_axis', 'where_clause', 'limit', 'pagination'):
+        fields.append((name, selections[name]))
+    fields += list(extra.items())
+    return "".join(f'<input type="hidden" name="{escape(str(name))}" value="{escape(str(value))}">'
+                   for name, value in fields)
+
+def render_export_buttons(selections):
+    """Formularios de descarga del resultado completo (sin LIMIT) por la ruta /export"""
+    buttons = []
+    for label, export_format, gzip in (('CSV', 'csv', ''), ('CSV.gz', 'csv', '1'), ('NDJSON', 'ndjson', ''),
+                                       ('NDJSON.gz', 'ndjson', '1')):
+        buttons.append(f"""<form method="POST" action="export" class="d-inline">{hidden_fields(selections, format=export_format, gzip=gzip)}
+            <button type="submit" class="btn btn-outline-primary btn-sm"><i class="bi bi-download"></i> {label}</button></form>""")
+    return f"""
+            <div class="d-flex align-items-center gap-2 my-3">
+                <span class="text-muted">Exportar todo (sin límite):</span>
+                {' '.join(buttons)}
+            </div>"""
+
+def render_pagination(selections, next_cursor):
+    """Botones de página siguiente / primera página: reenvían el formulario con el cursor"""
+    buttons = []
+    if selections['page'] > 1:
+        buttons.append(f"""<form method="POST" class="d-inline">{hidden_fields(selections, after='', page=1)}
+            <button type="submit" class="btn btn-outline-secondary"><i class="bi bi-skip-start"></i> Primera página</button></form>""")
+    if next_cursor:
+        buttons.append(f"""<form method="POST" class="d-inline">{hidden_fields(selections, after=next_cursor, page=selections['page'] + 1)}
+            <button type="submit" class="btn btn-primary"><i class="bi bi-chevron-right"></i> Página siguiente</button></form>""")
+    return f"""
+            <div class="d-flex align-items-center gap-2 my-3">
+                <span class="text-muted">Página {selections['page']}</span>
+                {' '.join(buttons)}
+            </div>"""
+
+def render_results_page(html_table, graph_url, raw_query, dataframe_info, pagination_html=""):
     """Renderiza la página de resultados"""
     print("Content-Type: text/html; charset=utf-8")
     print()
@@ -725,7 +1239,7 @@ def render_results_page(html_table, graph_base64, raw_query, dataframe_info):
             <div class="stats-box">
                 <div class="row">
                     <div class="col-md-3">
-                        <strong>Registros:</strong> {dataframe_info['rows']:,}
+                        <strong>Registros:</strong> {dataframe_info['rows']:,}{format_total(dataframe_info)}
                     </div>
                     <div class="col-md-3">
                         <strong>Columnas:</strong> {dataframe_info['columns']}
@@ -737,6 +1251,12 @@ def render_results_page(html_table, graph_base64, raw_query, dataframe_info):
                         <strong>Generado:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
                     </div>
                 </div>
+                <div class="row mt-2">
+                    <div class="col-md-12 text-muted">
+                        <small><strong>Origen:</strong> {dataframe_info.get('source') or '-'}
+                        &middot; <strong>Caché de resultados:</strong> {dataframe_info.get('cache_stats', '')}</small>
+                    </div>
+                </div>
             </div>
             
             <div class="query-box">
@@ -745,11 +1265,11 @@ def render_results_page(html_table, graph_base64, raw_query, dataframe_info):
             </div>
     """
     
-    if graph_base64:
+    if graph_url:
         html += f"""
             <div class="chart-container">
                 <h4><i class="bi bi-bar-chart"></i> Visualización de Datos</h4>
-                <img src="data:image/png;base64,{graph_base64}" alt="Gráfico generado">
+                <img src="{escape(graph_url)}" alt="Gráfico generado">
             </div>
         """
     
@@ -758,6 +1278,7 @@ def render_results_page(html_table, graph_base64, raw_query, dataframe_info):
                 <h4><i class="bi bi-table"></i> Datos Obtenidos</h4>
                 {html_table}
             </div>
+            {pagination_html}
         </div>
         
         <div class="text-center text-muted">
@@ -786,8 +1307,117 @@ def render_results_page(html_table, graph_base64, raw_query, dataframe_info):
     
     print(html)
 
+# Exportación en streaming (ruta /export de passenger_wsgi)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+}
+EXPORT_BATCH_ROWS = 5000
+
+def export_rows(connection, query, export_format, compress):
+    """
+    Generador de la exportación: lee el resultado con un cursor sin buffer
+    (las filas llegan del servidor a medida que se piden) en lotes de
+    EXPORT_BATCH_ROWS y emite cada lote ya codificado (y comprimido en gzip,
+    zlib con wbits=31, si se pidió). La memoria no depende del tamaño del resultado.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    
+    def emit(text):
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+    
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute(query)
+        columns = [description[0] for description in cursor.description]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if export_format == 'csv':
+            writer.writerow(columns)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_ROWS)
+            if not rows:
+                break
+            if export_format == 'csv':
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + '\n')
+            chunk = emit(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+            if chunk:
+                yield chunk
+        if compressor:
+            yield compressor.flush()
+    finally:
+        cursor.close()
+
+def export_application(environ, start_response):
+    """
+    Aplicación WSGI de la exportación: mismas selecciones que el formulario,
+    sin LIMIT, en CSV o NDJSON (campo 'format') y opcionalmente en gzip
+    (campo 'gzip'). La respuesta se envía por trozos a medida que se lee.
+    """
+    analyzer = DatabaseAnalyzer()
+    form = cgi.FieldStorage(fp=environ['wsgi.input'], environ=environ, keep_blank_values=True)
+    selections = analyzer.parse_form_data(form)
+    selections['limit'] = None
+    selections['pagination'] = 'none'
+    export_format = form.getvalue('format', 'csv')
+    compress = bool(form.getvalue('gzip'))
+    
+    is_valid, message = analyzer.validate_selections(selections)
+    query = analyzer.build_sql_query(selections)[0] if is_valid else ""
+    if export_format not in EXPORT_FORMATS or not query:
+        start_response('400 Bad Request', [('Content-Type', 'text/plain; charset=utf-8')])
+        return [(message if not is_valid else "Exportación no válida").encode('utf-8')]
+    if not analyzer.connect_to_db():
+        start_response('503 Service Unavailable', [('Content-Type', 'text/plain; charset=utf-8')])
+        return ["Error de conexión a la base de datos".encode('utf-8')]
+    
+    content_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"who_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    if compress:
+        content_type, filename = 'application/gzip', filename + '.gz'
+    start_response('200 OK', [
+        ('Content-Type', content_type),
+        ('Content-Disposition', f'attachment; filename="{filename}"'),
+        ('Cache-Control', 'no-store'),
+        ('X-Accel-Buffering', 'no'),
+    ])
+    
+    return ExportResponse(analyzer, export_rows(analyzer.connection, query, export_format, compress))
+
+class ExportResponse:
+    """
+    Iterable de la respuesta: el servidor WSGI llama a close() al terminar,
+    aunque el cliente corte la descarga o no llegue a leerse ningún trozo,
+    y ahí se devuelve la conexión al pool.
+    """
+    
+    def __init__(self, analyzer, chunks):
+        self.analyzer = analyzer
+        self.chunks = chunks
+        self.finished = False
+    
+    def __iter__(self):
+        yield from self.chunks
+        self.finished = True
+    
+    def close(self):
+        self.chunks.close()
+        # Si quedaron filas sin leer la conexión no se reutiliza
+        self.analyzer.release_connection(broken=not self.finished)
+
 def main():
     """Función principal - router de la aplicación"""
+    # Gráficos en modo CGI (analyzer.py/chart/<clave>.png): PNG desde la caché
+    if os.environ.get('PATH_INFO', '').startswith('/chart/'):
+        cache_graficos.responder_cgi()
+        return
+    
     analyzer = DatabaseAnalyzer()
     
     # Detectar método de petición
@@ -817,8 +1447,15 @@ def main():
                 render_form_page(metadata, "No se pudo construir la consulta")
                 return
             
-            # Obtener datos
-            dataframe = analyzer.fetch_data(query)
+            # Obtener datos y total (en paralelo)
+            first_page = not analyzer.keyset_table or not selections['after']
+            dataframe, total, total_estimated = analyzer.fetch_data_with_total(
+                query, count_query, selections['limit'], analyzer.query_params, first_page)
+            
+            # Paginación por clave: página actual y cursor de la siguiente
+            next_cursor = None
+            if analyzer.keyset_table:
+                dataframe, next_cursor = analyzer.split_keyset_page(dataframe, selections['limit'])
             
             if dataframe.empty:
                 metadata = analyzer.get_metadata()
@@ -827,37 +1464,50 @@ def main():
             
             execution_time = (datetime.now() - start_time).total_seconds()
             
+            # Nombres de país / descripciones de causa sin JOIN ni consultas extra
+            dataframe = analyzer.add_dimension_labels(dataframe)
+            
             # Generar tabla HTML
             html_table = analyzer.generate_html_table(dataframe)
             
-            # Generar gráfico si se solicitó
-            graph_base64 = ""
+            # Gráfico si se solicitó: se sirve aparte desde /chart (caché de PNG)
+            graph_url = ""
             if selections['chart_type'] != 'none':
-                graph_base64 = analyzer.generate_graph(dataframe, selections)
+                graph_url = analyzer.chart_url(dataframe, selections)
             
             # Información del DataFrame
             dataframe_info = {
                 'rows': len(dataframe),
                 'columns': len(dataframe.columns),
-                'execution_time': execution_time
+                'execution_time': execution_time,
+                'total': total,
+                'total_estimated': total_estimated,
+                'source': analyzer.cache_source,
+                'cache_stats': RESULT_CACHE.resumen()
             }
             
             # Renderizar página de resultados
-            render_results_page(html_table, graph_base64, query, dataframe_info)
+            pagination_html = ""
+            if analyzer.keyset_table:
+                pagination_html = render_pagination(selections, next_cursor)
+            pagination_html += render_export_buttons(selections)
+            render_results_page(html_table, graph_url, query, dataframe_info, pagination_html)
             
         except Exception as e:
+            # Una conexión rota no vuelve al pool
+            if db_pool.es_error_de_conexion(e):
+                analyzer.release_connection(broken=True)
             metadata = analyzer.get_metadata()
             render_form_page(metadata, f"Error procesando la solicitud: {str(e)}")
             
         finally:
-            if analyzer.connection:
-                analyzer.connection.close()
+            analyzer.release_connection()
     
     else:
         # Mostrar formulario inicial (GET)
         if analyzer.connect_to_db():
             metadata = analyzer.get_metadata()
-            analyzer.connection.close()
+            analyzer.release_connection()
         else:
             metadata = None
         
@@ -0,0 +1,125 @@
+"""
+Benchmark de arranque en frío de passenger_wsgi.py (página del formulario).
+
+Cada repetición es un proceso de Python nuevo, como un worker recién creado
+por Passenger, que:
+
+    1. carga passenger_wsgi.py (y con él analyzer.py),
+    2. atiende un GET / (la página del formulario).
+
+Muestra los tiempos de cada paso (mediana y máximo) y, con `python -X
+importtime`, los módulos que más tardan en importarse durante el arranque.
+
+Termina con código 1 si la mediana de carga + GET supera --presupuesto-ms o
+si el GET importó pandas, matplotlib o seaborn (la página del formulario no
+los usa): sirve como comprobación antes de desplegar.
+
+Con --sin-base no se conecta a la base (mide sólo el arranque y el HTML del
+formulario sin metadatos); sin él se usa la configuración de analyzer.py.
+
+Uso:
+    python benchmark_arranque.py --repeticiones 5 --presupuesto-ms 400
+    python benchmark_arranque.py --sin-base --modulos 20
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+# Librerías que la página del formulario no debe importar
+MODULOS_PROHIBIDOS = ('pandas', 'matplotlib', 'seaborn')
+
+# Se ejecuta en el proceso hijo (cwd = v1/)
+CODIGO_HIJO = """
+import io, sys, json, time
+inicio = time.perf_counter()
+import passenger_wsgi
+cargado = time.perf_counter()
+if passenger_wsgi.analyzer_module is None:
+    print(json.dumps({'error': passenger_wsgi.startup_error}))
+    sys.exit(0)
+if SIN_BASE:
+    passenger_wsgi.analyzer_module.DatabaseAnalyzer.connect_to_db = lambda self: False
+estado = []
+environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/', 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+           'wsgi.input': io.BytesIO()}
+cuerpo = b''.join(passenger_wsgi.application(environ, lambda s, h: estado.append(s)))
+fin = time.perf_counter()
+print(json.dumps({'carga_ms': (cargado - inicio) * 1000, 'get_ms': (fin - cargado) * 1000,
+                  'estado': estado[0], 'bytes': len(cuerpo),
+                  'importados': [m for m in MODULOS if m in sys.modules]}))
+"""
+
+
+def arrancar(sin_base):
+    """Un arranque en frío; devuelve (medidas del hijo, líneas de -X importtime)."""
+    codigo = f"SIN_BASE = {sin_base!r}\nMODULOS = {MODULOS_PROHIBIDOS!r}\n{CODIGO_HIJO}"
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=CARPETA,
+                             capture_output=True, text=True)
+    lineas = proceso.stdout.strip().splitlines()
+    if proceso.returncode != 0 or not lineas:
+        raise RuntimeError(f"El proceso hijo falló:\n{proceso.stderr[-2000:]}")
+    return json.loads(lineas[-1]), proceso.stderr.splitlines()
+
+
+def modulos_lentos(lineas, cantidad):
+    """Módulos con más tiempo acumulado según -X importtime (a cualquier profundidad): [(ms, nombre)]."""
+    tiempos = []
+    for linea in lineas:
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        # passenger_wsgi carga analyzer.py en su propio cuerpo: su tiempo es el total
+        if nombre.strip() != 'passenger_wsgi':
+            tiempos.append((int(acumulado) / 1000, nombre.strip()))
+    return sorted(tiempos, reverse=True)[:cantidad]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de arranque en frío de passenger_wsgi.py')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Arranques en frío a medir')
+    parser.add_argument('--presupuesto-ms', type=float, default=500,
+                        help='Máximo para la mediana de carga + GET del formulario')
+    parser.add_argument('--modulos', type=int, default=10, help='Módulos más lentos a mostrar')
+    parser.add_argument('--sin-base', action='store_true', help='No conectar a la base de datos')
+    args = parser.parse_args()
+
+    medidas = []
+    for i in range(args.repeticiones):
+        medida, importtime = arrancar(args.sin_base)
+        if 'error' in medida:
+            print(f"analyzer.py no se pudo cargar:\n{medida['error']}")
+            return 1
+        medidas.append(medida)
+        print(f"#{i + 1}: carga {medida['carga_ms']:.0f} ms, GET {medida['get_ms']:.0f} ms "
+              f"({medida['estado']}, {medida['bytes']} bytes)")
+
+    totales = [m['carga_ms'] + m['get_ms'] for m in medidas]
+    print()
+    print(f"Carga de passenger_wsgi: mediana {statistics.median(m['carga_ms'] for m in medidas):.0f} ms")
+    print(f"GET del formulario:      mediana {statistics.median(m['get_ms'] for m in medidas):.0f} ms")
+    print(f"Total:                   mediana {statistics.median(totales):.0f} ms, "
+          f"máximo {max(totales):.0f} ms (presupuesto {args.presupuesto_ms:.0f} ms)")
+
+    print(f"\nMódulos más lentos (último arranque, -X importtime):")
+    for milisegundos, nombre in modulos_lentos(importtime, args.modulos):
+        print(f"  {milisegundos:8.1f} ms  {nombre}")
+
+    fallos = []
+    if statistics.median(totales) > args.presupuesto_ms:
+        fallos.append(f"la mediana ({statistics.median(totales):.0f} ms) supera el presupuesto")
+    importados = sorted({m for medida in medidas for m in medida['importados']})
+    if importados:
+        fallos.append(f"el GET del formulario importó {', '.join(importados)}")
+    for fallo in fallos:
+        print(f"FALLO: {fallo}")
+    return 1 if fallos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
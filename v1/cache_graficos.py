@@ -0,0 +1,135 @@
+"""
+Caché en disco de los gráficos PNG y respuesta HTTP de la ruta /chart/<clave>.png.
+
+La clave es un SHA-1 de los datos del gráfico (hash de pandas de cada fila,
+nombres y tipos de columna) y de su especificación (tipo, ejes, aplicación):
+el mismo gráfico siempre tiene la misma URL y un gráfico distinto, otra.
+Por eso la respuesta se puede cachear en el navegador sin caducidad
+(Cache-Control immutable) y se valida con ETag / If-None-Match (304).
+
+La carpeta se limita a GRAFICOS_MAXIMO_MB: al pasarse se borran los PNG
+menos usados (cada acierto actualiza la fecha del archivo).
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+import cache_metadatos
+
+CARPETA_GRAFICOS = os.path.join(cache_metadatos.CARPETA_CACHE, 'graficos')
+GRAFICOS_MAXIMO_MB = 64
+
+# Cambiar al modificar el estilo de los gráficos (invalida todas las claves)
+VERSION_GRAFICOS = 1
+
+PATRON_CLAVE = re.compile(r'^[0-9a-f]{40}$')
+
+
+def clave_grafico(dataframe, especificacion):
+    """SHA-1 de los datos y de la especificación del gráfico (dict serializable)."""
+    import pandas as pd
+
+    huella = hashlib.sha1()
+    huella.update(json.dumps({'v': VERSION_GRAFICOS, 'spec': especificacion,
+                              'columnas': [str(c) for c in dataframe.columns],
+                              'tipos': [str(t) for t in dataframe.dtypes]},
+                             sort_keys=True, default=str).encode('utf-8'))
+    huella.update(pd.util.hash_pandas_object(dataframe, index=False).values.tobytes())
+    return huella.hexdigest()
+
+
+def url_grafico(clave, base=''):
+    """URL del PNG: '<base>/chart/<clave>.png' (base = SCRIPT_NAME) o relativa si no hay base."""
+    return f"{base.rstrip('/')}/chart/{clave}.png" if base.strip('/') else f"chart/{clave}.png"
+
+
+def _ruta(clave, carpeta=CARPETA_GRAFICOS):
+    return os.path.join(carpeta, f"{clave}.png")
+
+
+def existe(clave, carpeta=CARPETA_GRAFICOS):
+    """True si el PNG ya está en la caché (y lo marca como usado)."""
+    try:
+        os.utime(_ruta(clave, carpeta))
+        return True
+    except OSError:
+        return False
+
+
+def guardar(clave, png, carpeta=CARPETA_GRAFICOS, maximo_mb=GRAFICOS_MAXIMO_MB):
+    """Guarda el PNG (de forma atómica) y poda la carpeta si supera el límite."""
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        temporal = f"{_ruta(clave, carpeta)}.tmp{os.getpid()}"
+        with open(temporal, 'wb') as f:
+            f.write(png)
+        os.replace(temporal, _ruta(clave, carpeta))
+        _podar(carpeta, maximo_mb * 1024 * 1024)
+        return True
+    except OSError:
+        return False
+
+
+def _podar(carpeta, maximo):
+    archivos = []
+    for nombre in os.listdir(carpeta):
+        try:
+            estado = os.stat(os.path.join(carpeta, nombre))
+        except OSError:
+            continue
+        archivos.append((estado.st_mtime, estado.st_size, nombre))
+    total = sum(tamano for _, tamano, _ in archivos)
+    for _, tamano, nombre in sorted(archivos):
+        if total <= maximo:
+            break
+        try:
+            os.remove(os.path.join(carpeta, nombre))
+            total -= tamano
+        except OSError:
+            pass
+
+
+def respuesta(ruta_peticion, si_no_coincide='', carpeta=CARPETA_GRAFICOS):
+    """
+    Respuesta a GET /chart/<clave>.png: (estado, cabeceras, cuerpo en bytes).
+    304 si el navegador ya tiene esa versión (If-None-Match), 404 si la clave
+    no es válida o el PNG ya no está en la caché.
+    """
+    clave = os.path.basename(ruta_peticion or '')
+    if clave.endswith('.png'):
+        clave = clave[:-len('.png')]
+    if not PATRON_CLAVE.match(clave):
+        return '404 Not Found', [('Content-Type', 'text/plain; charset=utf-8')], b'Grafico no encontrado'
+
+    etag = f'"{clave}"'
+    cabeceras = [('ETag', etag), ('Cache-Control', 'public, max-age=31536000, immutable')]
+    if etag in [e.strip() for e in (si_no_coincide or '').split(',')]:
+        return '304 Not Modified', cabeceras, b''
+    try:
+        with open(_ruta(clave, carpeta), 'rb') as f:
+            png = f.read()
+    except OSError:
+        return '404 Not Found', [('Content-Type', 'text/plain; charset=utf-8')], b'Grafico no encontrado'
+    os.utime(_ruta(clave, carpeta), (time.time(), time.time()))
+    return '200 OK', [('Content-Type', 'image/png'), ('Content-Length', str(len(png)))] + cabeceras, png
+
+
+def aplicacion_wsgi(environ, start_response):
+    """Sirve /chart/<clave>.png desde la caché (para montar en cualquier app WSGI)."""
+    estado, cabeceras, cuerpo = respuesta(environ.get('PATH_INFO', ''), environ.get('HTTP_IF_NONE_MATCH', ''))
+    start_response(estado, cabeceras)
+    return [cuerpo]
+
+
+def responder_cgi(salida=None):
+    """Sirve /chart/<clave>.png en modo CGI: escribe cabeceras y PNG en bytes por stdout."""
+    import sys
+
+    salida = salida or sys.stdout.buffer
+    estado, cabeceras, cuerpo = respuesta(os.environ.get('PATH_INFO', ''), os.environ.get('HTTP_IF_NONE_MATCH', ''))
+    lineas = [f"Status: {estado}"] + [f"{nombre}: {valor}" for nombre, valor in cabeceras]
+    salida.write(('\r\n'.join(lineas) + '\r\n\r\n').encode('latin-1') + cuerpo)
+    salida.flush()
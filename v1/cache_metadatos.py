@@ -0,0 +1,138 @@
+"""
+Caché de metadatos del esquema (tablas -> columnas) con invalidación por versión.
+
+La versión de los datos es MAX(Version) de Importacion_estado, la tabla en
+la que whodata.py registra cada importación terminada. Si la tabla aún no
+existe (base cargada con una versión anterior del importador) se usa una
+huella del esquema sacada de INFORMATION_SCHEMA.
+
+- La versión se consulta como mucho una vez cada TTL_VERSION segundos por
+  proceso; entre medias no hay ninguna consulta.
+- Los metadatos se guardan también en disco (JSON, junto con su versión),
+  así un worker recién arrancado los reutiliza tras comprobar la versión
+  en lugar de volver a describir las tablas.
+- Sólo se vuelven a leer del esquema cuando la versión cambia.
+
+Uso:
+    cache = cache_metadatos.CacheMetadatos('analyzer', describir_tablas)
+    metadatos = cache.obtener(conexion)
+"""
+
+import os
+import json
+import time
+import threading
+
+TABLA_ESTADO = 'Importacion_estado'
+
+# Segundos durante los que se da por buena la última versión consultada
+TTL_VERSION = int(os.environ.get('WHO_CACHE_TTL', 60))
+
+# Carpeta de las cachés en disco (compartida por los workers de Passenger)
+CARPETA_CACHE = os.environ.get(
+    'WHO_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+
+_version = {'valor': None, 'comprobada': 0.0}
+_candado = threading.Lock()
+
+
+def _consultar_version(conexion):
+    """Versión actual de los datos: 'imp:<n>' (marca de importación) o 'esq:<huella>' (esquema)."""
+    cursor = conexion.cursor()
+    try:
+        try:
+            cursor.execute(f"SELECT MAX(Version) FROM {TABLA_ESTADO}")
+            fila = cursor.fetchone()
+            return f"imp:{fila[0] or 0}"
+        except Exception:
+            # Sin la tabla de estado: huella de las columnas del esquema actual
+            cursor.execute(
+                "SELECT COUNT(*), SUM(CRC32(CONCAT_WS('.', TABLE_NAME, COLUMN_NAME, COLUMN_TYPE))) "
+                "FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = DATABASE()"
+            )
+            columnas, huella = cursor.fetchone()
+            return f"esq:{columnas}:{huella}"
+    finally:
+        cursor.close()
+
+
+def version_datos(conexion, ttl=TTL_VERSION):
+    """
+    Versión de los datos, consultada a la base como mucho una vez cada `ttl`
+    segundos por proceso (la comparten todas las cachés de v1/).
+    """
+    ahora = time.monotonic()
+    with _candado:
+        if _version['valor'] is not None and ahora - _version['comprobada'] < ttl:
+            return _version['valor']
+    valor = _consultar_version(conexion)
+    with _candado:
+        _version['valor'], _version['comprobada'] = valor, ahora
+    return valor
+
+
+def olvidar_version():
+    """Fuerza a consultar la versión en la próxima petición."""
+    with _candado:
+        _version['valor'] = None
+
+
+class CacheMetadatos:
+    """Metadatos de un esquema leídos con `cargar(conexion)` y reutilizados mientras no cambie la versión."""
+
+    def __init__(self, nombre, cargar, carpeta=CARPETA_CACHE):
+        self.cargar = cargar
+        self.ruta = os.path.join(carpeta, f"metadatos_{nombre}.json")
+        self._metadatos = None
+        self._version = None
+        self._candado = threading.Lock()
+        self.estadisticas = {'aciertos': 0, 'disco': 0, 'cargas': 0}
+
+    def _leer_disco(self, version):
+        try:
+            with open(self.ruta, mode='r', encoding='utf-8') as f:
+                guardado = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return guardado['metadatos'] if guardado.get('version') == version else None
+
+    def _guardar_disco(self, version, metadatos):
+        try:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            temporal = f"{self.ruta}.tmp{os.getpid()}"
+            with open(temporal, mode='w', encoding='utf-8') as f:
+                json.dump({'version': version, 'metadatos': metadatos}, f, ensure_ascii=False)
+            os.replace(temporal, self.ruta)
+        except OSError:
+            # Sin permisos de escritura la caché sigue funcionando en memoria
+            pass
+
+    def obtener(self, conexion):
+        """Metadatos vigentes: de memoria, del disco o (si cambió la versión) del esquema."""
+        version = version_datos(conexion)
+        with self._candado:
+            if self._metadatos is not None and self._version == version:
+                self.estadisticas['aciertos'] += 1
+                return self._metadatos
+
+        metadatos = self._leer_disco(version)
+        if metadatos is not None:
+            self.estadisticas['disco'] += 1
+        else:
+            metadatos = self.cargar(conexion)
+            self.estadisticas['cargas'] += 1
+            self._guardar_disco(version, metadatos)
+
+        with self._candado:
+            self._metadatos, self._version = metadatos, version
+        return metadatos
+
+    def invalidar(self):
+        """Descarta los metadatos en memoria y en disco (ej. tras cambiar el esquema a mano)."""
+        with self._candado:
+            self._metadatos = self._version = None
+        try:
+            os.remove(self.ruta)
+        except OSError:
+            pass
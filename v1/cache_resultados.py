@@ -0,0 +1,209 @@
+"""
+Caché de resultados de consultas (DataFrames) para las aplicaciones web.
+
+La clave es la consulta SQL normalizada (espacios colapsados fuera de las
+cadenas) más la versión de los datos de cache_metadatos.version_datos():
+al terminar una importación la versión cambia y los resultados anteriores
+dejan de usarse (y se borran del disco).
+
+Dos niveles:
+- Memoria: LRU por proceso, limitado en entradas y en bytes
+  (MEMORIA_MAXIMA_MB), con caducidad TTL_RESULTADOS.
+- Disco: cada resultado se guarda también como Parquet (pyarrow) en
+  CARPETA_CACHE/resultados, compartido por todos los workers de Passenger;
+  limitado a DISCO_MAXIMO_MB (se borran los más antiguos) y con la misma
+  caducidad. Parquet sólo guarda datos: leer un archivo de la carpeta no
+  ejecuta código, como sí podría hacerlo un pickle. Sin pyarrow instalado
+  la caché queda sólo en memoria.
+
+Las estadísticas (aciertos en memoria y en disco, fallos, escrituras,
+desalojos) están en `cache.estadisticas`.
+"""
+
+import os
+import re
+import time
+import hashlib
+import threading
+import importlib.util
+from collections import OrderedDict
+
+import cache_metadatos
+
+# Caducidad de un resultado (segundos), aunque la versión no cambie
+TTL_RESULTADOS = int(os.environ.get('WHO_CACHE_TTL_RESULTADOS', 600))
+
+# Límites del nivel en memoria (por proceso)
+ENTRADAS_MAXIMAS = 64
+MEMORIA_MAXIMA_MB = 64
+
+# Límite del nivel en disco (compartido); resultados más grandes no se guardan
+DISCO_MAXIMO_MB = 256
+RESULTADO_MAXIMO_MB = 32
+
+CARPETA_RESULTADOS = os.path.join(cache_metadatos.CARPETA_CACHE, 'resultados')
+EXTENSION = '.parquet'
+
+# El nivel en disco necesita pyarrow (pandas.to_parquet / read_parquet)
+DISCO_DISPONIBLE = importlib.util.find_spec('pyarrow') is not None
+
+# Cadenas entre comillas simples, dobles o acentos graves (se respetan al normalizar)
+_PATRON_SQL = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`)|\s+")
+
+
+def normalizar_sql(sql):
+    """Colapsa los espacios fuera de las cadenas y quita el ';' final: misma consulta, misma clave."""
+    normalizada = _PATRON_SQL.sub(lambda m: m.group(1) or ' ', sql.strip())
+    return normalizada.rstrip('; ')
+
+
+def _huella(texto):
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+class CacheResultados:
+    """LRU de DataFrames en memoria con copia en disco, invalidado por la versión de los datos."""
+
+    def __init__(self, carpeta=CARPETA_RESULTADOS, ttl=TTL_RESULTADOS, entradas_maximas=ENTRADAS_MAXIMAS,
+                 memoria_maxima_mb=MEMORIA_MAXIMA_MB, disco_maximo_mb=DISCO_MAXIMO_MB):
+        self.carpeta = carpeta
+        self.ttl = ttl
+        self.entradas_maximas = entradas_maximas
+        self.memoria_maxima = memoria_maxima_mb * 1024 * 1024
+        self.disco_maximo = disco_maximo_mb * 1024 * 1024
+        self._entradas = OrderedDict()   # clave -> (DataFrame, bytes, guardado)
+        self._bytes = 0
+        self._version = None
+        self._candado = threading.Lock()
+        self.estadisticas = {'aciertos_memoria': 0, 'aciertos_disco': 0, 'fallos': 0,
+                             'escrituras': 0, 'desalojos': 0}
+
+    def _ruta(self, version, clave):
+        return os.path.join(self.carpeta, f"{_huella(version)[:12]}_{clave}{EXTENSION}")
+
+    def _clave(self, sql, version):
+        return _huella(f"{version}\n{normalizar_sql(sql)}")
+
+    def _cambiar_version(self, version):
+        """Nueva versión de los datos: se vacía la memoria y se borran del disco los resultados viejos
+        (y los de formatos anteriores)."""
+        self._entradas.clear()
+        self._bytes = 0
+        self._version = version
+        prefijo = f"{_huella(version)[:12]}_"
+        try:
+            for nombre in os.listdir(self.carpeta):
+                if not (nombre.startswith(prefijo) and nombre.endswith(EXTENSION)):
+                    try:
+                        os.remove(os.path.join(self.carpeta, nombre))
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+    def _recordar(self, clave, dataframe, guardado):
+        """Añade al LRU en memoria y desaloja los más antiguos si se pasa de los límites (con el candado)."""
+        tamano = int(dataframe.memory_usage(index=True, deep=True).sum())
+        if tamano > self.memoria_maxima:
+            return
+        if clave in self._entradas:
+            self._bytes -= self._entradas.pop(clave)[1]
+        self._entradas[clave] = (dataframe, tamano, guardado)
+        self._bytes += tamano
+        while len(self._entradas) > self.entradas_maximas or self._bytes > self.memoria_maxima:
+            _, (_, tamano_viejo, _) = self._entradas.popitem(last=False)
+            self._bytes -= tamano_viejo
+            self.estadisticas['desalojos'] += 1
+
+    def obtener(self, sql, version):
+        """DataFrame en caché para la consulta (copia superficial) o None."""
+        clave = self._clave(sql, version)
+        ahora = time.time()
+        with self._candado:
+            if version != self._version:
+                self._cambiar_version(version)
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if ahora - entrada[2] < self.ttl:
+                    self._entradas.move_to_end(clave)
+                    self.estadisticas['aciertos_memoria'] += 1
+                    return entrada[0].copy(deep=False)
+                self._bytes -= entrada[1]
+                del self._entradas[clave]
+
+        ruta = self._ruta(version, clave)
+        try:
+            guardado = os.path.getmtime(ruta)
+            if DISCO_DISPONIBLE and ahora - guardado < self.ttl:
+                import pandas as pd
+
+                dataframe = pd.read_parquet(ruta, engine='pyarrow')
+                with self._candado:
+                    self._recordar(clave, dataframe, guardado)
+                    self.estadisticas['aciertos_disco'] += 1
+                return dataframe.copy(deep=False)
+        except Exception:
+            # No existe, caducó o lo está escribiendo otro worker: se consulta la base
+            pass
+
+        with self._candado:
+            self.estadisticas['fallos'] += 1
+        return None
+
+    def guardar(self, sql, version, dataframe):
+        """Guarda el resultado en memoria y en disco."""
+        clave = self._clave(sql, version)
+        ahora = time.time()
+        with self._candado:
+            if version != self._version:
+                self._cambiar_version(version)
+            self._recordar(clave, dataframe, ahora)
+            self.estadisticas['escrituras'] += 1
+
+        tamano = dataframe.memory_usage(index=True, deep=True).sum()
+        if not DISCO_DISPONIBLE or tamano > RESULTADO_MAXIMO_MB * 1024 * 1024:
+            return
+        ruta = self._ruta(version, clave)
+        temporal = f"{ruta}.tmp{os.getpid()}.{threading.get_ident()}"
+        try:
+            os.makedirs(self.carpeta, exist_ok=True)
+            dataframe.to_parquet(temporal, engine='pyarrow')
+            os.replace(temporal, ruta)
+            self._podar_disco()
+        except Exception:
+            # Sin espacio, sin permisos o columnas que Parquet no admite (ej.
+            # nombres repetidos): el resultado queda sólo en memoria
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+
+    def _podar_disco(self):
+        """Borra los resultados más antiguos del disco hasta quedar bajo DISCO_MAXIMO_MB."""
+        archivos = []
+        for nombre in os.listdir(self.carpeta):
+            ruta = os.path.join(self.carpeta, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            archivos.append((estado.st_mtime, estado.st_size, ruta))
+        total = sum(tamano for _, tamano, _ in archivos)
+        for _, tamano, ruta in sorted(archivos):
+            if total <= self.disco_maximo:
+                break
+            try:
+                os.remove(ruta)
+                total -= tamano
+            except OSError:
+                pass
+
+    def resumen(self):
+        """Texto corto con los contadores (para mostrar en la página de resultados)."""
+        e = self.estadisticas
+        aciertos = e['aciertos_memoria'] + e['aciertos_disco']
+        consultas = aciertos + e['fallos']
+        tasa = aciertos / consultas * 100 if consultas else 0
+        return (f"{aciertos} aciertos ({e['aciertos_memoria']} memoria, {e['aciertos_disco']} disco), "
+                f"{e['fallos']} fallos, {tasa:.0f}% | {len(self._entradas)} en memoria, "
+                f"{self._bytes / 1024 / 1024:.1f} MB")
@@ -0,0 +1,189 @@
+"""
+Pool de conexiones a la base de datos para los procesos de larga vida
+(Passenger mantiene el proceso entre peticiones).
+
+Cada petición toma una conexión ya abierta en lugar de repetir la conexión
+TCP y la autenticación, y la devuelve al terminar. El pool:
+
+- Tiene un tamaño máximo; si todas están en uso espera hasta ESPERA_MAXIMA
+  segundos a que se libere una.
+- Cierra las conexiones que llevan más de INACTIVIDAD_MAXIMA segundos sin
+  usarse (antes de que el servidor las corte por wait_timeout).
+- Comprueba con ping() las que llevan más de VERIFICAR_TRAS segundos
+  ociosas y, si fallan, las sustituye por una nueva (reconexión).
+- Descarta la conexión si la petición terminó con un error de conexión.
+
+Uso:
+    pool = db_pool.obtener_pool('analyzer', lambda: mysql.connector.connect(**config))
+    with pool.conexion() as conn:
+        ...
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+TAMANO_MAXIMO = 4
+INACTIVIDAD_MAXIMA = 300
+VERIFICAR_TRAS = 5
+ESPERA_MAXIMA = 10
+
+
+class PoolAgotado(Exception):
+    """No se liberó ninguna conexión dentro del tiempo de espera."""
+
+
+class PoolConexiones:
+    """Pool de conexiones DB-API creadas con `fabrica()`, seguro entre hilos."""
+
+    def __init__(self, fabrica, tamano_maximo=TAMANO_MAXIMO, inactividad_maxima=INACTIVIDAD_MAXIMA,
+                 verificar_tras=VERIFICAR_TRAS, espera_maxima=ESPERA_MAXIMA):
+        self.fabrica = fabrica
+        self.tamano_maximo = tamano_maximo
+        self.inactividad_maxima = inactividad_maxima
+        self.verificar_tras = verificar_tras
+        self.espera_maxima = espera_maxima
+        self._libres = []          # [(conexión, momento en que se devolvió)], la última devuelta al final
+        self._prestadas = 0        # conexiones prestadas (o reservadas mientras se crean)
+        self._condicion = threading.Condition()
+        self.estadisticas = {'creadas': 0, 'reutilizadas': 0, 'descartadas': 0, 'caducadas': 0, 'esperas': 0}
+
+    def _cerrar(self, conexion):
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+    def _desalojar_inactivas(self, ahora):
+        """Cierra las conexiones libres que superaron la inactividad máxima (las más antiguas van primero)."""
+        while self._libres and ahora - self._libres[0][1] > self.inactividad_maxima:
+            conexion, _ = self._libres.pop(0)
+            self._cerrar(conexion)
+            self.estadisticas['caducadas'] += 1
+
+    def _sana(self, conexion, ociosa):
+        """True si la conexión sigue viva (ping sólo si estuvo ociosa más de `verificar_tras`)."""
+        if ociosa <= self.verificar_tras:
+            return True
+        try:
+            conexion.ping()
+            return True
+        except Exception:
+            return False
+
+    def _reservar(self, limite):
+        """
+        Bajo el candado: toma la conexión libre más reciente, o reserva un hueco
+        para crear una nueva (devuelve None), esperando si el pool está lleno.
+        Devuelve (conexión o None, segundos que estuvo ociosa).
+        """
+        while True:
+            ahora = time.monotonic()
+            self._desalojar_inactivas(ahora)
+            if self._libres:
+                # LIFO: la más reciente es la que menos probablemente cortó el servidor
+                conexion, devuelta = self._libres.pop()
+                self._prestadas += 1
+                return conexion, ahora - devuelta
+            if self._prestadas < self.tamano_maximo:
+                self._prestadas += 1
+                return None, 0
+            restante = limite - ahora
+            if restante <= 0:
+                raise PoolAgotado(f"Las {self.tamano_maximo} conexiones del pool están en uso")
+            self.estadisticas['esperas'] += 1
+            self._condicion.wait(restante)
+
+    def _liberar_hueco(self):
+        with self._condicion:
+            self._prestadas -= 1
+            self._condicion.notify()
+
+    def obtener(self):
+        """Presta una conexión: una libre y sana, una nueva si hay hueco, o espera a que se libere una."""
+        limite = time.monotonic() + self.espera_maxima
+        while True:
+            with self._condicion:
+                conexion, ociosa = self._reservar(limite)
+            if conexion is None:
+                break
+            # El ping se hace fuera del candado para no bloquear a los demás hilos
+            if self._sana(conexion, ociosa):
+                self.estadisticas['reutilizadas'] += 1
+                return conexion
+            self._cerrar(conexion)
+            self.estadisticas['descartadas'] += 1
+            self._liberar_hueco()
+
+        try:
+            conexion = self.fabrica()
+        except Exception:
+            self._liberar_hueco()
+            raise
+        self.estadisticas['creadas'] += 1
+        return conexion
+
+    def devolver(self, conexion, descartar=False):
+        """
+        Devuelve una conexión prestada. Se deshace cualquier transacción
+        abierta para que la siguiente petición la reciba limpia; con
+        `descartar` (o si eso falla) se cierra en lugar de reutilizarla.
+        """
+        if not descartar:
+            try:
+                if getattr(conexion, 'in_transaction', False):
+                    conexion.rollback()
+            except Exception:
+                descartar = True
+        with self._condicion:
+            self._prestadas -= 1
+            if descartar:
+                self.estadisticas['descartadas'] += 1
+            else:
+                self._libres.append((conexion, time.monotonic()))
+            self._condicion.notify()
+        if descartar:
+            self._cerrar(conexion)
+
+    @contextmanager
+    def conexion(self):
+        """Conexión prestada durante el bloque `with`; se descarta si el bloque falla por la conexión."""
+        conexion = self.obtener()
+        descartar = False
+        try:
+            yield conexion
+        except Exception as e:
+            descartar = es_error_de_conexion(e)
+            raise
+        finally:
+            self.devolver(conexion, descartar)
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres (las prestadas vuelven al pool al devolverse)."""
+        with self._condicion:
+            libres, self._libres = self._libres, []
+        for conexion, _ in libres:
+            self._cerrar(conexion)
+
+    def __len__(self):
+        return len(self._libres) + self._prestadas
+
+
+def es_error_de_conexion(error):
+    """True si la excepción indica una conexión rota (hay que descartarla, no devolverla)."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # mysql.connector: InterfaceError / OperationalError; pymysql: OperationalError / InterfaceError
+    return type(error).__name__ in ('InterfaceError', 'OperationalError')
+
+
+_pools = {}
+_candado_pools = threading.Lock()
+
+
+def obtener_pool(nombre, fabrica, **opciones):
+    """Pool del proceso con ese nombre; se crea la primera vez con `fabrica` y `opciones`."""
+    with _candado_pools:
+        if nombre not in _pools:
+            _pools[nombre] = PoolConexiones(fabrica, **opciones)
+        return _pools[nombre]
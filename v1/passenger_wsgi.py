@@ -1,19 +1,44 @@
 import sys
 import os
-import imp
 import io
+import time
 import traceback
+import importlib.util
+
+
+def load_source(name, path):
+    """Carga un script por su ruta como módulo (reemplaza al obsoleto imp.load_source)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
 
 # --- 1. Cargar tu script 'analyzer.py' ---
 # Passenger ya ha activado el VENV, así que esto debería funcionar
 # directamente y encontrar 'analyzer.py' y sus dependencias.
+# pandas / matplotlib se importan la primera vez que se usan (ver
+# analyzer.LazyModule); con WHO_PERFIL_ARRANQUE=1 se anota en el log de
+# errores cuánto tardó la carga y qué módulos pesados quedaron importados.
+_load_start = time.perf_counter()
 try:
-    analyzer_module = imp.load_source('analyzer', 'analyzer.py')
-except Exception as e:
-    # Si 'analyzer.py' falla al cargarse (ej. error de sintaxis),
-    # guardamos el error para mostrarlo.
+    analyzer_module = load_source('analyzer', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyzer.py'))
+except (Exception, SystemExit) as e:
+    # Si 'analyzer.py' falla al cargarse (ej. error de sintaxis o falta
+    # una dependencia), guardamos el error para mostrarlo.
     analyzer_module = None
     startup_error = traceback.format_exc()
+load_time = time.perf_counter() - _load_start
+
+if os.environ.get('WHO_PERFIL_ARRANQUE'):
+    loaded = [name for name in ('mysql.connector', 'pandas', 'matplotlib', 'seaborn') if name in sys.modules]
+    sys.stderr.write(f"passenger_wsgi: analyzer.py cargado en {load_time * 1000:.0f} ms "
+                     f"(módulos pesados importados: {', '.join(loaded) or 'ninguno'})\n")
 
 
 # --- 2. El Envoltorio (Wrapper) WSGI ---
@@ -31,6 +56,14 @@ def application(environ, start_response):
         error_html += "</body></html>"
         return [error_html.encode('utf-8')]
 
+    # Exportación (CSV / NDJSON): se responde por trozos, sin pasar por stdout
+    if environ.get('PATH_INFO', '').rstrip('/').endswith('/export'):
+        return analyzer_module.export_application(environ, start_response)
+
+    # Gráficos: PNG desde la caché en disco, con ETag y Cache-Control
+    if environ.get('PATH_INFO', '').startswith('/chart/'):
+        return analyzer_module.cache_graficos.aplicacion_wsgi(environ, start_response)
+
     # Si el script se importó bien, lo ejecutamos:
 
     # Redirigir stdout para capturar los 'print()' de tu script
@@ -42,6 +75,7 @@ def application(environ, start_response):
     os.environ['QUERY_STRING'] = environ.get('QUERY_STRING', '')
     os.environ['CONTENT_TYPE'] = environ.get('CONTENT_TYPE', '')
     os.environ['CONTENT_LENGTH'] = environ.get('CONTENT_LENGTH', '0')
+    os.environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '')
     sys.stdin = environ.get('wsgi.input', io.StringIO())
 
     status = '200 OK'
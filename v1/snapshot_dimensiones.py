@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Snapshot binario de las tablas de dimensiones (causas, países, estado de
+desarrollo y rangos de edad) para las aplicaciones web.
+
+El paso de construcción lee las cuatro tablas UNA vez y escribe un archivo
+compacto; cada proceso (worker de Passenger, CGI) lo abre con mmap en
+milisegundos, sin consultas ni parseo: el sistema operativo comparte las
+páginas entre procesos y sólo se leen las que tocan las búsquedas.
+
+Formato (little-endian):
+    cabecera    magia 'WHODIM01', versión, nº de tablas, fecha de creación,
+                posición del bloque de textos
+    directorio  por tabla: nombre, filas, columnas (posición/longitud en
+                el bloque de textos), posición de su índice
+    índices     por tabla, una entrada de tamaño fijo por fila, ordenadas
+                por clave: (posición, longitud) de la clave y del valor
+    textos      claves y valores en UTF-8, campos separados por \\x1f
+
+La búsqueda es binaria sobre el índice (O(log n)) comparando los bytes de
+la clave directamente en el mapa de memoria.
+
+Uso:
+    python snapshot_dimensiones.py                  # construir desde la base
+    python snapshot_dimensiones.py --ver Paises 32  # consultar el snapshot
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import argparse
+
+RUTA_SNAPSHOT = os.environ.get(
+    'WHO_SNAPSHOT_DIMENSIONES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dimensiones.snap')
+)
+
+MAGIA = b'WHODIM01'
+VERSION = 1
+SEPARADOR = '\x1f'
+
+CABECERA = struct.Struct('<8sIIqQ')      # magia, versión, tablas, creado (epoch), posición de los textos
+DIRECTORIO = struct.Struct('<32sIIIQ')   # nombre, filas, columnas (pos, long), posición del índice
+ENTRADA = struct.Struct('<IIII')         # clave (pos, long), valor (pos, long)
+
+# Tabla -> (columnas de la clave, columnas del valor)
+DIMENSIONES = {
+    'who_mortality_causes': (('icd_revision', 'short_code'), ('short_code', 'description', 'icd_revision', 'list_type')),
+    'Paises': (('Codigo_Pais',), ('Codigo_Pais_3', 'Nombre', 'Country_status_id')),
+    'Estado_Desarrollo': (('Codigo_Estado',), ('Descripcion',)),
+    'who_mortality_age_ranges': (('column_code',), ('age_range',)),
+}
+
+# Orden de lectura de cada tabla: ante claves repetidas se queda la primera
+# (en las causas, la lista 'Detailed 2019' antes que la de Portugal)
+ORDEN = {
+    'who_mortality_causes': 'list_type, id',
+}
+
+# Columnas de resultados que se pueden etiquetar: sufijo -> (tabla, nombre de la etiqueta)
+ETIQUETAS = {
+    'Country': ('Paises', 'Pais_Nombre'),
+    'Pais_Codigo': ('Paises', 'Pais_Nombre'),
+    'Country_status_id': ('Estado_Desarrollo', 'Estado_Descripcion'),
+    'Cause': ('who_mortality_causes', 'Causa_Descripcion'),
+}
+
+
+def normalizar_causa(codigo):
+    """'A00.0' / 'a000 ' -> 'A000' (la forma de Mortalidad.Cause)."""
+    return str(codigo).strip().upper().replace('.', '')
+
+
+def revision_de_lista(lista):
+    """Revisión CIE de un valor de Mortalidad.List ('104' -> 'ICD-10', '07A' -> 'ICD-7', '09B' -> 'ICD-9')."""
+    lista = str(lista or '').strip().upper()
+    if lista.startswith('10'):
+        return 'ICD-10'
+    if lista[:2] in ('07', '08', '09'):
+        return f"ICD-{int(lista[:2])}"
+    return 'ICD-10'
+
+
+def _clave(tabla, valores):
+    if tabla == 'who_mortality_causes':
+        revision, codigo = valores
+        valores = (str(revision).strip(), normalizar_causa(codigo))
+    return SEPARADOR.join(str(v).strip() for v in valores).encode('utf-8')
+
+
+def _texto(valores):
+    return SEPARADOR.join('' if v is None else str(v) for v in valores).encode('utf-8')
+
+
+# -------------------- Construcción --------------------
+
+def leer_dimensiones(conexion):
+    """Lee las tablas de DIMENSIONES. Devuelve {tabla: [(clave, valor), ...]} ordenado por clave."""
+    tablas = {}
+    cursor = conexion.cursor()
+    try:
+        for tabla, (columnas_clave, columnas_valor) in DIMENSIONES.items():
+            columnas = columnas_clave + columnas_valor
+            sql = f"SELECT {', '.join(columnas)} FROM {tabla}"
+            if tabla in ORDEN:
+                sql += f" ORDER BY {ORDEN[tabla]}"
+            cursor.execute(sql)
+            filas = {}
+            for fila in cursor.fetchall():
+                clave = _clave(tabla, fila[:len(columnas_clave)])
+                filas.setdefault(clave, _texto(fila[len(columnas_clave):]))
+            tablas[tabla] = sorted(filas.items())
+    finally:
+        cursor.close()
+    return tablas
+
+
+def escribir_snapshot(tablas, ruta=RUTA_SNAPSHOT):
+    """
+    Escribe el snapshot de forma atómica (archivo temporal + os.replace):
+    los procesos que ya tienen mapeado el anterior lo siguen leyendo sin
+    errores y los nuevos abren el nuevo. Devuelve el tamaño en bytes.
+    """
+    textos = bytearray()
+    directorio = []
+    indices = []
+    posicion_indice = CABECERA.size + DIRECTORIO.size * len(tablas)
+
+    for tabla, filas in tablas.items():
+        columnas = _texto(DIMENSIONES[tabla][1])
+        directorio.append(DIRECTORIO.pack(tabla.encode('utf-8'), len(filas), len(textos), len(columnas),
+                                          posicion_indice))
+        textos += columnas
+        indice = bytearray()
+        for clave, valor in filas:
+            indice += ENTRADA.pack(len(textos), len(clave), len(textos) + len(clave), len(valor))
+            textos += clave + valor
+        indices.append(indice)
+        posicion_indice += len(indice)
+
+    temporal = f"{ruta}.tmp{os.getpid()}"
+    with open(temporal, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, len(tablas), int(time.time()), posicion_indice))
+        for entrada in directorio:
+            f.write(entrada)
+        for indice in indices:
+            f.write(indice)
+        f.write(textos)
+    os.replace(temporal, ruta)
+    return os.path.getsize(ruta)
+
+
+def construir(conexion, ruta=RUTA_SNAPSHOT):
+    """Lee las dimensiones de la base y escribe el snapshot. Devuelve {tabla: filas}."""
+    tablas = leer_dimensiones(conexion)
+    escribir_snapshot(tablas, ruta)
+    return {tabla: len(filas) for tabla, filas in tablas.items()}
+
+
+# -------------------- Lectura --------------------
+
+class SnapshotDimensiones:
+    """Snapshot abierto con mmap (sólo lectura) y búsqueda binaria por clave."""
+
+    def __init__(self, ruta=RUTA_SNAPSHOT):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            estado = os.fstat(f.fileno())
+            self.mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identidad = (estado.st_ino, estado.st_mtime_ns)
+
+        magia, version, num_tablas, self.creado, self.inicio_textos = CABECERA.unpack_from(self.mapa, 0)
+        if magia != MAGIA or version != VERSION:
+            self.mapa.close()
+            raise ValueError(f"'{ruta}' no es un snapshot de dimensiones válido (versión {VERSION})")
+
+        self.tablas = {}
+        for i in range(num_tablas):
+            nombre, filas, pos_columnas, long_columnas, pos_indice = DIRECTORIO.unpack_from(
+                self.mapa, CABECERA.size + i * DIRECTORIO.size)
+            inicio = self.inicio_textos + pos_columnas
+            columnas = self.mapa[inicio:inicio + long_columnas].decode('utf-8').split(SEPARADOR)
+            self.tablas[nombre.rstrip(b'\0').decode('utf-8')] = (filas, pos_indice, columnas)
+
+    def _texto(self, posicion, longitud):
+        inicio = self.inicio_textos + posicion
+        return self.mapa[inicio:inicio + longitud]
+
+    def _buscar(self, tabla, clave):
+        """Bytes del valor de `clave` en `tabla`, o None."""
+        if tabla not in self.tablas:
+            return None
+        filas, pos_indice, _ = self.tablas[tabla]
+        bajo, alto = 0, filas
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            pos_clave, long_clave, pos_valor, long_valor = ENTRADA.unpack_from(
+                self.mapa, pos_indice + medio * ENTRADA.size)
+            actual = self._texto(pos_clave, long_clave)
+            if actual == clave:
+                return self._texto(pos_valor, long_valor)
+            if actual < clave:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return None
+
+    def buscar(self, tabla, *clave):
+        """Fila de `tabla` como diccionario {columna: valor}, o None si la clave no existe."""
+        valor = self._buscar(tabla, _clave(tabla, clave))
+        if valor is None:
+            return None
+        columnas = self.tablas[tabla][2]
+        return {c: (v or None) for c, v in zip(columnas, valor.decode('utf-8').split(SEPARADOR))}
+
+    def _campo(self, tabla, columna, *clave):
+        fila = self.buscar(tabla, *clave)
+        return fila[columna] if fila else None
+
+    def nombre_pais(self, codigo):
+        return self._campo('Paises', 'Nombre', codigo)
+
+    def descripcion_causa(self, codigo, lista='104'):
+        return self._campo('who_mortality_causes', 'description', revision_de_lista(lista), codigo)
+
+    def estado_desarrollo(self, codigo):
+        return self._campo('Estado_Desarrollo', 'Descripcion', codigo)
+
+    def rango_edad(self, columna):
+        return self._campo('who_mortality_age_ranges', 'age_range', columna)
+
+    def etiquetar(self, dataframe):
+        """
+        Añade al DataFrame, junto a cada columna de código (Country, Cause...),
+        una columna con su nombre o descripción sacada del snapshot, sin
+        consultar la base. Las causas usan la columna List del resultado si
+        está (si no, se asume CIE-10). Devuelve una copia: el DataFrame recibido
+        puede ser el mismo objeto guardado en la caché de resultados.
+        """
+        dataframe = dataframe.copy(deep=False)
+        for columna in list(dataframe.columns):
+            sufijo = str(columna).rsplit('.', 1)[-1]
+            if sufijo not in ETIQUETAS:
+                continue
+            tabla, etiqueta = ETIQUETAS[sufijo]
+            if tabla not in self.tablas:
+                continue
+            prefijo = str(columna)[:-len(sufijo)]
+            if prefijo + etiqueta in dataframe.columns:
+                continue
+
+            if tabla == 'who_mortality_causes':
+                columna_lista = prefijo + 'List'
+                listas = dataframe[columna_lista] if columna_lista in dataframe.columns else ['104'] * len(dataframe)
+                nombres = {}
+                valores = []
+                for lista, causa in zip(listas, dataframe[columna]):
+                    if (lista, causa) not in nombres:
+                        nombres[(lista, causa)] = self.descripcion_causa(causa, lista)
+                    valores.append(nombres[(lista, causa)])
+            else:
+                buscar = {'Paises': self.nombre_pais, 'Estado_Desarrollo': self.estado_desarrollo}[tabla]
+                nombres = {valor: buscar(valor) for valor in dataframe[columna].unique()}
+                valores = dataframe[columna].map(nombres)
+
+            dataframe.insert(dataframe.columns.get_loc(columna) + 1, prefijo + etiqueta, valores)
+        return dataframe
+
+    def cerrar(self):
+        self.mapa.close()
+
+
+_snapshot = None
+
+
+def cargar(ruta=RUTA_SNAPSHOT):
+    """
+    Snapshot del proceso, abierto una sola vez y reabierto si el archivo se
+    reconstruyó (cambió de inodo o de fecha). None si no existe o no es válido:
+    las aplicaciones siguen funcionando igual, sólo sin etiquetas.
+    """
+    global _snapshot
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    if _snapshot is not None and _snapshot.ruta == ruta and _snapshot.identidad == (estado.st_ino, estado.st_mtime_ns):
+        return _snapshot
+    try:
+        _snapshot = SnapshotDimensiones(ruta)
+    except (OSError, ValueError, struct.error):
+        _snapshot = None
+    return _snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye o consulta el snapshot de dimensiones")
+    parser.add_argument('--salida', default=RUTA_SNAPSHOT, help=f"Archivo del snapshot (por defecto: {RUTA_SNAPSHOT})")
+    parser.add_argument('--ver', nargs='+', metavar=('TABLA', 'CLAVE'),
+                        help="Consultar una clave en vez de construir, ej: --ver who_mortality_causes ICD-10 I219")
+    args = parser.parse_args()
+
+    if args.ver:
+        inicio = time.perf_counter()
+        snapshot = SnapshotDimensiones(args.salida)
+        abierto = time.perf_counter()
+        fila = snapshot.buscar(args.ver[0], *args.ver[1:])
+        print(f"{fila}  (apertura {(abierto - inicio) * 1000:.2f} ms, "
+              f"búsqueda {(time.perf_counter() - abierto) * 1000:.3f} ms)")
+        return
+
+    from analyzer import DatabaseAnalyzer
+
+    analyzer = DatabaseAnalyzer()
+    if not analyzer.connect_to_db():
+        sys.exit(1)
+    try:
+        inicio = time.perf_counter()
+        filas = construir(analyzer.connection, args.salida)
+    finally:
+        analyzer.release_connection()
+
+    for tabla, cantidad in filas.items():
+        print(f"   -> {tabla}: {cantidad} filas")
+    print(f"Snapshot '{args.salida}' ({os.path.getsize(args.salida) / 1024:,.1f} KB) "
+          f"construido en {time.perf_counter() - inicio:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,12 +29,13 @@ This script implements the requested functions:
 - connect_to_db()
 - main()/application() (router for CGI & WSGI)
 - render_form_page(metadata, error_message=None)
-- render_results_page(html_table, graph_base64_image, raw_query)
+- render_results_page(html_table, graph_src, raw_query)
 - parse_form_data()
 - build_sql_query(selections)
 - fetch_data(query_string)
 - generate_html_table(dataframe)
 - generate_graph(dataframe, selections)
+- chart_url(dataframe, selections, base) (PNG served out-of-band from /chart/<key>.png)
 
 Security notes:
 - The script builds a whitelist of tables/columns from INFORMATION_SCHEMA to avoid SQL injection.
@@ -65,6 +66,17 @@ import cgi
 import cgitb
 cgitb.enable()
 
+import db_pool
+import cache_metadatos
+import cache_resultados
+import cache_graficos
+
+# Optional prebuilt dimension snapshot (country names, cause descriptions)
+try:
+    import snapshot_dimensiones
+except ImportError:
+    snapshot_dimensiones = None
+
 # -------------------- CONFIG & HELPERS --------------------
 CONFIG_PATHS = [
     os.path.join(os.path.dirname(__file__), '..', 'config.ini'),
@@ -81,10 +93,15 @@ TABLE_JOIN_HINTS = {
 
 # -------------------- 1. connect_to_db --------------------
 
-def connect_to_db():
-    """Establish secure MySQL connection reading from config.ini or environment variables.
-    Returns a mysql.connector connection.
-    """
+_DB_CONFIG = None
+
+
+def read_db_config():
+    """Read DB credentials from environment variables or config.ini (once per process)."""
+    global _DB_CONFIG
+    if _DB_CONFIG is not None:
+        return _DB_CONFIG
+
     cfg = {}
     # Try environment variables first
     cfg['host'] = os.environ.get('DB_HOST')
@@ -106,18 +123,48 @@ def connect_to_db():
     if not all([cfg.get('host'), cfg.get('user'), cfg.get('password'), cfg.get('database')]):
         raise RuntimeError('Database credentials not found. Set DB_HOST/DB_USER/DB_PASS/DB_NAME or place config.ini.')
 
-    conn = mysql.connector.connect(
+    _DB_CONFIG = cfg
+    return cfg
+
+
+def _new_connection():
+    cfg = read_db_config()
+    return mysql.connector.connect(
         host=cfg['host'],
         user=cfg['user'],
         password=cfg['password'],
         database=cfg['database'],
         autocommit=True,
     )
-    return conn
+
+
+def get_pool():
+    """Process-wide connection pool (the WSGI process outlives each request)."""
+    return db_pool.obtener_pool('who_data_viewer', _new_connection,
+                                tamano_maximo=int(os.environ.get('DB_POOL_SIZE', db_pool.TAMANO_MAXIMO)))
+
+
+def connect_to_db():
+    """Borrow a mysql.connector connection from the pool (opened only if none is idle).
+    Give it back with release_connection().
+    """
+    return get_pool().obtener()
+
+
+def release_connection(conn, error=None):
+    """Return a borrowed connection to the pool; drop it if `error` means it is broken."""
+    if conn is not None:
+        get_pool().devolver(conn, descartar=error is not None and db_pool.es_error_de_conexion(error))
 
 # -------------------- Metadata loader (whitelist) --------------------
 
 def load_metadata(conn):
+    """Return dict of tables -> list of columns, cached until the data version changes
+    (see cache_metadatos): no INFORMATION_SCHEMA scan on a steady-state request."""
+    return METADATA_CACHE.obtener(conn)
+
+
+def _load_metadata_uncached(conn):
     """Return dict of tables -> list of columns using INFORMATION_SCHEMA. Also returns list of tables present."""
     q = "SELECT TABLE_NAME, COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s"
     cur = conn.cursor()
@@ -128,6 +175,8 @@ def load_metadata(conn):
         meta.setdefault(table, []).append(col)
     return meta
 
+METADATA_CACHE = cache_metadatos.CacheMetadatos('who_data_viewer', _load_metadata_uncached)
+
 # -------------------- 3. Render UI --------------------
 
 def render_head(title='WHO Analysis'):
@@ -196,8 +245,10 @@ def render_form_page(metadata, error_message=None):
     print('\n'.join(html))
 
 
-def render_results_page(html_table, graph_base64_image, raw_query):
-    """Print results page HTML. Prints Content-Type header too."""
+def render_results_page(html_table, graph_src, raw_query):
+    """Print results page HTML. Prints Content-Type header too.
+    graph_src is the chart URL (see chart_url) or a data: URI.
+    """
     html = [render_head('Resultados')]
     html.append('<div class="card"><a href="?">&larr; Volver</a></div>')
     html.append('<div class="card"><h3>Consulta SQL ejecutada</h3>')
@@ -205,14 +256,15 @@ def render_results_page(html_table, graph_base64_image, raw_query):
     html.append(escape(raw_query))
     html.append('</pre></div>')
 
-    if graph_base64_image:
+    if graph_src:
         html.append('<div class="card"><h3>Gráfico</h3>')
-        html.append(f'<img src="data:image/png;base64,{graph_base64_image}" alt="gráfico" style="max-width:100%">')
+        html.append(f'<img src="{escape(graph_src)}" alt="gráfico" style="max-width:100%">')
         html.append('</div>')
 
     html.append('<div class="card"><h3>Tabla de resultados</h3>')
     html.append(html_table)
     html.append('</div>')
+    html.append(f"<div style='font-size:12px;color:#666'>Caché de resultados: {escape(RESULT_CACHE.resumen())}</div>")
     html.append('</body></html>')
     print('\n'.join(html))
 
@@ -340,11 +392,31 @@ def build_sql_query(selections, metadata):
 
 # -------------------- 6. fetch_data --------------------
 
+RESULT_CACHE = cache_resultados.CacheResultados()
+
+
 def fetch_data(query_string, conn):
-    """Execute query and return pandas DataFrame"""
-    df = pd.read_sql(query_string, conn)
+    """Execute query and return pandas DataFrame.
+    Served from the result cache while the data version (last import) is unchanged."""
+    version = cache_metadatos.version_datos(conn)
+    df = RESULT_CACHE.obtener(query_string, version)
+    if df is None:
+        df = pd.read_sql(query_string, conn)
+        RESULT_CACHE.guardar(query_string, version, df)
     return df
 
+def add_dimension_labels(dataframe):
+    """Add country names / cause descriptions next to code columns, read from the
+    memory-mapped dimension snapshot (no extra queries). No-op without a snapshot."""
+    snapshot = snapshot_dimensiones.cargar() if snapshot_dimensiones else None
+    if snapshot is None or dataframe is None or dataframe.empty:
+        return dataframe
+    try:
+        return snapshot.etiquetar(dataframe)
+    except Exception as e:
+        print(f"Error labelling dimensions: {e}", file=sys.stderr)
+        return dataframe
+
 # -------------------- 7. generate_html_table --------------------
 
 def generate_html_table(dataframe):
@@ -359,6 +431,38 @@ def generate_graph(dataframe, selections):
     """Return base64 PNG string or None.
     selections: has chart_type, x_axis, y_axes
     """
+    png = render_graph_png(dataframe, selections)
+    return base64.b64encode(png).decode('ascii') if png else None
+
+
+def chart_url(dataframe, selections, base=''):
+    """Return the chart URL ('<base>/chart/<key>.png') or None.
+    The key hashes the plotted columns and the chart spec, so an unchanged
+    chart is rendered once and then served from the PNG cache (cache_graficos).
+    If the cache directory is not writable the PNG is inlined as a data: URI.
+    """
+    chart_type = selections.get('chart_type')
+    if not chart_type or chart_type == 'none' or dataframe is None or dataframe.empty:
+        return None
+    x = selections.get('x_axis')
+    ys = selections.get('y_axes') or []
+    # bar/line may pick x from the data and pie may match y by suffix: hash every column then
+    columns = [c for c in [x] + ys if c in dataframe.columns]
+    data = dataframe[list(dict.fromkeys(columns))] if x in dataframe.columns and all(y in dataframe.columns for y in ys) else dataframe
+    spec = {'app': 'who_data_viewer', 'chart_type': chart_type, 'x_axis': x, 'y_axes': ys}
+    key = cache_graficos.clave_grafico(data, spec)
+
+    if not cache_graficos.existe(key):
+        png = render_graph_png(dataframe, selections)
+        if not png:
+            return None
+        if not cache_graficos.guardar(key, png):
+            return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+    return cache_graficos.url_grafico(key, base)
+
+
+def render_graph_png(dataframe, selections):
+    """Return the chart as PNG bytes or None."""
     chart_type = selections.get('chart_type')
     if not chart_type or chart_type == 'none':
         return None
@@ -404,9 +508,7 @@ def generate_graph(dataframe, selections):
         plt.tight_layout()
         plt.savefig(buf, format='png')
         plt.close(fig)
-        buf.seek(0)
-        img_b64 = base64.b64encode(buf.read()).decode('ascii')
-        return img_b64
+        return buf.getvalue()
     except Exception as e:
         plt.close(fig)
         return None
@@ -414,6 +516,12 @@ def generate_graph(dataframe, selections):
 # -------------------- Router / Entrypoints --------------------
 
 def handle_request_cgi():
+    # Charts (viewer.py/chart/<key>.png) come from the PNG cache, no DB needed
+    if os.environ.get('PATH_INFO', '').startswith('/chart/'):
+        cache_graficos.responder_cgi()
+        return
+    conn = None
+    error = None
     try:
         fs = cgi.FieldStorage()
         # Determine GET vs POST
@@ -430,20 +538,28 @@ def handle_request_cgi():
         if err:
             render_form_page(metadata, error_message=err)
             return
-        df = fetch_data(query, conn)
+        df = add_dimension_labels(fetch_data(query, conn))
         html_table = generate_html_table(df)
-        graph_b64 = generate_graph(df, selections)
-        render_results_page(html_table, graph_b64, query)
+        graph_src = chart_url(df, selections, os.environ.get('SCRIPT_NAME', ''))
+        render_results_page(html_table, graph_src, query)
     except Exception as e:
+        error = e
         traceback.print_exc()
         print('Content-Type: text/html; charset=utf-8\n\n')
         print('<pre>')
         print(escape(str(e)))
         print('</pre>')
+    finally:
+        release_connection(conn, error)
 
 
 def application(environ, start_response):
     """WSGI application callable. Returns iterable of bytes."""
+    # Charts: cached PNG with ETag / Cache-Control, no DB connection
+    if environ.get('PATH_INFO', '').startswith('/chart/'):
+        return cache_graficos.aplicacion_wsgi(environ, start_response)
+    conn = None
+    error = None
     try:
         method = environ.get('REQUEST_METHOD', 'GET').upper()
         # parse form with cgi.FieldStorage via environ
@@ -483,9 +599,9 @@ def application(environ, start_response):
         if err:
             start_response('200 OK', [('Content-Type', 'text/html; charset=utf-8')])
             return [f"<html><body><h3>Error: {escape(err)}</h3><a href='.'>Volver</a></body></html>".encode('utf-8')]
-        df = fetch_data(query, conn)
+        df = add_dimension_labels(fetch_data(query, conn))
         html_table = generate_html_table(df)
-        graph_b64 = generate_graph(df, selections)
+        graph_src = chart_url(df, selections, environ.get('SCRIPT_NAME', ''))
         # render results to string
         start_response('200 OK', [('Content-Type', 'text/html; charset=utf-8')])
         out_html = render_head('Resultados')
@@ -494,16 +610,20 @@ def application(environ, start_response):
         out_html += '<pre style="white-space:pre-wrap;max-height:220px;overflow:auto;border:1px solid #eee;padding:8px">'
         out_html += escape(query)
         out_html += '</pre></div>'
-        if graph_b64:
-            out_html += f'<div class="card"><img src="data:image/png;base64,{graph_b64}" style="max-width:100%"></div>'
+        if graph_src:
+            out_html += f'<div class="card"><img src="{escape(graph_src)}" style="max-width:100%"></div>'
         out_html += '<div class="card">' + html_table + '</div>'
+        out_html += f"<div style='font-size:12px;color:#666'>Caché de resultados: {escape(RESULT_CACHE.resumen())}</div>"
         out_html += '</body></html>'
         return [out_html.encode('utf-8')]
 
     except Exception as e:
+        error = e
         start_response('500 Internal Server Error', [('Content-Type', 'text/plain; charset=utf-8')])
         tb = traceback.format_exc()
         return [tb.encode('utf-8')]
+    finally:
+        release_connection(conn, error)
 
 # -------------------- Execute when run as CGI --------------------
 if __name__ == '__main__':
@@ -1,9 +1,29 @@
 import os
+import re
+import io
 import glob
 import csv
+import json
+import hashlib
+import time
+import shutil
+import zipfile
+import zlib
+import tempfile
+import threading
+import contextlib
+import argparse
+import multiprocessing
 import pymysql
 import sys
 
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    # Sin numpy/pandas la importación funciona igual, pero sin validar las filas
+    np = pd = None
+
 # --- 1. CONFIGURACIÓN ---
 
 DB_HOST = 'localhost'
@@ -13,22 +33,914 @@ DB_NAME = ''  # La base de datos que creaste
 DB_PORT = 3306                 # Puerto de MariaDB/MySQL (default: 3306)
 
 # Carpeta donde tienes TODOS los archivos .csv listos
+# (también se leen directamente los .zip tal como los distribuye la OMS,
+# sin necesidad de descomprimirlos)
 CARPETA_CSV = ''
 
+# Separador entre el .zip y el miembro en el nombre de una fuente,
+# ej: 'morticd10_part6.zip::Morticd10_part6'
+SEPARADOR_ZIP = '::'
+
+# Miembros de los .zip que contienen datos de mortalidad (Mortlcd07..09, Morticd10_partN)
+PATRON_MIEMBRO_MORTALIDAD = re.compile(r'^mort[il]cd(0[789]|10_part\d+)(\.csv)?$', re.IGNORECASE)
+
 # Nombre de la tabla de destino para los datos de mortalidad
 TABLE_NAME_MORTALIDAD = 'Mortalidad'
 
+# Tablas de resumen que se recalculan al final de cada importación
+TABLE_NAME_POBLACION = 'Poblacion'
+TABLE_NAME_USO_INTERNET = 'uso_internet'
+TABLE_NAME_RESUMEN_CAUSA = 'Mortalidad_resumen_causa'  # país/año/sexo/causa
+TABLE_NAME_RESUMEN = 'Mortalidad_resumen'              # país/año/sexo (+ población)
+TABLE_NAME_RESUMEN_CAPITULO = 'Mortalidad_resumen_capitulo'  # país/año/sexo/capítulo/bloque CIE-10
+TABLE_NAME_CAUSA_CIE10 = 'Causa_cie10'                 # (List, Cause) -> código, bloque y capítulo
+
+# Tablas en formato largo (una fila por grupo de edad) que se regeneran al final
+TABLE_NAME_MORTALIDAD_EDAD = 'Mortalidad_edad'
+TABLE_NAME_POBLACION_EDAD = 'Poblacion_edad'
+
+# Catálogos contra los que se validan los códigos de país y de causa
+TABLE_NAME_PAISES = 'Paises'
+TABLE_NAME_CAUSAS = 'who_mortality_causes'
+
+# Una fila por importación terminada: MAX(Version) es la versión de los
+# datos con la que las aplicaciones web invalidan sus cachés
+TABLE_NAME_IMPORTACION_ESTADO = 'Importacion_estado'
+
+# Validación de filas en el modo executemany (requiere numpy y pandas).
+# Las filas que no pasan van a '<archivo>.cuarentena.csv' junto a los
+# manifiestos, con el motivo, y el resto del lote se inserta igualmente.
+VALIDAR_FILAS = True
+
+# Diferencia admitida entre Deaths1 y la suma de Deaths2..26
+TOLERANCIA_TOTAL = 0
+
+# Códigos de causa válidos aunque no estén en who_mortality_causes
+# (totales y agregados de las listas de la OMS)
+CAUSAS_EXTRA = {'AAA'}
+
+# Listas cuyos códigos no están en who_mortality_causes (lista condensada
+# 101 de la CIE-10: '1000', '1001'...): sus causas no se comprueban
+LISTAS_SIN_CATALOGO = {'101'}
+
+# Listas de la CIE-10 (las de Mortlcd07/08/09 son CIE-7/8/9: sus códigos,
+# ej. 'A001' o 'B01', coinciden en forma con los de la CIE-10 pero no en
+# significado, así que no se clasifican por capítulo)
+LISTAS_CIE10 = ('101', '103', '104', '10M')
+
 # Tamaño del lote: cuántas filas insertar antes de hacer "commit"
 TAMANO_LOTE = 1000
 
+# Ajuste automático del lote en modo executemany (--ajustar-lote): parte de
+# TAMANO_LOTE y busca el tamaño y la frecuencia de commit más rápidos dentro
+# de estos límites (y sin pasar de max_allowed_packet del servidor)
+AJUSTAR_LOTE = False
+LOTE_MINIMO = 100
+LOTE_MAXIMO = 50000
+LOTES_POR_COMMIT_MAXIMO = 16
+
+# Motor de carga:
+#   'executemany' -> INSERT por lotes de TAMANO_LOTE filas (lento, funciona siempre)
+#   'load_data'   -> LOAD DATA LOCAL INFILE, un archivo por sentencia (minutos en
+#                    vez de horas; requiere local_infile=1 en el servidor)
+MOTOR_CARGA = 'executemany'
+MOTORES_CARGA = ('executemany', 'load_data')
+
+# Columnas que definen una partición para la importación incremental (--delta)
+COLUMNAS_PARTICION = ('Country', 'Year', 'List')
 
-def importar_mortalidad_linea_por_linea(csv_dir, db_config):
+# Carpeta de los manifiestos de progreso (uno .json por archivo importado).
+# Vacío = '.manifiestos_importacion' junto a los archivos de datos.
+# Permiten reanudar una importación interrumpida exactamente donde se quedó.
+CARPETA_MANIFIESTOS = ''
+
+# Número de procesos para importar archivos en paralelo (1 = en serie).
+# Cada proceso abre su propia conexión y carga un archivo completo a la vez.
+NUM_PROCESOS = 1
+
+# Carga masiva con índices diferidos (--indices-diferidos): los índices
+# secundarios se retiran antes de cargar y se reconstruyen al final, y las
+# conexiones de carga desactivan unique_checks y foreign_key_checks.
+INDICES_DIFERIDOS = False
+
+# Informe JSON de cada ejecución (telemetría por archivo y por lote).
+# Vacío = 'informe_AAAAMMDD_HHMMSS.json' en la carpeta de los manifiestos.
+RUTA_INFORME = ''
+
+# Contador de filas compartido entre procesos (sólo en modo paralelo)
+_contador_filas = None
+
+# Telemetría de la ejecución en curso (una instancia por proceso)
+_telemetria = None
+
+# Ajuste automático del lote (una instancia por proceso, sólo con --ajustar-lote)
+_ajuste_lote = None
+
+
+def conectar(db_config, local_infile=False):
     """
-    Importa SÓLO los archivos .csv de mortalidad a la base de datos
-    usando INSERT por lotes (muy lento).
+    Abre una conexión pymysql con la configuración dada. Con
+    db_config['carga_masiva'] la sesión no comprueba claves únicas ni
+    foráneas (las comprobaciones vuelven al reconstruir los índices).
+    """
+    return pymysql.connect(
+        host=db_config['host'],
+        user=db_config['user'],
+        password=db_config['pass'],
+        database=db_config['name'],
+        port=db_config['port'],
+        local_infile=local_infile,
+        init_command=("SET SESSION unique_checks = 0, foreign_key_checks = 0"
+                      if db_config.get('carga_masiva') else None)
+    )
+
+
+def existe_fuente(fuente):
+    """Indica si existe el .csv o el .zip que contiene al miembro."""
+    return os.path.exists(fuente.split(SEPARADOR_ZIP, 1)[0])
+
+
+def abrir_fuente(fuente):
+    """
+    Abre una fuente en modo binario: un .csv normal o un miembro de un .zip
+    ('archivo.zip::miembro'), que se descomprime al vuelo mientras se lee.
+    """
+    if SEPARADOR_ZIP not in fuente:
+        return open(fuente, mode='rb')
+    ruta_zip, miembro = fuente.split(SEPARADOR_ZIP, 1)
+    archivo_zip = zipfile.ZipFile(ruta_zip)
+    try:
+        flujo = archivo_zip.open(miembro)
+    except Exception:
+        archivo_zip.close()
+        raise
+    # El miembro abierto mantiene su propia referencia al .zip hasta que se cierra
+    archivo_zip.close()
+    return flujo
+
+
+def abrir_fuente_texto(fuente):
+    """Abre una fuente como texto UTF-8 listo para csv.reader."""
+    return io.TextIOWrapper(abrir_fuente(fuente), encoding='utf-8', newline='')
+
+
+@contextlib.contextmanager
+def ruta_para_load_data(fuente, desde=0):
+    """
+    Devuelve una ruta de archivo que LOAD DATA LOCAL INFILE pueda leer.
+
+    Para un .csv normal leído desde el principio es la propia ruta. Para un
+    miembro de un .zip, o para leer a partir del byte `desde` (reanudación),
+    se crea un FIFO (tubería con nombre) y un hilo que copia la fuente desde
+    ese byte dentro de él, de modo que los datos van al servidor sin tocar el disco.
+    """
+    if SEPARADOR_ZIP not in fuente and not desde:
+        yield fuente
+        return
+
+    if not hasattr(os, 'mkfifo'):
+        raise RuntimeError("LOAD DATA desde un .zip o reanudando un archivo requiere mkfifo "
+                           "(Linux/macOS). Usa --motor executemany o descomprime el archivo.")
+
+    carpeta_temporal = tempfile.mkdtemp(prefix='whodata_')
+    ruta_fifo = os.path.join(carpeta_temporal, 'datos.csv')
+    os.mkfifo(ruta_fifo)
+
+    def escribir():
+        try:
+            with abrir_fuente(fuente) as origen, open(ruta_fifo, mode='wb') as destino:
+                if desde:
+                    origen.seek(desde)
+                shutil.copyfileobj(origen, destino, 1024 * 1024)
+        except OSError:
+            # El lector cerró la tubería (error en el servidor o carga abortada)
+            pass
+
+    hilo = threading.Thread(target=escribir, daemon=True)
+    hilo.start()
+    try:
+        yield ruta_fifo
+    finally:
+        # Si el servidor nunca llegó a abrir el FIFO, el hilo sigue bloqueado
+        # en open(): lo desbloqueamos abriendo y cerrando el extremo lector,
+        # con lo que su siguiente escritura falla y termina.
+        intentos = 0
+        while hilo.is_alive() and intentos < 50:
+            fd = os.open(ruta_fifo, os.O_RDONLY | os.O_NONBLOCK)
+            os.close(fd)
+            hilo.join(0.1)
+            intentos += 1
+        shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+
+def ruta_manifiesto(fuente):
+    """
+    Ruta del manifiesto de progreso (JSON) de una fuente. Hay un manifiesto
+    por archivo, así los procesos en paralelo nunca escriben el mismo.
+    """
+    ruta_archivo = fuente.split(SEPARADOR_ZIP, 1)[0]
+    carpeta = CARPETA_MANIFIESTOS or os.path.join(os.path.dirname(ruta_archivo), '.manifiestos_importacion')
+    nombre = re.sub(r'[^\w.-]', '_', os.path.basename(ruta_archivo) + fuente[len(ruta_archivo):])
+    return os.path.join(carpeta, nombre + '.json')
+
+
+def leer_manifiesto(fuente):
+    """Devuelve el último punto de control guardado de la fuente, o None."""
+    try:
+        with open(ruta_manifiesto(fuente), mode='r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def guardar_manifiesto(fuente, offset, filas, hash_contenido, completado=False):
+    """
+    Guarda el punto de control de la fuente: bytes consumidos, filas ya
+    confirmadas (commit) y SHA-256 de esos bytes. La escritura es atómica
+    (archivo temporal + os.replace) para que un corte nunca lo deje a medias.
+    """
+    ruta = ruta_manifiesto(fuente)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    datos = {
+        'fuente': fuente,
+        'offset': offset,
+        'filas': filas,
+        'sha256': hash_contenido,
+        'completado': completado,
+        'actualizado': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    ruta_temporal = ruta + '.tmp'
+    with open(ruta_temporal, mode='w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=2)
+    os.replace(ruta_temporal, ruta)
+
+
+def borrar_manifiesto(fuente):
+    """Elimina el punto de control de la fuente (para empezar de cero)."""
+    try:
+        os.remove(ruta_manifiesto(fuente))
+    except FileNotFoundError:
+        pass
+
+
+def _hash_hasta(f, hasher, hasta=None):
+    """Lee f desde su posición actual hasta el byte `hasta` (o hasta el final) actualizando el hash."""
+    leidos = 0
+    while hasta is None or leidos < hasta:
+        tamano = 1024 * 1024 if hasta is None else min(1024 * 1024, hasta - leidos)
+        bloque = f.read(tamano)
+        if not bloque:
+            break
+        hasher.update(bloque)
+        leidos += len(bloque)
+    return leidos
+
+
+def preparar_reanudacion(fuente):
+    """
+    Comprueba el manifiesto de la fuente contra su contenido actual.
+
+    Devuelve None si no hay punto de control, o un dict con 'offset', 'filas',
+    'completado' y 'hasher' (el SHA-256 ya calculado sobre los bytes
+    confirmados, listo para seguir actualizándose). Lanza ValueError si el
+    archivo cambió desde el punto de control: las filas ya confirmadas no
+    corresponden al contenido actual y reanudar duplicaría o mezclaría datos.
+    """
+    manifiesto = leer_manifiesto(fuente)
+    if not manifiesto:
+        return None
+
+    hasher = hashlib.sha256()
+    with abrir_fuente(fuente) as f:
+        leidos = _hash_hasta(f, hasher, manifiesto['offset'])
+        # Un archivo completado debe terminar exactamente donde terminó la carga
+        if manifiesto['completado'] and f.read(1):
+            leidos = -1
+
+    if leidos != manifiesto['offset'] or hasher.hexdigest() != manifiesto['sha256']:
+        raise ValueError(
+            f"El archivo cambió desde el último punto de control ({manifiesto['filas']} filas "
+            f"ya importadas el {manifiesto['actualizado']}). Borra esas filas y su manifiesto "
+            f"('{ruta_manifiesto(fuente)}') o ejecuta con --reiniciar."
+        )
+
+    return {
+        'offset': manifiesto['offset'],
+        'filas': manifiesto['filas'],
+        'completado': manifiesto['completado'],
+        'hasher': hasher,
+    }
+
+
+def limpiar_fila(row):
+    """
+    Recorta los espacios de cada valor y convierte los vacíos en None (NULL).
+    Los códigos quedan sin espacios para poder filtrar sin TRIM(), y año y
+    sexo llegan como enteros limpios a sus columnas SMALLINT / TINYINT.
+    """
+    return [val.strip() or None for val in row]
+
+
+def ruta_cuarentena(fuente):
+    """Ruta del .csv de cuarentena de una fuente (junto a su manifiesto)."""
+    return ruta_manifiesto(fuente)[:-len('.json')] + '.cuarentena.csv'
+
+
+# Marcas de la CIE-10 que no aparecen en los archivos de la OMS: punto
+# decimal, daga (etiología) y asterisco (manifestación): 'A17.0†' -> 'A170'
+MARCAS_CAUSA = ('.', '†', '*')
+
+
+def normalizar_causa(codigo):
+    """Código de causa como en los archivos de la OMS (sin espacios ni MARCAS_CAUSA)."""
+    codigo = str(codigo or '').strip()
+    for marca in MARCAS_CAUSA:
+        codigo = codigo.replace(marca, '')
+    return codigo
+
+
+def cargar_codigos_conocidos(cursor):
+    """
+    Devuelve (países, causas) conocidos según Paises y who_mortality_causes,
+    con las causas sin puntos ni daga/asterisco ('A17.0†' -> 'A170') como en
+    los archivos de la OMS. Un catálogo que no existe o está vacío devuelve
+    un conjunto vacío y esa comprobación no se aplica.
+    """
+    sql_causa = 'TRIM(short_code)'
+    for marca in MARCAS_CAUSA:
+        sql_causa = f"REPLACE({sql_causa}, '{marca}', '')"
+    codigos = []
+    for sql, normalizar in ((f"SELECT DISTINCT TRIM(Codigo_Pais) FROM {TABLE_NAME_PAISES}", str.strip),
+                            (f"SELECT DISTINCT {sql_causa} FROM {TABLE_NAME_CAUSAS}", normalizar_causa)):
+        try:
+            cursor.execute(sql)
+            codigos.append({normalizar(fila[0]) for fila in cursor.fetchall() if fila[0]} - {''})
+        except pymysql.err.MySQLError:
+            codigos.append(set())
+    return tuple(codigos)
+
+
+def validar_lote(filas, cabecera, paises=frozenset(), causas=frozenset()):
+    """
+    Valida un lote de filas (ya pasadas por limpiar_fila) de forma vectorizada
+    con pandas. Devuelve (filas_validas, filas_en_cuarentena), donde cada fila
+    en cuarentena lleva el motivo como último valor:
+
+    - 'columnas': número de columnas distinto al de la cabecera.
+    - 'muertes_no_numericas': algún Deaths/IM_Deaths no es un entero >= 0.
+    - 'total_no_cuadra': Deaths1 no es la suma de Deaths2..26 (sólo si la fila
+      trae algún grupo de edad; con Frmat 09 sólo hay total).
+    - 'pais_desconocido' / 'causa_desconocida': código fuera del catálogo. Una
+      causa de 4 caracteres también vale si su categoría de 3 está en él; las
+      de LISTAS_SIN_CATALOGO no se comprueban.
+    """
+    num_cols = len(cabecera)
+    completas = [fila for fila in filas if len(fila) == num_cols]
+    malas = [fila + ['columnas'] for fila in filas if len(fila) != num_cols]
+    if not completas:
+        return [], malas
+
+    df = pd.DataFrame(completas, columns=range(num_cols), dtype=object)
+    nombres = [col.lower() for col in cabecera]
+    cols_muertes = [i for i, col in enumerate(nombres) if col.startswith(('deaths', 'im_deaths'))]
+    cols_grupos = [nombres.index(f'deaths{i}') for i in range(2, 27) if f'deaths{i}' in nombres]
+
+    texto = df[cols_muertes]
+    muertes = texto.apply(pd.to_numeric, errors='coerce')
+    no_numericas = ((texto.notna() & muertes.isna()) | (muertes < 0) | ((muertes % 1).fillna(0) != 0)).any(axis=1)
+
+    if 'deaths1' in nombres and cols_grupos:
+        total = muertes[nombres.index('deaths1')]
+        grupos = muertes[cols_grupos]
+        con_grupos = grupos.notna().any(axis=1) & total.notna()
+        total_no_cuadra = con_grupos & ((total - grupos.sum(axis=1)).abs() > TOLERANCIA_TOTAL)
+    else:
+        total_no_cuadra = pd.Series(False, index=df.index)
+
+    pais_desconocido = pd.Series(False, index=df.index)
+    if paises and 'country' in nombres:
+        pais_desconocido = ~df[nombres.index('country')].isin(paises)
+
+    causa_desconocida = pd.Series(False, index=df.index)
+    if causas and 'cause' in nombres:
+        causa = df[nombres.index('cause')].fillna('')
+        causa_desconocida = ~(causa.isin(causas) | causa.str[:3].isin(causas) | causa.isin(CAUSAS_EXTRA))
+        if 'list' in nombres:
+            causa_desconocida &= ~df[nombres.index('list')].isin(LISTAS_SIN_CATALOGO)
+
+    motivos = np.select(
+        [no_numericas.to_numpy(), total_no_cuadra.to_numpy(),
+         pais_desconocido.to_numpy(), causa_desconocida.to_numpy()],
+        ['muertes_no_numericas', 'total_no_cuadra', 'pais_desconocido', 'causa_desconocida'],
+        default='',
+    )
+    validas = [completas[i] for i in np.flatnonzero(motivos == '')]
+    malas += [completas[i] + [motivos[i]] for i in np.flatnonzero(motivos != '')]
+    return validas, malas
+
+
+def guardar_cuarentena(fuente, cabecera, filas):
+    """Añade filas rechazadas (con su motivo) al .csv de cuarentena de la fuente."""
+    ruta = ruta_cuarentena(fuente)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    nuevo = not os.path.exists(ruta)
+    with open(ruta, mode='a', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if nuevo:
+            writer.writerow(cabecera + ['motivo'])
+        writer.writerows(['' if val is None else val for val in fila] for fila in filas)
+
+
+def cargar_archivo_executemany(connection, cursor, csv_path, table_name, reanudacion=None):
+    """
+    Inserta un archivo .csv con executemany en lotes de TAMANO_LOTE filas,
+    haciendo commit tras cada lote (con --ajustar-lote, el tamaño y cada
+    cuántos lotes se hace commit los decide AjusteLote). Tras cada commit se guarda un punto de
+    control (offset, filas y hash) y, si se indica `reanudacion`, se continúa
+    desde el último punto guardado. Con VALIDAR_FILAS cada lote pasa antes por
+    validar_lote() y las filas rechazadas van a cuarentena.
+    Devuelve el número de filas insertadas.
+    """
+    hasher = reanudacion['hasher'] if reanudacion else hashlib.sha256()
+    filas_previas = reanudacion['filas'] if reanudacion else 0
+
+    # 'utf-8' es estándar, pero si falla, prueba 'latin-1'
+    # (se lee en binario para poder llevar la cuenta exacta de bytes)
+    with abrir_fuente(csv_path) as f:
+
+        # Leemos la cabecera para saber el número de columnas
+        linea_cabecera = f.readline()
+        header = next(csv.reader([linea_cabecera.decode('utf-8')]))
+        num_cols = len(header)
+
+        if reanudacion:
+            f.seek(reanudacion['offset'])
+            offset = reanudacion['offset']
+            print(f"   (Reanudando tras {filas_previas} filas ya importadas, byte {offset})")
+        else:
+            hasher.update(linea_cabecera)
+            offset = len(linea_cabecera)
+
+        # Creamos el query de INSERT usando la variable table_name
+        placeholders = ', '.join(['%s'] * num_cols)
+        sql_insert = f"INSERT INTO {table_name} VALUES ({placeholders})"
+
+        print(f"   (Query: INSERT INTO {table_name} VALUES (...) con {num_cols} columnas)")
+
+        validar = VALIDAR_FILAS and pd is not None
+        if validar:
+            paises, causas = cargar_codigos_conocidos(cursor)
+        elif VALIDAR_FILAS:
+            print("   (Validación desactivada: instala numpy y pandas para activarla)")
+
+        ajuste = _ajuste_lote
+        if ajuste is not None:
+            ajuste.preparar(cursor)
+            inicio_historial = len(ajuste.historial)
+
+        lineas_en_lote = []
+        contador_total = 0
+        contador_cuarentena = 0
+        lotes_sin_commit = 0
+
+        def insertar_lote(lineas, ultimo=False):
+            nonlocal offset, contador_total, contador_cuarentena, lotes_sin_commit
+            t0 = time.perf_counter()
+            filas_en_lote = []
+            for row in csv.reader(linea.decode('utf-8') for linea in lineas):
+                if not row:
+                    continue
+                filas_en_lote.append(limpiar_fila(row))
+
+            t1 = time.perf_counter()
+            if validar:
+                filas_en_lote, rechazadas = validar_lote(filas_en_lote, header, paises, causas)
+                if rechazadas:
+                    guardar_cuarentena(csv_path, header, rechazadas)
+                    contador_cuarentena += len(rechazadas)
+
+            t2 = time.perf_counter()
+            if filas_en_lote:
+                cursor.executemany(sql_insert, filas_en_lote)
+            t3 = time.perf_counter()
+            lotes_sin_commit += 1
+            hacer_commit = ultimo or ajuste is None or lotes_sin_commit >= ajuste.lotes_por_commit
+            if hacer_commit:
+                connection.commit()
+            t4 = time.perf_counter()
+            if _telemetria is not None:
+                _telemetria.lote(csv_path, len(filas_en_lote), parseo=t1 - t0, validacion=t2 - t1,
+                                 insercion=t3 - t2, commit=t4 - t3)
+
+            bytes_lote = 0
+            for linea in lineas:
+                hasher.update(linea)
+                bytes_lote += len(linea)
+            offset += bytes_lote
+            contador_total += len(filas_en_lote)
+            _sumar_progreso(len(filas_en_lote))
+            if hacer_commit:
+                # El punto de control cubre todos los lotes confirmados en este commit
+                guardar_manifiesto(csv_path, offset, filas_previas + contador_total, hasher.hexdigest())
+                lotes_sin_commit = 0
+            if ajuste is not None:
+                ajuste.registrar(len(filas_en_lote), bytes_lote, t4 - t0)
+
+        for linea in f:
+            lineas_en_lote.append(linea)
+
+            if len(lineas_en_lote) >= (ajuste.tamano if ajuste is not None else TAMANO_LOTE):
+                # Ejecutar el lote
+                insertar_lote(lineas_en_lote)
+                lineas_en_lote = []
+                if _contador_filas is None:
+                    print(f"   ... {filas_previas + contador_total} filas insertadas.", end='\r')
+
+        # Insertar el último lote restante (o confirmar los lotes aún sin commit)
+        if lineas_en_lote or lotes_sin_commit:
+            insertar_lote(lineas_en_lote, ultimo=True)
+
+    if ajuste is not None:
+        estado = ajuste.estado(desde=inicio_historial)
+        print(f"   (Ajuste de lote: {estado['tamano_lote']} filas, commit cada "
+              f"{estado['lotes_por_commit']} lotes{', estable' if estado['estable'] else ''})")
+        if _telemetria is not None:
+            _telemetria.ajuste_lote(csv_path, estado)
+
+    if contador_cuarentena:
+        print(f"   -> {contador_cuarentena} filas no válidas enviadas a '{ruta_cuarentena(csv_path)}'")
+
+    guardar_manifiesto(csv_path, offset, filas_previas + contador_total, hasher.hexdigest(), completado=True)
+    return contador_total
+
+
+def cargar_archivo_load_data(connection, cursor, csv_path, table_name, reanudacion=None):
+    """
+    Carga un archivo .csv completo con LOAD DATA LOCAL INFILE.
+
+    Las columnas se leen en variables de usuario y se asignan por posición
+    (igual que el INSERT ... VALUES del modo executemany), aplicando
+    NULLIF(TRIM(@cN), '') igual que limpiar_fila(): valores recortados y
+    campos vacíos como NULL (el servidor convierte año y sexo a sus tipos).
+    La carga es una sola transacción; si se reanuda un archivo que quedó a
+    medias con executemany, se lee desde el byte del manifiesto (las filas
+    en cuarentena y las líneas vacías no cuentan en 'filas', así que saltar
+    líneas por ese número volvería a insertar filas ya confirmadas).
+    Devuelve el número de filas cargadas.
+    """
+    cursor.execute(f"SHOW COLUMNS FROM {table_name}")
+    columnas_tabla = [fila[0] for fila in cursor.fetchall()]
+
+    with abrir_fuente(csv_path) as f:
+        linea_cabecera = f.readline()
+    header = next(csv.reader([linea_cabecera.decode('utf-8')]))
+    num_cols = len(header)
+
+    if num_cols != len(columnas_tabla):
+        raise ValueError(
+            f"El archivo tiene {num_cols} columnas y la tabla '{table_name}' "
+            f"tiene {len(columnas_tabla)}."
+        )
+
+    # Los CSV de la OMS vienen con fin de línea Windows (\r\n)
+    fin_linea = '\\r\\n' if linea_cabecera.endswith(b'\r\n') else '\\n'
+
+    filas_previas = reanudacion['filas'] if reanudacion else 0
+    desde = reanudacion['offset'] if reanudacion else 0
+    if desde:
+        print(f"   (Reanudando tras {filas_previas} filas ya importadas, byte {desde})")
+
+    variables = [f"@c{i}" for i in range(num_cols)]
+    asignaciones = [
+        f"`{col}` = NULLIF(TRIM({var}), '')" for col, var in zip(columnas_tabla, variables)
+    ]
+    sql_load = (
+        f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} "
+        f"CHARACTER SET utf8mb4 "
+        f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+        f"LINES TERMINATED BY '{fin_linea}' "
+        f"IGNORE {0 if desde else 1} LINES "
+        f"({', '.join(variables)}) "
+        f"SET {', '.join(asignaciones)}"
+    )
+
+    print(f"   (Query: LOAD DATA LOCAL INFILE ... INTO TABLE {table_name} con {num_cols} columnas)")
+
+    # Reanudando, el offset ya está detrás de la cabecera: no se salta ninguna línea
+    with ruta_para_load_data(csv_path, desde) as ruta:
+        t0 = time.perf_counter()
+        contador_total = cursor.execute(sql_load, (ruta,))
+    t1 = time.perf_counter()
+    connection.commit()
+    if _telemetria is not None:
+        # Todo el archivo es un único lote: el servidor parsea e inserta a la vez
+        _telemetria.lote(csv_path, contador_total, insercion=t1 - t0, commit=time.perf_counter() - t1)
+    _sumar_progreso(contador_total)
+
+    # Hash del contenido completo para el manifiesto (continúa el ya verificado)
+    hasher = reanudacion['hasher'] if reanudacion else hashlib.sha256()
+    with abrir_fuente(csv_path) as f:
+        if reanudacion:
+            f.seek(reanudacion['offset'])
+        offset = (reanudacion['offset'] if reanudacion else 0) + _hash_hasta(f, hasher)
+    guardar_manifiesto(csv_path, offset, filas_previas + contador_total, hasher.hexdigest(), completado=True)
+    return contador_total
+
+
+CARGADORES = {
+    'executemany': cargar_archivo_executemany,
+    'load_data': cargar_archivo_load_data,
+}
+
+
+def importar_fuente(connection, cursor, fuente, table_name, motor, reanudar=True):
+    """
+    Importa una fuente completa con el motor indicado, respetando su punto
+    de control. Devuelve las filas importadas en esta ejecución, o None si
+    el archivo ya estaba completo según su manifiesto.
+    """
+    if not reanudar:
+        borrar_manifiesto(fuente)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(ruta_cuarentena(fuente))
+        reanudacion = None
+    else:
+        reanudacion = preparar_reanudacion(fuente)
+
+    if reanudacion and reanudacion['completado']:
+        print(f"   -> Ya importado por completo ({reanudacion['filas']} filas), saltando.")
+        return None
+
+    return CARGADORES[motor](connection, cursor, fuente, table_name, reanudacion)
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) con interpolación lineal; 0.0 si no hay valores."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+class Telemetria:
+    """
+    Mediciones de una ejecución del importador, por archivo y por lote:
+    tiempos de parseo, validación, inserción y commit de cada lote, filas/s
+    y percentiles de latencia. Al final se vuelca en un informe JSON
+    (ver guardar()) para comparar el rendimiento entre versiones.
+
+    En modo paralelo cada proceso lleva su propia instancia y devuelve los
+    datos de su archivo (datos_archivo()), que el proceso principal
+    incorpora con fusionar().
+    """
+
+    FASES_LOTE = ('parseo', 'validacion', 'insercion', 'commit')
+
+    def __init__(self, **parametros):
+        self.inicio = time.time()
+        self.parametros = parametros
+        self.archivos = {}
+        self.fases = {}
+
+    def _archivo(self, fuente):
+        return self.archivos.setdefault(os.path.basename(fuente), {
+            'fuente': fuente, 'filas': 0, 'segundos': 0.0, 'error': None, 'lotes': [],
+        })
+
+    def lote(self, fuente, filas, **tiempos):
+        """Registra un lote: filas y segundos de cada fase (parseo, insercion, commit...)."""
+        self._archivo(fuente)['lotes'].append(
+            {'filas': filas, **{fase: tiempos.get(fase, 0.0) for fase in self.FASES_LOTE}}
+        )
+
+    def archivo(self, fuente, filas, segundos, error=None):
+        """Registra el resultado de un archivo completo."""
+        datos = self._archivo(fuente)
+        datos.update(filas=filas, segundos=segundos, error=error)
+
+    def ajuste_lote(self, fuente, estado):
+        """Registra los valores que eligió AjusteLote para el archivo."""
+        self._archivo(fuente)['ajuste_lote'] = estado
+
+    def fase(self, nombre, segundos):
+        """Registra la duración de una fase global (índices, resúmenes...)."""
+        self.fases[nombre] = self.fases.get(nombre, 0.0) + segundos
+
+    def datos_archivo(self, fuente):
+        return self.archivos.get(os.path.basename(fuente))
+
+    def fusionar(self, datos):
+        if datos:
+            self.archivos[os.path.basename(datos['fuente'])] = datos
+
+    @staticmethod
+    def resumir(datos):
+        """Estadísticas de un archivo: filas/s, tiempo por fase y latencia por lote (ms)."""
+        lotes = datos['lotes']
+        latencias = [sum(l[fase] for fase in Telemetria.FASES_LOTE) * 1000 for l in lotes]
+        return {
+            'fuente': datos['fuente'],
+            'filas': datos['filas'],
+            'segundos': round(datos['segundos'], 3),
+            'filas_por_segundo': round(datos['filas'] / datos['segundos'], 1) if datos['segundos'] > 0 else 0,
+            'error': datos['error'],
+            'lotes': len(lotes),
+            'ajuste_lote': datos.get('ajuste_lote'),
+            'segundos_por_fase': {fase: round(sum(l[fase] for l in lotes), 3) for fase in Telemetria.FASES_LOTE},
+            'latencia_lote_ms': {
+                'p50': round(percentil(latencias, 50), 2),
+                'p95': round(percentil(latencias, 95), 2),
+                'p99': round(percentil(latencias, 99), 2),
+                'max': round(max(latencias), 2) if latencias else 0.0,
+            },
+        }
+
+    def informe(self):
+        archivos = [self.resumir(datos) for datos in self.archivos.values()]
+        filas = sum(a['filas'] for a in archivos)
+        segundos = time.time() - self.inicio
+        latencias = [sum(l[fase] for fase in self.FASES_LOTE) * 1000
+                     for datos in self.archivos.values() for l in datos['lotes']]
+        return {
+            'inicio': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.inicio)),
+            'segundos': round(segundos, 3),
+            'parametros': self.parametros,
+            'total': {
+                'archivos': len(archivos),
+                'con_error': sum(1 for a in archivos if a['error']),
+                'filas': filas,
+                'filas_por_segundo': round(filas / segundos, 1) if segundos > 0 else 0,
+                'latencia_lote_ms': {p: round(percentil(latencias, n), 2)
+                                     for p, n in (('p50', 50), ('p95', 95), ('p99', 99))},
+            },
+            'fases': {nombre: round(seg, 3) for nombre, seg in self.fases.items()},
+            'archivos': archivos,
+        }
+
+    def guardar(self, ruta):
+        """Escribe el informe JSON y muestra el resumen de latencias."""
+        informe = self.informe()
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(ruta, mode='w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        total = informe['total']
+        print(f"\n-> Informe de la ejecución en '{ruta}'")
+        print(f"   {total['filas']} filas, {total['filas_por_segundo']:,.0f} filas/s | latencia por lote "
+              f"p50 {total['latencia_lote_ms']['p50']:.1f} ms, p95 {total['latencia_lote_ms']['p95']:.1f} ms, "
+              f"p99 {total['latencia_lote_ms']['p99']:.1f} ms")
+        return informe
+
+
+class AjusteLote:
+    """
+    Ajuste automático del tamaño de lote del modo executemany (--ajustar-lote).
+
+    Mide las filas/s de cada ventana de lotes y sube o baja el parámetro en
+    curso mientras mejore (búsqueda por escalada): primero las filas por
+    lote y después cada cuántos lotes se hace commit. Cuando un cambio no
+    mejora, vuelve al mejor valor, invierte el sentido y reduce el paso;
+    con el paso ya mínimo el parámetro queda fijo. Con los dos fijos el
+    ajuste está estable y no cambia más.
+
+    Un lote nunca supera max_allowed_packet del servidor: el tamaño máximo se
+    calcula con los bytes por fila observados, y executemany envía cada lote
+    en una sola sentencia.
+    """
+
+    # Cambio mínimo de filas/s que cuenta como mejora (evita seguir el ruido)
+    MEJORA_MINIMA = 0.05
+    # Margen sobre max_allowed_packet y bytes de SQL por cada byte del CSV
+    MARGEN_PAQUETE = 0.8
+    EXPANSION_SQL = 1.5
+
+    def __init__(self, inicial=TAMANO_LOTE, minimo=LOTE_MINIMO, maximo=LOTE_MAXIMO,
+                 max_lotes_por_commit=LOTES_POR_COMMIT_MAXIMO, lotes_por_ventana=3):
+        self.tamano = inicial
+        self.lotes_por_commit = 1
+        self.limites = {'tamano': (minimo, maximo), 'lotes_por_commit': (1, max_lotes_por_commit)}
+        self.lotes_por_ventana = lotes_por_ventana
+        self.bytes_paquete = None
+        self.bytes_por_fila = None
+        self.historial = []
+        self._pendientes = ['tamano', 'lotes_por_commit']
+        self._reiniciar_busqueda()
+
+    @property
+    def estable(self):
+        return not self._pendientes
+
+    def _reiniciar_busqueda(self):
+        self._paso = 2.0
+        self._sentido = 1
+        self._mejor = None
+        self._ventana = []
+
+    def preparar(self, cursor):
+        """Lee max_allowed_packet y hace que executemany envíe cada lote en una sola sentencia."""
+        if self.bytes_paquete is None:
+            cursor.execute("SELECT @@max_allowed_packet")
+            self.bytes_paquete = int(cursor.fetchone()[0])
+        cursor.max_stmt_length = int(self.bytes_paquete * self.MARGEN_PAQUETE)
+
+    def _maximo(self, parametro):
+        minimo, maximo = self.limites[parametro]
+        if parametro == 'tamano' and self.bytes_paquete and self.bytes_por_fila:
+            por_paquete = self.bytes_paquete * self.MARGEN_PAQUETE / (self.bytes_por_fila * self.EXPANSION_SQL)
+            maximo = max(minimo, min(maximo, int(por_paquete)))
+        return maximo
+
+    def registrar(self, filas, bytes_lote, segundos):
+        """Registra un lote (filas, bytes del CSV y segundos incluido el commit) y ajusta si toca."""
+        if filas:
+            por_fila = bytes_lote / filas
+            self.bytes_por_fila = por_fila if self.bytes_por_fila is None else 0.8 * self.bytes_por_fila + 0.2 * por_fila
+        self.tamano = min(self.tamano, self._maximo('tamano'))
+        if self.estable:
+            return
+
+        self._ventana.append((filas, segundos))
+        # La ventana cubre al menos dos commits para medir también su coste
+        if len(self._ventana) < max(self.lotes_por_ventana, 2 * self.lotes_por_commit):
+            return
+        total_filas = sum(f for f, _ in self._ventana)
+        total_segundos = sum(s for _, s in self._ventana)
+        self._ventana = []
+        if total_segundos <= 0:
+            return
+        self._ajustar(total_filas / total_segundos)
+
+    def _ajustar(self, rendimiento):
+        parametro = self._pendientes[0]
+        valor = getattr(self, parametro)
+        self.historial.append({'tamano': self.tamano, 'lotes_por_commit': self.lotes_por_commit,
+                               'filas_por_segundo': round(rendimiento, 1)})
+
+        if self._mejor is None or rendimiento > self._mejor[0] * (1 + self.MEJORA_MINIMA):
+            self._mejor = (rendimiento, valor)
+        else:
+            # No mejora: volver al mejor valor, cambiar de sentido y afinar el paso
+            valor = self._mejor[1]
+            self._sentido = -self._sentido
+            self._paso = self._paso ** 0.5
+
+        if self._paso < 1.1:
+            self._fijar(parametro)
+            return
+        nuevo = self._mover(parametro, valor)
+        if nuevo == valor:
+            # En el límite en este sentido: probar el contrario
+            self._sentido = -self._sentido
+            nuevo = self._mover(parametro, valor)
+            if nuevo == valor:
+                self._fijar(parametro)
+                return
+        setattr(self, parametro, nuevo)
+
+    def _mover(self, parametro, valor):
+        minimo = self.limites[parametro][0]
+        return max(minimo, min(self._maximo(parametro), round(valor * self._paso ** self._sentido)))
+
+    def _fijar(self, parametro):
+        """El parámetro queda en su mejor valor y se pasa al siguiente."""
+        setattr(self, parametro, self._mejor[1])
+        self._pendientes.pop(0)
+        self._reiniciar_busqueda()
+
+    def estado(self, desde=0):
+        """Valores elegidos y mediciones (desde la posición `desde` del historial) para el informe."""
+        return {
+            'tamano_lote': self.tamano,
+            'lotes_por_commit': self.lotes_por_commit,
+            'estable': self.estable,
+            'max_allowed_packet': self.bytes_paquete,
+            'bytes_por_fila': round(self.bytes_por_fila or 0, 1),
+            'historial': self.historial[desde:],
+        }
+
+
+def _medir_fase(nombre, inicio):
+    """Suma a la telemetría de la ejecución los segundos desde `inicio`."""
+    if _telemetria is not None:
+        _telemetria.fase(nombre, time.perf_counter() - inicio)
+
+
+def _sumar_progreso(filas):
+    """Suma filas al contador compartido cuando se importa en paralelo."""
+    if _contador_filas is not None:
+        with _contador_filas.get_lock():
+            _contador_filas.value += filas
+
+
+def listar_archivos_mortalidad(csv_dir):
+    """
+    Devuelve el mapeo {fuente: tabla destino} de los datos de mortalidad.
+    Una fuente es un .csv o un miembro de un .zip ('archivo.zip::miembro').
     """
-    print("Iniciando conexión con la base de datos...")
-    
     # Mapeo de archivos CSV a la tabla de mortalidad
     # Usamos la variable de la configuración
     mapeo_archivos_tabla = {
@@ -42,21 +954,287 @@ def importar_mortalidad_linea_por_linea(csv_dir, db_config):
     archivos_mort10 = glob.glob(os.path.join(csv_dir, 'Morticd10_part*.csv'))
     if not archivos_mort10:
         archivos_mort10 = glob.glob(os.path.join(csv_dir, 'morticd10_part*.csv'))
-        
-    for f in archivos_mort10:
+
+    for f in sorted(archivos_mort10):
         mapeo_archivos_tabla[os.path.basename(f)] = TABLE_NAME_MORTALIDAD
-        
-    if not archivos_mort10:
-        print("Advertencia: No se encontraron archivos 'Morticd10_part*.csv'.")
 
+    # Miembros de los .zip distribuidos por la OMS (se leen sin descomprimir).
+    # Si el mismo archivo ya existe descomprimido en la carpeta, se usa ese.
+    ya_presentes = {os.path.splitext(nombre)[0].lower() for nombre in mapeo_archivos_tabla
+                    if os.path.exists(os.path.join(csv_dir, nombre))}
+    miembros_zip = []
+    for ruta_zip in sorted(glob.glob(os.path.join(csv_dir, '*.zip'))):
+        try:
+            with zipfile.ZipFile(ruta_zip) as archivo_zip:
+                nombres = archivo_zip.namelist()
+        except zipfile.BadZipFile:
+            print(f"Advertencia: '{os.path.basename(ruta_zip)}' no es un .zip válido, saltando.")
+            continue
+        for miembro in nombres:
+            base = os.path.basename(miembro)
+            if not PATRON_MIEMBRO_MORTALIDAD.match(base):
+                continue
+            if os.path.splitext(base)[0].lower() in ya_presentes:
+                continue
+            ya_presentes.add(os.path.splitext(base)[0].lower())
+            fuente = f"{os.path.basename(ruta_zip)}{SEPARADOR_ZIP}{miembro}"
+            mapeo_archivos_tabla[fuente] = TABLE_NAME_MORTALIDAD
+            miembros_zip.append(fuente)
+
+    if not archivos_mort10 and not miembros_zip:
+        print("Advertencia: No se encontraron archivos 'Morticd10_part*.csv' ni .zip con esos datos.")
+
+    return mapeo_archivos_tabla
+
+
+def _inicializar_worker(contador, con_telemetria=False, con_ajuste_lote=False):
+    """Inicializador de cada proceso del pool: guarda el contador compartido."""
+    global _contador_filas, _telemetria, _ajuste_lote
+    _contador_filas = contador
+    _telemetria = Telemetria() if con_telemetria else None
+    _ajuste_lote = AjusteLote() if con_ajuste_lote else None
+
+
+def _importar_archivo_en_worker(tarea):
+    """
+    Importa un archivo completo dentro de un proceso del pool, con su propia
+    conexión. Devuelve (archivo, filas, segundos, error, telemetría del archivo).
+    """
+    csv_path_full, csv_file, table_name, db_config, motor, reanudar = tarea
+    inicio = time.perf_counter()
     try:
-        connection = pymysql.connect(
-            host=db_config['host'],
-            user=db_config['user'],
-            password=db_config['pass'],
-            database=db_config['name'],
-            port=db_config['port']
-        )
+        connection = conectar(db_config, local_infile=(motor == 'load_data'))
+    except Exception as e:
+        return csv_file, 0, 0.0, f"No se pudo conectar: {e}", None
+
+    try:
+        with connection.cursor() as cursor:
+            contador_total = importar_fuente(connection, cursor, csv_path_full, table_name, motor, reanudar)
+        resultado = csv_file, contador_total or 0, time.perf_counter() - inicio, None
+    except Exception as e:
+        connection.rollback() # Revertir cualquier lote parcial
+        resultado = csv_file, 0, time.perf_counter() - inicio, str(e)
+    finally:
+        connection.close()
+
+    if _telemetria is None:
+        return resultado + (None,)
+    _telemetria.archivo(csv_path_full, resultado[1], resultado[2], resultado[3])
+    return resultado + (_telemetria.datos_archivo(csv_path_full),)
+
+
+def importar_en_paralelo(csv_dir, db_config, mapeo_archivos_tabla, motor, procesos, reanudar=True):
+    """
+    Reparte los archivos entre `procesos` procesos (una conexión por proceso)
+    y muestra el progreso agregado de filas importadas.
+    Devuelve la lista de resultados (archivo, filas, segundos, error, telemetría).
+    """
+    tareas = []
+    for csv_file, table_name in mapeo_archivos_tabla.items():
+        csv_path_full = os.path.join(csv_dir, csv_file)
+        if not existe_fuente(csv_path_full):
+            print(f"-> Archivo no encontrado, saltando: '{csv_file}'")
+            continue
+        tareas.append((csv_path_full, csv_file, table_name, db_config, motor, reanudar))
+
+    if not tareas:
+        return []
+
+    procesos = min(procesos, len(tareas))
+    print(f"Importando {len(tareas)} archivos con {procesos} procesos en paralelo...")
+
+    contador = multiprocessing.Value('q', 0)
+    inicio = time.perf_counter()
+    resultados = []
+
+    with multiprocessing.Pool(procesos, initializer=_inicializar_worker,
+                              initargs=(contador, _telemetria is not None,
+                                        _ajuste_lote is not None)) as pool:
+        pendientes = [pool.apply_async(_importar_archivo_en_worker, (t,)) for t in tareas]
+        while not all(p.ready() for p in pendientes):
+            transcurrido = time.perf_counter() - inicio
+            terminados = sum(p.ready() for p in pendientes)
+            filas = contador.value
+            print(f"   ... {filas} filas importadas, {terminados}/{len(tareas)} archivos "
+                  f"({filas / transcurrido if transcurrido > 0 else 0:,.0f} filas/s)", end='\r')
+            # Esperar como mucho 1 s al siguiente archivo pendiente
+            next(p for p in pendientes if not p.ready()).wait(1)
+        resultados = [p.get() for p in pendientes]
+
+    duracion_total = time.perf_counter() - inicio
+    total_filas = sum(r[1] for r in resultados)
+    print()
+    for csv_file, filas, duracion, error, datos_telemetria in resultados:
+        if _telemetria is not None:
+            _telemetria.fusionar(datos_telemetria)
+        if error:
+            print(f"   -> ¡¡ERROR en '{csv_file}'!! Detalle: {error}")
+        else:
+            filas_por_segundo = filas / duracion if duracion > 0 else 0
+            print(f"   -> '{csv_file}': {filas} filas en {duracion:.1f} s ({filas_por_segundo:,.0f} filas/s)")
+    print(f"   -> Total: {total_filas} filas en {duracion_total:.1f} s "
+          f"({total_filas / duracion_total if duracion_total > 0 else 0:,.0f} filas/s)")
+    return resultados
+
+
+def ruta_indices_guardados(csv_dir, table_name):
+    """Ruta del JSON con las definiciones de los índices retirados durante la carga."""
+    carpeta = CARPETA_MANIFIESTOS or os.path.join(csv_dir, '.manifiestos_importacion')
+    return os.path.join(carpeta, f"indices_{table_name}.json")
+
+
+def capturar_indices(cursor, table_name):
+    """
+    Lee las definiciones de los índices secundarios de la tabla con SHOW INDEX:
+    [{'nombre', 'unico', 'tipo', 'columnas': [[columna, longitud], ...]}].
+    La clave primaria no se incluye: en InnoDB es la propia tabla y quitarla
+    obligaría a reescribirla entera.
+    """
+    cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+    campos = [d[0] for d in cursor.description]
+    indices = {}
+    for fila in cursor.fetchall():
+        fila = dict(zip(campos, fila))
+        if fila['Key_name'] == 'PRIMARY':
+            continue
+        indice = indices.setdefault(fila['Key_name'], {
+            'nombre': fila['Key_name'],
+            'unico': not int(fila['Non_unique']),
+            'tipo': fila.get('Index_type') or 'BTREE',
+            'columnas': [],
+        })
+        indice['columnas'].append((int(fila['Seq_in_index']), fila['Column_name'], fila['Sub_part']))
+    for indice in indices.values():
+        indice['columnas'] = [[col, sub_part] for _, col, sub_part in sorted(indice['columnas'])]
+    return list(indices.values())
+
+
+def _definicion_indice(indice):
+    """Cláusula ADD ... INDEX de ALTER TABLE para una definición de capturar_indices()."""
+    columnas = ', '.join(f"`{col}`" + (f"({sub_part})" if sub_part else '')
+                         for col, sub_part in indice['columnas'])
+    if indice['tipo'] == 'FULLTEXT':
+        return f"ADD FULLTEXT INDEX `{indice['nombre']}` ({columnas})"
+    unico = 'UNIQUE ' if indice['unico'] else ''
+    return f"ADD {unico}INDEX `{indice['nombre']}` ({columnas})"
+
+
+@contextlib.contextmanager
+def indices_diferidos(csv_dir, db_config, table_name):
+    """
+    Carga con índices diferidos, en tres fases:
+
+    1. Captura las definiciones de los índices secundarios y las guarda en
+       un JSON junto a los manifiestos (antes de tocar nada).
+    2. Los elimina con un solo ALTER TABLE antes de la carga.
+    3. Al terminar (aunque la carga falle) los vuelve a crear todos en un solo
+       ALTER TABLE, que ordena cada índice una vez en lugar de mantener los
+       árboles fila a fila durante millones de inserciones.
+
+    Si un corte deja la tabla sin índices, el JSON sigue ahí: la siguiente
+    ejecución con --indices-diferidos los recupera de él y los reconstruye.
+    Devuelve (con `as`) el diccionario de tiempos de cada fase.
+    """
+    ruta = ruta_indices_guardados(csv_dir, table_name)
+    tiempos = {}
+
+    inicio = time.perf_counter()
+    connection = conectar(db_config)
+    try:
+        with connection.cursor() as cursor:
+            actuales = capturar_indices(cursor, table_name)
+            try:
+                with open(ruta, mode='r', encoding='utf-8') as f:
+                    indices = json.load(f)
+                print(f"-> Recuperadas las definiciones de índices de una carga anterior ('{ruta}').")
+            except FileNotFoundError:
+                indices = actuales
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                with open(ruta + '.tmp', mode='w', encoding='utf-8') as f:
+                    json.dump(indices, f, indent=2)
+                os.replace(ruta + '.tmp', ruta)
+            tiempos['captura'] = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            if actuales:
+                cursor.execute(f"ALTER TABLE `{table_name}` " +
+                               ', '.join(f"DROP INDEX `{i['nombre']}`" for i in actuales))
+            tiempos['eliminacion'] = time.perf_counter() - inicio
+    finally:
+        connection.close()
+    print(f"-> {len(indices)} índices de '{table_name}' retirados hasta el final de la carga: "
+          f"{', '.join(i['nombre'] for i in indices) or '(ninguno)'}")
+
+    inicio = time.perf_counter()
+    try:
+        yield tiempos
+    finally:
+        tiempos['carga'] = time.perf_counter() - inicio
+
+        print(f"\n-> Reconstruyendo {len(indices)} índices de '{table_name}'...")
+        inicio = time.perf_counter()
+        connection = None
+        try:
+            connection = conectar(db_config)
+            with connection.cursor() as cursor:
+                existentes = {i['nombre'] for i in capturar_indices(cursor, table_name)}
+                pendientes = [i for i in indices if i['nombre'] not in existentes]
+                if pendientes:
+                    cursor.execute(f"ALTER TABLE `{table_name}` " +
+                                   ', '.join(_definicion_indice(i) for i in pendientes))
+            os.remove(ruta)
+        except Exception as e:
+            print(f"   -> ¡¡ERROR reconstruyendo los índices!! Detalle: {e}")
+            print(f"   -> Las definiciones siguen en '{ruta}'.")
+        finally:
+            if connection:
+                connection.close()
+        tiempos['reconstruccion'] = time.perf_counter() - inicio
+        if _telemetria is not None:
+            for fase, segundos in tiempos.items():
+                _telemetria.fase(f"indices_{fase}", segundos)
+
+        print("   Fase            Segundos")
+        for fase in ('captura', 'eliminacion', 'carga', 'reconstruccion'):
+            print(f"   {fase:<15} {tiempos.get(fase, 0.0):>8.1f}")
+
+
+def importar_mortalidad_linea_por_linea(csv_dir, db_config, motor=MOTOR_CARGA, procesos=NUM_PROCESOS,
+                                        reanudar=True, diferir_indices=INDICES_DIFERIDOS):
+    """
+    Importa SÓLO los archivos .csv de mortalidad a la base de datos
+    usando el motor indicado ('executemany' o 'load_data').
+    Con procesos > 1 los archivos se importan en paralelo.
+    Con reanudar=True cada archivo continúa desde su último punto de control;
+    con reanudar=False se descartan los manifiestos y se empieza de cero.
+    Con diferir_indices=True los índices se reconstruyen al final (ver indices_diferidos()).
+    """
+    if motor not in CARGADORES:
+        print(f"¡Error! Motor de carga desconocido: '{motor}'. Opciones: {', '.join(MOTORES_CARGA)}")
+        return
+
+    if diferir_indices:
+        try:
+            with indices_diferidos(csv_dir, db_config, TABLE_NAME_MORTALIDAD):
+                importar_mortalidad_linea_por_linea(csv_dir, dict(db_config, carga_masiva=True), motor,
+                                                    procesos, reanudar, diferir_indices=False)
+        except Exception as e:
+            print(f"¡Error! No se pudieron retirar los índices de '{TABLE_NAME_MORTALIDAD}': {e}")
+        return
+
+    mapeo_archivos_tabla = listar_archivos_mortalidad(csv_dir)
+
+    if procesos > 1:
+        importar_en_paralelo(csv_dir, db_config, mapeo_archivos_tabla, motor, procesos, reanudar)
+        print("==============================================")
+        print(" Proceso finalizado.")
+        print("==============================================")
+        return
+
+    print("Iniciando conexión con la base de datos...")
+
+    try:
+        connection = conectar(db_config, local_infile=(motor == 'load_data'))
     except pymysql.err.OperationalError as e:
         print(f"¡Error de conexión! Revisa tus variables DB_HOST, DB_USER, DB_PASS.")
         print(f"Detalle: {e}")
@@ -66,67 +1244,46 @@ def importar_mortalidad_linea_por_linea(csv_dir, db_config):
         return
 
     print("¡Conexión exitosa!")
-    print("Iniciando importación LENTA (sólo mortalidad).")
-    print("Esto puede tardar MUCHAS HORAS...")
+    if motor == 'load_data':
+        print("Iniciando importación RÁPIDA con LOAD DATA LOCAL INFILE (sólo mortalidad).")
+    else:
+        print("Iniciando importación LENTA (sólo mortalidad).")
+        print("Esto puede tardar MUCHAS HORAS...")
 
     try:
         with connection.cursor() as cursor:
             # El bucle ahora iterará sobre los archivos de mortalidad
             for csv_file, table_name in mapeo_archivos_tabla.items():
-                
+
                 csv_path_full = os.path.join(csv_dir, csv_file)
-                
-                if not os.path.exists(csv_path_full):
+
+                if not existe_fuente(csv_path_full):
                     print(f"\n-> Archivo no encontrado, saltando: '{csv_file}'")
                     continue
-                    
+
                 print(f"\n-> Abriendo archivo '{csv_file}' para importar en '{table_name}'...")
-                
+
                 try:
-                    # 'utf-8' es estándar, pero si falla, prueba 'latin-1'
-                    with open(csv_path_full, mode='r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        
-                        # Leemos la cabecera para saber el número de columnas
-                        header = next(reader) 
-                        num_cols = len(header)
-                        
-                        # Creamos el query de INSERT usando la variable table_name
-                        placeholders = ', '.join(['%s'] * num_cols)
-                        sql_insert = f"INSERT INTO {table_name} VALUES ({placeholders})"
-                        
-                        print(f"   (Query: INSERT INTO {table_name} VALUES (...) con {num_cols} columnas)")
-
-                        filas_en_lote = []
-                        contador_total = 0
-                        
-                        for row in reader:
-                            # Convertir strings vacíos '' a None (NULL en SQL)
-                            processed_row = [None if val == '' else val for val in row]
-                            
-                            filas_en_lote.append(processed_row)
-                            
-                            if len(filas_en_lote) >= TAMANO_LOTE:
-                                # Ejecutar el lote
-                                cursor.executemany(sql_insert, filas_en_lote)
-                                connection.commit()
-                                contador_total += len(filas_en_lote)
-                                filas_en_lote = []
-                                print(f"   ... {contador_total} filas insertadas.", end='\r')
-                        
-                        # Insertar el último lote restante
-                        if filas_en_lote:
-                            cursor.executemany(sql_insert, filas_en_lote)
-                            connection.commit()
-                            contador_total += len(filas_en_lote)
-                        
-                        print(f"   -> ¡Éxito! Total de {contador_total} filas importadas de '{csv_file}'.")
+                    inicio = time.perf_counter()
+                    contador_total = importar_fuente(connection, cursor, csv_path_full, table_name,
+                                                     motor, reanudar)
+                    if contador_total is None:
+                        continue
+                    duracion = time.perf_counter() - inicio
+                    filas_por_segundo = contador_total / duracion if duracion > 0 else 0
+                    if _telemetria is not None:
+                        _telemetria.archivo(csv_path_full, contador_total, duracion)
+
+                    print(f"   -> ¡Éxito! Total de {contador_total} filas importadas de '{csv_file}'.")
+                    print(f"   -> {duracion:.1f} s ({filas_por_segundo:,.0f} filas/s)")
 
                 except Exception as e:
                     print(f"   -> ¡¡ERROR durante el procesamiento de '{csv_file}'!!")
                     print(f"   -> Detalle: {e}")
                     print("   -> Saltando este archivo.")
                     connection.rollback() # Revertir cualquier lote parcial
+                    if _telemetria is not None:
+                        _telemetria.archivo(csv_path_full, 0, time.perf_counter() - inicio, str(e))
 
     except Exception as e:
         print(f"¡Error durante la importación!: {e}")
@@ -138,11 +1295,768 @@ def importar_mortalidad_linea_por_linea(csv_dir, db_config):
         print("==============================================")
 
 
+def leer_cabecera(fuente):
+    """Devuelve la lista de columnas de la cabecera de una fuente."""
+    with abrir_fuente_texto(fuente) as f:
+        return next(csv.reader(f))
+
+
+def iterar_filas(fuente):
+    """Recorre las filas de datos de una fuente (sin cabecera), ya pasadas por limpiar_fila()."""
+    with abrir_fuente_texto(fuente) as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if row:
+                yield limpiar_fila(row)
+
+
+def huella_fila(fila):
+    """
+    CRC32 de la fila serializada igual que en huellas_tabla():
+    valores recortados, NULL como '' y separados por '|'.
+    """
+    texto = '|'.join('' if val is None else str(val).strip() for val in fila)
+    return zlib.crc32(texto.encode('utf-8'))
+
+
+def clave_particion(valores):
+    """
+    Clave (Country, Year, List) normalizada igual en los archivos y en la
+    tabla: valores recortados y NULL / campo vacío como ''.
+    """
+    return tuple('' if val is None else str(val).strip() for val in valores)
+
+
+def huellas_fuentes(fuentes, indices_clave):
+    """
+    Calcula la huella de cada partición (Country, Year, List) de las fuentes:
+    {clave: [filas, suma de CRC32]}. La suma no depende del orden de las filas,
+    así se puede comparar con lo que devuelve un GROUP BY en el servidor.
+    """
+    huellas = {}
+    for fuente in fuentes:
+        for fila in iterar_filas(fuente):
+            clave = clave_particion(fila[i] for i in indices_clave)
+            huella = huellas.setdefault(clave, [0, 0])
+            huella[0] += 1
+            huella[1] += huella_fila(fila)
+    return huellas
+
+
+def huellas_tabla(cursor, table_name, columnas, columnas_clave):
+    """Huella de cada partición ya cargada en la tabla, calculada en el servidor."""
+    serializacion = ', '.join(f"COALESCE(TRIM(`{col}`), '')" for col in columnas)
+    clave_sql = ', '.join(f"`{col}`" for col in columnas_clave)
+    cursor.execute(
+        f"SELECT {clave_sql}, COUNT(*), SUM(CRC32(CONCAT_WS('|', {serializacion}))) "
+        f"FROM {table_name} GROUP BY {clave_sql}"
+    )
+    huellas = {}
+    for fila in cursor.fetchall():
+        n = len(columnas_clave)
+        clave = clave_particion(fila[:n])
+        huellas[clave] = [int(fila[n]), int(fila[n + 1] or 0)]
+    return huellas
+
+
+def importar_delta(csv_dir, db_config):
+    """
+    Importación incremental: sólo reemplaza las particiones (Country, Year, List)
+    nuevas o distintas de las ya cargadas.
+
+    1. Calcula la huella de cada partición en los archivos de entrada.
+    2. Calcula la huella de cada partición ya cargada en la tabla (un GROUP BY).
+    3. Borra y vuelve a insertar sólo las particiones que difieren.
+
+    Las particiones que existen en la tabla pero no en los archivos no se tocan.
+    Si el proceso se interrumpe, basta con volver a ejecutarlo: las particiones
+    a medio cargar no coinciden con su huella y se vuelven a reemplazar.
+
+    Devuelve el conjunto de pares (Country, Year) que se modificaron.
+    """
+    paises_anios = set()
+    mapeo_archivos_tabla = listar_archivos_mortalidad(csv_dir)
+    fuentes = [os.path.join(csv_dir, nombre) for nombre in mapeo_archivos_tabla
+               if existe_fuente(os.path.join(csv_dir, nombre))]
+    if not fuentes:
+        print("No hay archivos que importar.")
+        return paises_anios
+
+    try:
+        connection = conectar(db_config)
+    except Exception as e:
+        print(f"¡Error! No se pudo conectar a la base de datos: {e}")
+        return paises_anios
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SHOW COLUMNS FROM {TABLE_NAME_MORTALIDAD}")
+            columnas = [fila[0] for fila in cursor.fetchall()]
+
+            # Posición de Country, Year y List en los archivos (por nombre de cabecera)
+            cabecera = [col.lower() for col in leer_cabecera(fuentes[0])]
+            try:
+                indices_clave = [cabecera.index(col.lower()) for col in COLUMNAS_PARTICION]
+            except ValueError:
+                print(f"¡Error! La cabecera no contiene las columnas {COLUMNAS_PARTICION}.")
+                return paises_anios
+            columnas_clave = [columnas[i] for i in indices_clave]
+
+            print(f"-> Calculando huellas de {len(fuentes)} archivos...")
+            inicio = time.perf_counter()
+            huellas_nuevas = huellas_fuentes(fuentes, indices_clave)
+            print(f"   {len(huellas_nuevas)} particiones en los archivos ({time.perf_counter() - inicio:.1f} s)")
+
+            print(f"-> Calculando huellas de lo ya cargado en '{TABLE_NAME_MORTALIDAD}'...")
+            inicio = time.perf_counter()
+            huellas_cargadas = huellas_tabla(cursor, TABLE_NAME_MORTALIDAD, columnas, columnas_clave)
+            print(f"   {len(huellas_cargadas)} particiones en la tabla ({time.perf_counter() - inicio:.1f} s)")
+
+            nuevas = {c for c in huellas_nuevas if c not in huellas_cargadas}
+            modificadas = {c for c in huellas_nuevas
+                           if c in huellas_cargadas and huellas_nuevas[c] != huellas_cargadas[c]}
+            a_reemplazar = nuevas | modificadas
+            sin_cambios = len(huellas_nuevas) - len(a_reemplazar)
+            solo_en_tabla = len(set(huellas_cargadas) - set(huellas_nuevas))
+
+            print(f"   Sin cambios: {sin_cambios} | Nuevas: {len(nuevas)} | "
+                  f"Modificadas: {len(modificadas)} | Sólo en la tabla (no se tocan): {solo_en_tabla}")
+
+            if not a_reemplazar:
+                print("-> La tabla ya está al día.")
+                return paises_anios
+
+            paises_anios = {(clave[0], clave[1]) for clave in a_reemplazar}
+
+            if modificadas:
+                print(f"-> Borrando {len(modificadas)} particiones modificadas...")
+                for clave in sorted(modificadas):
+                    # '' en la clave es un campo NULL o vacío en la tabla
+                    condicion = ' AND '.join(f"`{col}` = %s" if valor else f"(`{col}` IS NULL OR `{col}` = '')"
+                                             for col, valor in zip(columnas_clave, clave))
+                    cursor.execute(f"DELETE FROM {TABLE_NAME_MORTALIDAD} WHERE {condicion}",
+                                   [valor for valor in clave if valor])
+                connection.commit()
+
+            print(f"-> Insertando {len(a_reemplazar)} particiones...")
+            placeholders = ', '.join(['%s'] * len(columnas))
+            sql_insert = f"INSERT INTO {TABLE_NAME_MORTALIDAD} VALUES ({placeholders})"
+            contador_total = 0
+            inicio = time.perf_counter()
+            for fuente in fuentes:
+                filas_en_lote = []
+                contador_fuente = 0
+                inicio_fuente = time.perf_counter()
+                try:
+                    for fila in iterar_filas(fuente):
+                        if clave_particion(fila[i] for i in indices_clave) not in a_reemplazar:
+                            continue
+                        filas_en_lote.append(fila)
+                        if len(filas_en_lote) >= TAMANO_LOTE:
+                            cursor.executemany(sql_insert, filas_en_lote)
+                            connection.commit()
+                            contador_fuente += len(filas_en_lote)
+                            filas_en_lote = []
+                            print(f"   ... {contador_total + contador_fuente} filas insertadas.", end='\r')
+                    if filas_en_lote:
+                        cursor.executemany(sql_insert, filas_en_lote)
+                        connection.commit()
+                        contador_fuente += len(filas_en_lote)
+                finally:
+                    # Filas confirmadas de esta fuente: el total del informe (y de Importacion_estado)
+                    contador_total += contador_fuente
+                    if _telemetria is not None:
+                        _telemetria.archivo(fuente, contador_fuente, time.perf_counter() - inicio_fuente)
+
+            duracion = time.perf_counter() - inicio
+            _medir_fase('delta_insercion', inicio)
+            print(f"   -> ¡Éxito! {contador_total} filas insertadas en {duracion:.1f} s "
+                  f"({contador_total / duracion if duracion > 0 else 0:,.0f} filas/s)")
+
+    except Exception as e:
+        print(f"¡Error durante la importación incremental!: {e}")
+        print("   -> Vuelve a ejecutar: las particiones a medio cargar se reemplazarán.")
+        connection.rollback()
+    finally:
+        connection.close()
+        print("\nConexión a la base de datos cerrada.")
+
+    return paises_anios
+
+
+SQL_CREAR_RESUMEN_CAUSA = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME_RESUMEN_CAUSA} (
+        Country VARCHAR(4) NOT NULL,
+        Year SMALLINT NOT NULL,
+        Sex TINYINT NOT NULL,
+        List VARCHAR(3) NOT NULL,
+        Cause VARCHAR(4) NOT NULL,
+        Deaths BIGINT NOT NULL,
+        PRIMARY KEY (Country, Year, Sex, List, Cause),
+        KEY idx_causa (List, Cause, Year)
+    )
+"""
+
+SQL_CREAR_RESUMEN = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME_RESUMEN} (
+        Country VARCHAR(4) NOT NULL,
+        Year SMALLINT NOT NULL,
+        Sex TINYINT NOT NULL,
+        Deaths BIGINT NOT NULL,
+        Poblacion BIGINT NULL,
+        PRIMARY KEY (Country, Year, Sex),
+        KEY idx_anio (Year)
+    )
+"""
+
+# Totales por país/año/sexo/causa. Los códigos se guardan ya recortados y el
+# año/sexo como números, así los tableros no necesitan TRIM ni CAST.
+# Deaths1 / Pob1 ya son el total de todas las edades (= Deaths2..26): sumar
+# las 26 columnas contaría cada muerte dos veces. En Frmat 09 sólo hay Deaths1.
+SQL_LLENAR_RESUMEN_CAUSA = f"""
+    INSERT INTO {TABLE_NAME_RESUMEN_CAUSA} (Country, Year, Sex, List, Cause, Deaths)
+    SELECT TRIM(M.Country), CAST(TRIM(M.Year) AS UNSIGNED), CAST(TRIM(M.Sex) AS UNSIGNED),
+           COALESCE(TRIM(M.List), ''), COALESCE(TRIM(M.Cause), ''),
+           SUM(COALESCE(M.Deaths1, 0))
+    FROM {TABLE_NAME_MORTALIDAD} AS M
+    WHERE 1=1 {{filtro}}
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+# Código de "todas las causas" de cada lista (catálogo de la OMS). Las listas
+# también traen subtotales (en la 101, '1001'... dentro de '1000'), así que el
+# total por país/año/sexo se toma sólo de esta fila: sumar todas las causas
+# contaría cada muerte al menos dos veces. En las listas que no están aquí
+# (ej. CIE-9) se usa la causa con más muertes, que es la de todas las causas.
+CAUSA_TOTAL_POR_LISTA = {
+    '101': '1000',
+    '103': 'AAA',
+    '104': 'AAA',
+    '10M': 'AAA',
+    '07A': 'A000',
+    '07B': 'B000',
+    '08A': 'A000',
+    '08B': 'B000',
+}
+
+_SQL_LISTAS_CON_TOTAL = ', '.join(f"'{lista}'" for lista in CAUSA_TOTAL_POR_LISTA)
+_SQL_FILA_TOTAL = ' OR '.join(f"(R.List = '{lista}' AND R.Cause = '{causa}')"
+                              for lista, causa in CAUSA_TOTAL_POR_LISTA.items())
+
+# Totales por país/año/sexo, con la población del mismo país/año/sexo.
+# Se calcula a partir del resumen por causa (miles de filas, no millones),
+# con la fila de todas las causas de cada lista. La población es la
+# nacional: las filas con Admin1/Subdiv son partes del país ya incluidas.
+SQL_LLENAR_RESUMEN = f"""
+    INSERT INTO {TABLE_NAME_RESUMEN} (Country, Year, Sex, Deaths, Poblacion)
+    SELECT T.Country, T.Year, T.Sex, SUM(T.Deaths), MAX(P.Poblacion)
+    FROM (
+        SELECT R.Country, R.Year, R.Sex, R.List,
+               CASE WHEN R.List IN ({_SQL_LISTAS_CON_TOTAL})
+                    THEN SUM(CASE WHEN {_SQL_FILA_TOTAL} THEN R.Deaths ELSE 0 END)
+                    ELSE MAX(R.Deaths) END AS Deaths
+        FROM {TABLE_NAME_RESUMEN_CAUSA} AS R
+        WHERE 1=1 {{filtro_resumen}}
+        GROUP BY R.Country, R.Year, R.Sex, R.List
+    ) AS T
+    LEFT JOIN (
+        SELECT TRIM(Pais_Codigo) AS Pais, CAST(TRIM(Anio) AS UNSIGNED) AS Anio,
+               CAST(TRIM(Sexo) AS UNSIGNED) AS Sexo, SUM(COALESCE(Pob1, 0)) AS Poblacion
+        FROM {TABLE_NAME_POBLACION}
+        WHERE COALESCE(TRIM(Admin1), '') = '' AND COALESCE(TRIM(Subdiv), '') = '' {{filtro_poblacion}}
+        GROUP BY 1, 2, 3
+    ) AS P ON P.Pais = T.Country AND P.Anio = T.Year AND P.Sexo = T.Sex
+    GROUP BY T.Country, T.Year, T.Sex
+"""
+
+
+def actualizar_resumenes(db_config, paises_anios=None):
+    """
+    Materializa las tablas de resumen que leen los tableros en lugar de sumar
+    Deaths1..26 sobre millones de filas de Mortalidad en cada petición.
+
+    Sin `paises_anios` se reconstruyen completas; con un conjunto de pares
+    (Country, Year) sólo se recalculan esos (tras una importación --delta).
+    """
+    try:
+        connection = conectar(db_config)
+    except Exception as e:
+        print(f"¡Error! No se pudo conectar para actualizar los resúmenes: {e}")
+        return
+
+    print("\n-> Actualizando tablas de resumen...")
+    inicio = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(SQL_CREAR_RESUMEN_CAUSA)
+            cursor.execute(SQL_CREAR_RESUMEN)
+
+            if paises_anios is None:
+                cursor.execute(f"TRUNCATE TABLE {TABLE_NAME_RESUMEN_CAUSA}")
+                cursor.execute(f"TRUNCATE TABLE {TABLE_NAME_RESUMEN}")
+                cursor.execute(SQL_LLENAR_RESUMEN_CAUSA.format(filtro=''))
+                cursor.execute(SQL_LLENAR_RESUMEN.format(filtro_poblacion='', filtro_resumen=''))
+                connection.commit()
+            else:
+                for pais, anio in sorted(paises_anios):
+                    params = (pais, anio)
+                    cursor.execute(f"DELETE FROM {TABLE_NAME_RESUMEN_CAUSA} WHERE Country = %s AND Year = %s", params)
+                    cursor.execute(f"DELETE FROM {TABLE_NAME_RESUMEN} WHERE Country = %s AND Year = %s", params)
+                    cursor.execute(SQL_LLENAR_RESUMEN_CAUSA.format(
+                        filtro="AND M.Country = %s AND M.Year = %s"), params)
+                    cursor.execute(SQL_LLENAR_RESUMEN.format(
+                        filtro_poblacion="AND Pais_Codigo = %s AND Anio = %s",
+                        filtro_resumen="AND R.Country = %s AND R.Year = %s"), params + params)
+                    connection.commit()
+
+            cursor.execute(f"SELECT COUNT(*) FROM {TABLE_NAME_RESUMEN_CAUSA}")
+            filas_causa = cursor.fetchone()[0]
+            cursor.execute(f"SELECT COUNT(*) FROM {TABLE_NAME_RESUMEN}")
+            filas_resumen = cursor.fetchone()[0]
+
+        print(f"   -> '{TABLE_NAME_RESUMEN_CAUSA}': {filas_causa} filas | "
+              f"'{TABLE_NAME_RESUMEN}': {filas_resumen} filas ({time.perf_counter() - inicio:.1f} s)")
+        _medir_fase('resumenes', inicio)
+    except Exception as e:
+        print(f"   -> ¡¡ERROR actualizando los resúmenes!! Detalle: {e}")
+        connection.rollback()
+    finally:
+        connection.close()
+
+
+# Clasificación CIE-10 de cada (List, Cause) cargado, resuelta con icd10_indice,
+# y totales por capítulo/bloque: se unen por igualdad con el resumen por causa
+SQL_CREAR_CAUSA_CIE10 = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME_CAUSA_CIE10} (
+        List VARCHAR(3) NOT NULL,
+        Cause VARCHAR(4) NOT NULL,
+        Codigo VARCHAR(8) NOT NULL,
+        Categoria VARCHAR(3) NOT NULL,
+        Bloque VARCHAR(7) NOT NULL,
+        Capitulo VARCHAR(5) NOT NULL,
+        PRIMARY KEY (List, Cause),
+        KEY idx_capitulo (Capitulo, Bloque)
+    )
+"""
+
+SQL_CREAR_RESUMEN_CAPITULO = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME_RESUMEN_CAPITULO} (
+        Country VARCHAR(4) NOT NULL,
+        Year SMALLINT NOT NULL,
+        Sex TINYINT NOT NULL,
+        Capitulo VARCHAR(5) NOT NULL,
+        Bloque VARCHAR(7) NOT NULL,
+        Deaths BIGINT NOT NULL,
+        PRIMARY KEY (Country, Year, Sex, Capitulo, Bloque),
+        KEY idx_capitulo (Capitulo, Year)
+    )
+"""
+
+SQL_LLENAR_RESUMEN_CAPITULO = f"""
+    INSERT INTO {TABLE_NAME_RESUMEN_CAPITULO} (Country, Year, Sex, Capitulo, Bloque, Deaths)
+    SELECT R.Country, R.Year, R.Sex, C.Capitulo, C.Bloque, SUM(R.Deaths)
+    FROM {TABLE_NAME_RESUMEN_CAUSA} AS R
+    JOIN {TABLE_NAME_CAUSA_CIE10} AS C ON C.List = R.List AND C.Cause = R.Cause
+    WHERE 1=1 {{filtro}}
+    GROUP BY R.Country, R.Year, R.Sex, C.Capitulo, C.Bloque
+"""
+
+
+def clasificar_causas(indice, causas):
+    """
+    Filas (List, Cause, Codigo, Categoria, Bloque, Capitulo) de Causa_cie10
+    para los pares (List, Cause) dados. Sólo se clasifican las listas de
+    LISTAS_CIE10; las causas de la CIE-7/8/9 y las que el índice no resuelve
+    (lista 101, 'AAA') se omiten.
+    """
+    clasificadas = []
+    for lista, causa in causas:
+        if str(lista or '').strip().upper() not in LISTAS_CIE10:
+            continue
+        clasificacion = indice.resolver(causa)
+        if clasificacion is not None and clasificacion.bloque and clasificacion.capitulo:
+            clasificadas.append((lista, causa, clasificacion.codigo, clasificacion.categoria,
+                                 clasificacion.bloque, clasificacion.capitulo))
+    return clasificadas
+
+
+def actualizar_resumen_capitulos(db_config, paises_anios=None):
+    """
+    Clasifica las causas del resumen por causa con el índice de la CIE-10
+    (icd10_indice.py) y materializa los totales por capítulo y bloque.
+    Debe ejecutarse después de actualizar_resumenes(). Las causas que no son
+    de la CIE-10 (CIE-7/8/9, lista 101, 'AAA') quedan fuera de este resumen.
+    """
+    try:
+        import icd10_indice
+        indice = icd10_indice.IndiceCIE10.desde_csv()
+    except (ImportError, FileNotFoundError) as e:
+        print(f"\n-> Sin índice de la CIE-10 ({e}), no se calcula el resumen por capítulo.")
+        return
+
+    try:
+        connection = conectar(db_config)
+    except Exception as e:
+        print(f"¡Error! No se pudo conectar para el resumen por capítulo: {e}")
+        return
+
+    print("\n-> Actualizando resumen por capítulo de la CIE-10...")
+    inicio = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(SQL_CREAR_CAUSA_CIE10)
+            cursor.execute(SQL_CREAR_RESUMEN_CAPITULO)
+
+            marcadores = ', '.join(['%s'] * len(LISTAS_CIE10))
+            cursor.execute(f"SELECT DISTINCT List, Cause FROM {TABLE_NAME_RESUMEN_CAUSA} "
+                           f"WHERE List IN ({marcadores})", LISTAS_CIE10)
+            clasificadas = clasificar_causas(indice, cursor.fetchall())
+            # Clasificaciones de otras revisiones que hubieran quedado de versiones anteriores
+            cursor.execute(f"DELETE FROM {TABLE_NAME_CAUSA_CIE10} WHERE List NOT IN ({marcadores})",
+                           LISTAS_CIE10)
+            cursor.executemany(
+                f"REPLACE INTO {TABLE_NAME_CAUSA_CIE10} (List, Cause, Codigo, Categoria, Bloque, Capitulo) "
+                f"VALUES (%s, %s, %s, %s, %s, %s)", clasificadas)
+
+            if paises_anios is None:
+                cursor.execute(f"TRUNCATE TABLE {TABLE_NAME_RESUMEN_CAPITULO}")
+                filas = cursor.execute(SQL_LLENAR_RESUMEN_CAPITULO.format(filtro=''))
+            else:
+                filas = 0
+                for pais, anio in sorted(paises_anios):
+                    params = (pais, anio)
+                    cursor.execute(f"DELETE FROM {TABLE_NAME_RESUMEN_CAPITULO} "
+                                   f"WHERE Country = %s AND Year = %s", params)
+                    filas += cursor.execute(SQL_LLENAR_RESUMEN_CAPITULO.format(
+                        filtro="AND R.Country = %s AND R.Year = %s"), params)
+            connection.commit()
+
+        print(f"   -> {len(clasificadas)} causas clasificadas | '{TABLE_NAME_RESUMEN_CAPITULO}': "
+              f"{filas} filas ({time.perf_counter() - inicio:.1f} s)")
+        _medir_fase('resumen_capitulos', inicio)
+    except Exception as e:
+        print(f"   -> ¡¡ERROR en el resumen por capítulo!! Detalle: {e}")
+        connection.rollback()
+    finally:
+        connection.close()
+
+
+def _sql_grupos_edad():
+    """Tabla derivada con los números de grupo de edad 1..26."""
+    return ' UNION ALL '.join(f"SELECT {i} AS n" for i in range(1, 27))
+
+
+def _elt_columnas(prefijo, alias):
+    """ELT(G.n, M.Deaths1, ..., M.Deaths26): el valor del grupo G.n de cada fila ancha."""
+    return f"ELT(G.n, {', '.join(f'{alias}{prefijo}{i}' for i in range(1, 27))})"
+
+
+# Tablas largas (una fila por grupo de edad). Grupo_Edad N corresponde a la
+# columna DeathsN / PobN, que se decodifica con who_mortality_age_ranges según Frmat.
+SQL_CREAR_MORTALIDAD_EDAD = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME_MORTALIDAD_EDAD} (
+        Country VARCHAR(4) NOT NULL,
+        Admin1 VARCHAR(3) NULL,
+        Subdiv VARCHAR(3) NULL,
+        Year SMALLINT NOT NULL,
+        List VARCHAR(3) NOT NULL,
+        Cause VARCHAR(4) NOT NULL,
+        Sex TINYINT NOT NULL,
+        Frmat VARCHAR(2) NULL,
+        Grupo_Edad TINYINT NOT NULL,
+        Deaths INT NOT NULL
+    )
+"""
+
+SQL_INDICES_MORTALIDAD_EDAD = f"""
+    ALTER TABLE {TABLE_NAME_MORTALIDAD_EDAD}
+        ADD INDEX idx_pais_anio_edad (Country, Year, Grupo_Edad),
+        ADD INDEX idx_causa_edad (List, Cause, Grupo_Edad, Year),
+        ADD INDEX idx_edad_anio (Grupo_Edad, Year)
+"""
+
+SQL_LLENAR_MORTALIDAD_EDAD = f"""
+    INSERT INTO {TABLE_NAME_MORTALIDAD_EDAD}
+        (Country, Admin1, Subdiv, Year, List, Cause, Sex, Frmat, Grupo_Edad, Deaths)
+    SELECT TRIM(M.Country), NULLIF(TRIM(M.Admin1), ''), NULLIF(TRIM(M.Subdiv), ''),
+           CAST(TRIM(M.Year) AS UNSIGNED), COALESCE(TRIM(M.List), ''), COALESCE(TRIM(M.Cause), ''),
+           CAST(TRIM(M.Sex) AS UNSIGNED), TRIM(M.Frmat), G.n, {_elt_columnas('Deaths', 'M.')}
+    FROM {TABLE_NAME_MORTALIDAD} AS M
+    CROSS JOIN ({_sql_grupos_edad()}) AS G
+    WHERE {_elt_columnas('Deaths', 'M.')} IS NOT NULL {{filtro}}
+"""
+
+SQL_CREAR_POBLACION_EDAD = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME_POBLACION_EDAD} (
+        Pais_Codigo VARCHAR(4) NOT NULL,
+        Admin1 VARCHAR(3) NULL,
+        Subdiv VARCHAR(3) NULL,
+        Anio SMALLINT NOT NULL,
+        Sexo TINYINT NOT NULL,
+        Frmat VARCHAR(2) NULL,
+        Grupo_Edad TINYINT NOT NULL,
+        Poblacion BIGINT NOT NULL
+    )
+"""
+
+SQL_INDICES_POBLACION_EDAD = f"""
+    ALTER TABLE {TABLE_NAME_POBLACION_EDAD}
+        ADD INDEX idx_pais_anio_edad (Pais_Codigo, Anio, Grupo_Edad),
+        ADD INDEX idx_edad_anio (Grupo_Edad, Anio)
+"""
+
+SQL_LLENAR_POBLACION_EDAD = f"""
+    INSERT INTO {TABLE_NAME_POBLACION_EDAD}
+        (Pais_Codigo, Admin1, Subdiv, Anio, Sexo, Frmat, Grupo_Edad, Poblacion)
+    SELECT TRIM(P.Pais_Codigo), NULLIF(TRIM(P.Admin1), ''), NULLIF(TRIM(P.Subdiv), ''),
+           CAST(TRIM(P.Anio) AS UNSIGNED), CAST(TRIM(P.Sexo) AS UNSIGNED), TRIM(P.Frmat),
+           G.n, {_elt_columnas('Pob', 'P.')}
+    FROM {TABLE_NAME_POBLACION} AS P
+    CROSS JOIN ({_sql_grupos_edad()}) AS G
+    WHERE {_elt_columnas('Pob', 'P.')} IS NOT NULL
+"""
+
+
+def actualizar_tablas_edad(db_config, paises_anios=None):
+    """
+    Genera las tablas en formato largo Mortalidad_edad y Poblacion_edad
+    (país, año, sexo, causa, grupo de edad, valor) a partir de las columnas
+    anchas Deaths1..26 / Pob1..26, en una sola pasada por tabla en el servidor.
+
+    Sin `paises_anios` se regeneran completas: se cargan sin índices y los
+    índices se crean al final, de una vez. Con un conjunto de pares
+    (Country, Year) sólo se regeneran esas filas de Mortalidad_edad.
+    """
+    try:
+        connection = conectar(db_config)
+    except Exception as e:
+        print(f"¡Error! No se pudo conectar para generar las tablas por edad: {e}")
+        return
+
+    print("\n-> Generando tablas por grupo de edad...")
+    inicio_total = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            if paises_anios is None:
+                trabajos = [
+                    (TABLE_NAME_MORTALIDAD_EDAD, SQL_CREAR_MORTALIDAD_EDAD,
+                     SQL_LLENAR_MORTALIDAD_EDAD.format(filtro=''), SQL_INDICES_MORTALIDAD_EDAD),
+                    (TABLE_NAME_POBLACION_EDAD, SQL_CREAR_POBLACION_EDAD,
+                     SQL_LLENAR_POBLACION_EDAD, SQL_INDICES_POBLACION_EDAD),
+                ]
+                for tabla, sql_crear, sql_llenar, sql_indices in trabajos:
+                    inicio = time.perf_counter()
+                    cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+                    cursor.execute(sql_crear)
+                    filas = cursor.execute(sql_llenar)
+                    connection.commit()
+                    cursor.execute(sql_indices)
+                    print(f"   -> '{tabla}': {filas} filas ({time.perf_counter() - inicio:.1f} s)")
+            else:
+                inicio = time.perf_counter()
+                cursor.execute(SQL_CREAR_MORTALIDAD_EDAD)
+                filas = 0
+                for pais, anio in sorted(paises_anios):
+                    params = (pais, anio)
+                    cursor.execute(f"DELETE FROM {TABLE_NAME_MORTALIDAD_EDAD} "
+                                   f"WHERE Country = %s AND Year = %s", params)
+                    filas += cursor.execute(SQL_LLENAR_MORTALIDAD_EDAD.format(
+                        filtro="AND M.Country = %s AND M.Year = %s"), params)
+                    connection.commit()
+                print(f"   -> '{TABLE_NAME_MORTALIDAD_EDAD}': {filas} filas regeneradas "
+                      f"en {len(paises_anios)} país/año ({time.perf_counter() - inicio:.1f} s)")
+    except Exception as e:
+        print(f"   -> ¡¡ERROR generando las tablas por edad!! Detalle: {e}")
+        connection.rollback()
+    finally:
+        connection.close()
+    _medir_fase('tablas_edad', inicio_total)
+
+
+# Tipos correctos de las columnas que db_structure.txt documenta como texto.
+# Por cada tabla: (columna, definición final, expresión de limpieza). Los valores
+# que no encajan con el tipo (p. ej. '..' en un año) quedan como NULL.
+_ENTERO = "CASE WHEN TRIM(`{col}`) REGEXP '^[0-9]+$' THEN TRIM(`{col}`) END"
+_DECIMAL = ("CASE WHEN REPLACE(TRIM(`{col}`), ',', '.') REGEXP '^-?[0-9]+([.][0-9]+)?$' "
+            "THEN REPLACE(TRIM(`{col}`), ',', '.') END")
+_CODIGO = "NULLIF(TRIM(`{col}`), '')"
+
+TIPOS_COLUMNAS = {
+    TABLE_NAME_MORTALIDAD: [
+        ('Country', 'VARCHAR(4)', _CODIGO),
+        ('Admin1', 'VARCHAR(3)', _CODIGO),
+        ('Subdiv', 'VARCHAR(3)', _CODIGO),
+        ('Year', 'SMALLINT', _ENTERO),
+        ('List', 'VARCHAR(3)', _CODIGO),
+        ('Cause', 'VARCHAR(4)', _CODIGO),
+        ('Sex', 'TINYINT', _ENTERO),
+        ('Frmat', 'VARCHAR(2)', _CODIGO),
+        ('IM_Frmat', 'VARCHAR(2)', _CODIGO),
+    ],
+    TABLE_NAME_POBLACION: [
+        ('Pais_Codigo', 'VARCHAR(4)', _CODIGO),
+        ('Admin1', 'VARCHAR(3)', _CODIGO),
+        ('Subdiv', 'VARCHAR(3)', _CODIGO),
+        ('Anio', 'SMALLINT', _ENTERO),
+        ('Sexo', 'TINYINT', _ENTERO),
+        ('Frmat', 'VARCHAR(2)', _CODIGO),
+    ],
+    TABLE_NAME_USO_INTERNET: [
+        ('Codigo_Pais', 'VARCHAR(4)', _CODIGO),
+        ('Año', 'SMALLINT', _ENTERO),
+        ('Valor %', 'DECIMAL(10,4)', _DECIMAL),
+    ],
+}
+
+# Índices para los filtros por país y rango de años de los analizadores
+INDICES_FILTRO = {
+    TABLE_NAME_MORTALIDAD: ('idx_pais_anio', ('Country', 'Year')),
+    TABLE_NAME_POBLACION: ('idx_pais_anio', ('Pais_Codigo', 'Anio')),
+    TABLE_NAME_USO_INTERNET: ('idx_pais_anio', ('Codigo_Pais', 'Año')),
+}
+
+# Índice de la clave natural de Mortalidad para la paginación por clave
+# (keyset) del analizador: cada página es una lectura de rango del índice.
+# List va al final para desempatar causas repetidas en listas distintas.
+INDICES_PAGINACION = {
+    TABLE_NAME_MORTALIDAD: ('idx_paginacion', ('Country', 'Year', 'Cause', 'Sex', 'Admin1', 'Subdiv', 'List')),
+}
+
+
+def migrar_tipos(db_config):
+    """
+    Convierte las tablas ya cargadas a los tipos de TIPOS_COLUMNAS: recorta los
+    códigos, pasa años y sexo a enteros y `Valor %` a DECIMAL, y crea los
+    índices de INDICES_FILTRO e INDICES_PAGINACION. Así los filtros `Country IN (...)` o
+    `Year BETWEEN ...` usan índices sin TRIM ni CAST.
+
+    Cada tabla se limpia con un solo UPDATE y se altera con un solo ALTER TABLE.
+    Es idempotente: las columnas que ya tienen el tipo correcto no se tocan.
+    """
+    try:
+        connection = conectar(db_config)
+    except Exception as e:
+        print(f"¡Error! No se pudo conectar para migrar los tipos: {e}")
+        return
+
+    print("\n-> Migrando tipos de columna...")
+    try:
+        with connection.cursor() as cursor:
+            for tabla, columnas in TIPOS_COLUMNAS.items():
+                cursor.execute("SHOW TABLES LIKE %s", (tabla,))
+                if not cursor.fetchone():
+                    print(f"   -> '{tabla}' no existe, saltando.")
+                    continue
+
+                cursor.execute(f"SHOW COLUMNS FROM `{tabla}`")
+                tipos_actuales = {fila[0]: fila[1].upper() for fila in cursor.fetchall()}
+                pendientes = [(col, tipo, limpieza) for col, tipo, limpieza in columnas
+                              if col in tipos_actuales
+                              and not tipos_actuales[col].startswith(tipo.split('(')[0])]
+
+                inicio = time.perf_counter()
+                if pendientes:
+                    # Los códigos de texto también se recortan aunque ya tengan su tipo
+                    asignaciones = ', '.join(f"`{col}` = {limpieza.format(col=col)}"
+                                             for col, _, limpieza in columnas if col in tipos_actuales)
+                    cursor.execute(f"UPDATE `{tabla}` SET {asignaciones}")
+                    connection.commit()
+                    cambios = ', '.join(f"MODIFY `{col}` {tipo} NULL" for col, tipo, _ in pendientes)
+                    cursor.execute(f"ALTER TABLE `{tabla}` {cambios}")
+
+                indices_creados = []
+                for nombre_indice, columnas_indice in [INDICES_FILTRO[tabla]] + (
+                        [INDICES_PAGINACION[tabla]] if tabla in INDICES_PAGINACION else []):
+                    cursor.execute(f"SHOW INDEX FROM `{tabla}` WHERE Key_name = %s", (nombre_indice,))
+                    if not cursor.fetchone():
+                        lista = ', '.join(f"`{col}`" for col in columnas_indice)
+                        cursor.execute(f"ALTER TABLE `{tabla}` ADD INDEX {nombre_indice} ({lista})")
+                        indices_creados.append(nombre_indice)
+
+                if pendientes or indices_creados:
+                    print(f"   -> '{tabla}': {len(pendientes)} columnas convertidas"
+                          f"{', índices ' + ', '.join(indices_creados) + ' creados' if indices_creados else ''} "
+                          f"({time.perf_counter() - inicio:.1f} s)")
+                else:
+                    print(f"   -> '{tabla}' ya tiene los tipos correctos.")
+    except Exception as e:
+        print(f"   -> ¡¡ERROR migrando los tipos!! Detalle: {e}")
+        connection.rollback()
+    finally:
+        connection.close()
+
+
+SQL_CREAR_IMPORTACION_ESTADO = f"""
+CREATE TABLE IF NOT EXISTS {TABLE_NAME_IMPORTACION_ESTADO} (
+    Version INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Tipo VARCHAR(20) NOT NULL,
+    Finalizada DATETIME NOT NULL,
+    Filas BIGINT NULL
+) ENGINE=InnoDB
+"""
+
+
+def registrar_importacion(db_config, tipo, filas=None):
+    """
+    Marca el fin de una importación (tipo: 'completa', 'delta', 'resumenes'
+    o 'migracion') con una fila nueva en Importacion_estado. Las aplicaciones
+    de v1/ consultan MAX(Version) cada cierto tiempo y, si cambió, descartan
+    los metadatos y resultados que tenían en caché.
+    """
+    try:
+        connection = conectar(db_config)
+    except Exception as e:
+        print(f"¡Error! No se pudo conectar para registrar la importación: {e}")
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(SQL_CREAR_IMPORTACION_ESTADO)
+            cursor.execute(f"INSERT INTO {TABLE_NAME_IMPORTACION_ESTADO} (Tipo, Finalizada, Filas) "
+                           f"VALUES (%s, NOW(), %s)", (tipo, filas))
+            version = cursor.lastrowid
+        connection.commit()
+        print(f"\n-> Importación registrada: versión de los datos {version} ({tipo}).")
+        return version
+    except Exception as e:
+        print(f"   -> ¡¡ERROR registrando la importación!! Detalle: {e}")
+        connection.rollback()
+        return None
+    finally:
+        connection.close()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Importador de datos de mortalidad de la OMS")
+    parser.add_argument('--motor', choices=MOTORES_CARGA, default=MOTOR_CARGA,
+                        help=f"Motor de carga (por defecto: {MOTOR_CARGA})")
+    parser.add_argument('--procesos', type=int, default=NUM_PROCESOS,
+                        help=f"Procesos para importar archivos en paralelo (por defecto: {NUM_PROCESOS})")
+    parser.add_argument('--reiniciar', action='store_true',
+                        help="Ignorar los puntos de control guardados y empezar cada archivo de cero")
+    parser.add_argument('--indices-diferidos', action='store_true', default=INDICES_DIFERIDOS,
+                        help="Retirar los índices de Mortalidad antes de cargar y reconstruirlos al final")
+    parser.add_argument('--ajustar-lote', action='store_true', default=AJUSTAR_LOTE,
+                        help="Ajustar automáticamente el tamaño de lote y la frecuencia de commit (modo executemany)")
+    parser.add_argument('--delta', action='store_true',
+                        help="Importación incremental: sólo reemplaza las particiones (Country, Year, List) "
+                             "nuevas o modificadas")
+    parser.add_argument('--sin-resumenes', action='store_true',
+                        help="No recalcular las tablas de resumen ni las tablas por edad al terminar")
+    parser.add_argument('--solo-resumenes', action='store_true',
+                        help="Sólo recalcular las tablas de resumen y por edad, sin importar archivos")
+    parser.add_argument('--migrar-tipos', action='store_true',
+                        help="Convertir año, sexo y valores de las tablas ya cargadas a tipos "
+                             "numéricos, recortar los códigos y crear los índices de filtro")
+    parser.add_argument('--informe', default=RUTA_INFORME,
+                        help="Ruta del informe JSON de la ejecución (por defecto: en la carpeta de manifiestos)")
+    args = parser.parse_args()
+
     print("==============================================")
     print(" Asistente de importación WHO (Solo Mortalidad)")
     print("==============================================")
-    
+
     db_config = {
         'host': DB_HOST,
         'user': DB_USER,
@@ -151,7 +2065,48 @@ def main():
         'port': DB_PORT
     }
 
-    importar_mortalidad_linea_por_linea(CARPETA_CSV, db_config)
+    if args.migrar_tipos:
+        migrar_tipos(db_config)
+        registrar_importacion(db_config, 'migracion')
+        return
+
+    if args.solo_resumenes:
+        actualizar_resumenes(db_config)
+        actualizar_resumen_capitulos(db_config)
+        actualizar_tablas_edad(db_config)
+        registrar_importacion(db_config, 'resumenes')
+        return
+
+    global _telemetria, _ajuste_lote
+    _telemetria = Telemetria(motor=args.motor, procesos=args.procesos, tamano_lote=TAMANO_LOTE,
+                             ajustar_lote=args.ajustar_lote, delta=args.delta,
+                             indices_diferidos=args.indices_diferidos,
+                             validar_filas=VALIDAR_FILAS and pd is not None)
+    if args.ajustar_lote and args.motor == 'executemany':
+        _ajuste_lote = AjusteLote()
+    ruta_informe = args.informe or os.path.join(
+        CARPETA_MANIFIESTOS or os.path.join(CARPETA_CSV, '.manifiestos_importacion'),
+        time.strftime('informe_%Y%m%d_%H%M%S.json'))
+
+    if args.delta:
+        paises_anios = importar_delta(CARPETA_CSV, db_config)
+        if paises_anios and not args.sin_resumenes:
+            actualizar_resumenes(db_config, paises_anios)
+            actualizar_resumen_capitulos(db_config, paises_anios)
+            actualizar_tablas_edad(db_config, paises_anios)
+        if paises_anios:
+            registrar_importacion(db_config, 'delta', _telemetria.informe()['total']['filas'])
+        _telemetria.guardar(ruta_informe)
+        return
+
+    importar_mortalidad_linea_por_linea(CARPETA_CSV, db_config, motor=args.motor, procesos=args.procesos,
+                                        reanudar=not args.reiniciar, diferir_indices=args.indices_diferidos)
+    if not args.sin_resumenes:
+        actualizar_resumenes(db_config)
+        actualizar_resumen_capitulos(db_config)
+        actualizar_tablas_edad(db_config)
+    registrar_importacion(db_config, 'completa', _telemetria.informe()['total']['filas'])
+    _telemetria.guardar(ruta_informe)
 
 
 if __name__ == "__main__":
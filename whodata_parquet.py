@@ -0,0 +1,219 @@
+"""
+Conversión de los archivos de la OMS a Parquet (copia analítica columnar).
+
+Convierte los archivos de mortalidad (Mortlcd07..09, Morticd10_partN) y de
+población (pop) en dos datasets Parquet tipados, comprimidos y particionados
+por año:
+
+    <salida>/mortalidad/Year=2021/part-0.parquet
+    <salida>/poblacion/Anio=2021/part-0.parquet
+
+- Country y Cause se guardan con codificación de diccionario.
+- Deaths1..26 / IM_Deaths1..4 y Pob1..26 / Nacidos_Vivos son enteros
+  (la población trae estimaciones con decimales, que se redondean).
+- Las columnas de población se renombran como en la tabla Poblacion.
+
+Lee las mismas fuentes que whodata.py, incluidos los .zip sin descomprimir.
+
+Requisitos: pip install pyarrow
+Uso:        python whodata_parquet.py --csv-dir /ruta/datos --salida parquet
+"""
+
+import os
+import re
+import glob
+import time
+import zipfile
+import argparse
+
+import whodata
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pa_compute
+    import pyarrow.dataset as pa_ds
+except ImportError as e:
+    print(f"Error de importación: {e}")
+    print("Este script necesita pyarrow: pip install pyarrow")
+    raise SystemExit(1)
+
+# --- CONFIGURACIÓN ---
+
+# Carpeta de salida de los datasets Parquet
+CARPETA_PARQUET = 'parquet'
+
+# Compresión de los archivos Parquet ('zstd', 'snappy', 'gzip'...)
+COMPRESION = 'zstd'
+
+# Tamaño de bloque de lectura del CSV (bytes que se procesan a la vez)
+TAMANO_BLOQUE = 16 * 1024 * 1024
+
+# Miembros de los .zip que contienen la población (mort_pop.zip -> 'pop')
+PATRON_MIEMBRO_POBLACION = re.compile(r'^pop(\.csv)?$', re.IGNORECASE)
+
+TEXTO_DICCIONARIO = pa.dictionary(pa.int32(), pa.string())
+
+TIPOS_MORTALIDAD = {
+    'Country': TEXTO_DICCIONARIO,
+    'Admin1': pa.string(),
+    'SubDiv': pa.string(),
+    'Year': pa.int16(),
+    'List': TEXTO_DICCIONARIO,
+    'Cause': TEXTO_DICCIONARIO,
+    'Sex': pa.int8(),
+    'Frmat': pa.string(),
+    'IM_Frmat': pa.string(),
+}
+TIPOS_MORTALIDAD.update({f'Deaths{i}': pa.int32() for i in range(1, 27)})
+TIPOS_MORTALIDAD.update({f'IM_Deaths{i}': pa.int32() for i in range(1, 5)})
+
+TIPOS_POBLACION = {
+    'Country': TEXTO_DICCIONARIO,
+    'Admin1': pa.string(),
+    'SubDiv': pa.string(),
+    'Year': pa.int16(),
+    'Sex': pa.int8(),
+    'Frmat': pa.string(),
+    'Lb': pa.int64(),
+}
+TIPOS_POBLACION.update({f'Pop{i}': pa.int64() for i in range(1, 27)})
+
+# Columnas enteras que en el archivo pueden venir con decimales:
+# se leen como float64 y se redondean al entero más cercano
+REDONDEAR_POBLACION = {'Lb'} | {f'Pop{i}' for i in range(1, 27)}
+
+# Nombres de la tabla Poblacion para las columnas del archivo 'pop'
+NOMBRES_POBLACION = {
+    'Country': 'Pais_Codigo',
+    'SubDiv': 'Subdiv',
+    'Year': 'Anio',
+    'Sex': 'Sexo',
+    'Lb': 'Nacidos_Vivos',
+}
+NOMBRES_POBLACION.update({f'Pop{i}': f'Pob{i}' for i in range(1, 27)})
+
+
+def listar_archivos_poblacion(csv_dir):
+    """Devuelve las fuentes de población: 'pop.csv' / 'pop' o el miembro 'pop' de un .zip."""
+    fuentes = []
+    for nombre in ('pop.csv', 'pop'):
+        if os.path.isfile(os.path.join(csv_dir, nombre)):
+            return [nombre]
+    for ruta_zip in sorted(glob.glob(os.path.join(csv_dir, '*.zip'))):
+        try:
+            with zipfile.ZipFile(ruta_zip) as archivo_zip:
+                nombres = archivo_zip.namelist()
+        except zipfile.BadZipFile:
+            continue
+        for miembro in nombres:
+            if PATRON_MIEMBRO_POBLACION.match(os.path.basename(miembro)):
+                fuentes.append(f"{os.path.basename(ruta_zip)}{whodata.SEPARADOR_ZIP}{miembro}")
+    return fuentes
+
+
+def esquema_desde_tipos(columnas, tipos, renombrar=None):
+    """Esquema Arrow de salida en el orden de la cabecera del archivo."""
+    renombrar = renombrar or {}
+    return pa.schema([(renombrar.get(col, col), tipos.get(col, pa.string())) for col in columnas])
+
+
+def leer_lotes(fuentes, tipos, esquema, redondear=()):
+    """
+    Lee las fuentes en streaming con el lector CSV de Arrow y va devolviendo
+    RecordBatch ya tipados (con los nombres de columna del esquema).
+    """
+    tipos_lectura = {col: (pa.float64() if col in redondear else tipo) for col, tipo in tipos.items()}
+    for fuente in fuentes:
+        inicio = time.perf_counter()
+        filas = 0
+        with whodata.abrir_fuente(fuente) as f:
+            lector = pa_csv.open_csv(
+                f,
+                read_options=pa_csv.ReadOptions(block_size=TAMANO_BLOQUE),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=tipos_lectura,
+                    strings_can_be_null=True,
+                ),
+            )
+            for lote in lector:
+                filas += lote.num_rows
+                columnas = [
+                    pa_compute.cast(pa_compute.round(columna), campo.type)
+                    if nombre in redondear else columna
+                    for nombre, columna, campo in zip(lote.schema.names, lote.columns, esquema)
+                ]
+                lote = pa.RecordBatch.from_arrays(columnas, schema=esquema)
+                yield lote
+        duracion = time.perf_counter() - inicio
+        print(f"   -> '{os.path.basename(fuente)}': {filas} filas en {duracion:.1f} s "
+              f"({filas / duracion if duracion > 0 else 0:,.0f} filas/s)")
+
+
+def escribir_dataset(fuentes, tipos, destino, columna_particion, renombrar=None, redondear=()):
+    """Convierte las fuentes en un dataset Parquet particionado por `columna_particion`."""
+    columnas = whodata.leer_cabecera(fuentes[0])
+    esquema = esquema_desde_tipos(columnas, tipos, renombrar)
+
+    pa_ds.write_dataset(
+        leer_lotes(fuentes, tipos, esquema, redondear),
+        destino,
+        schema=esquema,
+        format='parquet',
+        partitioning=pa_ds.partitioning(
+            pa.schema([esquema.field(columna_particion)]), flavor='hive'
+        ),
+        file_options=pa_ds.ParquetFileFormat().make_write_options(compression=COMPRESION),
+        existing_data_behavior='delete_matching',
+    )
+
+
+def tamano_carpeta(ruta):
+    total = 0
+    for raiz, _, archivos in os.walk(ruta):
+        total += sum(os.path.getsize(os.path.join(raiz, a)) for a in archivos)
+    return total
+
+
+def convertir(csv_dir, salida):
+    """Genera los datasets Parquet de mortalidad y población."""
+    fuentes_mortalidad = [os.path.join(csv_dir, nombre)
+                          for nombre in whodata.listar_archivos_mortalidad(csv_dir)
+                          if whodata.existe_fuente(os.path.join(csv_dir, nombre))]
+    fuentes_poblacion = [os.path.join(csv_dir, nombre) for nombre in listar_archivos_poblacion(csv_dir)]
+
+    trabajos = [
+        ('mortalidad', fuentes_mortalidad, TIPOS_MORTALIDAD, 'Year', None, ()),
+        ('poblacion', fuentes_poblacion, TIPOS_POBLACION, 'Anio', NOMBRES_POBLACION, REDONDEAR_POBLACION),
+    ]
+
+    for nombre, fuentes, tipos, columna_particion, renombrar, redondear in trabajos:
+        if not fuentes:
+            print(f"\n-> No se encontraron archivos de {nombre}, saltando.")
+            continue
+
+        destino = os.path.join(salida, nombre)
+        print(f"\n-> Convirtiendo {len(fuentes)} archivo(s) de {nombre} a '{destino}'...")
+        inicio = time.perf_counter()
+        escribir_dataset(fuentes, tipos, destino, columna_particion, renombrar, redondear)
+        duracion = time.perf_counter() - inicio
+        print(f"   -> ¡Éxito! {tamano_carpeta(destino) / 1024 / 1024:,.1f} MB en Parquet "
+              f"({duracion:.1f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte los datos de la OMS a Parquet particionado por año")
+    parser.add_argument('--csv-dir', default=whodata.CARPETA_CSV,
+                        help="Carpeta con los .csv o .zip de la OMS")
+    parser.add_argument('--salida', default=CARPETA_PARQUET,
+                        help=f"Carpeta de salida (por defecto: {CARPETA_PARQUET})")
+    args = parser.parse_args()
+
+    print("==============================================")
+    print(" Conversión WHO -> Parquet")
+    print("==============================================")
+    convertir(args.csv_dir, args.salida)
+
+
+if __name__ == "__main__":
+    main()